@@ -0,0 +1,140 @@
+"""Cache de l'audio décodé : chaque upload est décodé une seule fois en PCM 16 kHz mono float32.
+
+Le fichier brut ``<sha256>.f32`` est rangé dans le dossier d'upload du job (il disparaît avec
+lui) et lié physiquement dans un index commun ``index_dir/<sha256>.f32`` pour être réutilisé
+par les autres jobs du même audio. Une entrée d'index qui n'est plus liée à aucun upload
+(nombre de liens = 1) est supprimée par ``gc()``.
+"""
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List
+
+SAMPLING_RATE = 16000
+DTYPE = "float32"
+SUFFIX = ".f32"
+
+
+def decode_to_file(src: str, dest: Path) -> int:
+    """Décode ``src`` en flux (mémoire bornée) vers ``dest`` ; renvoie le nombre d'échantillons."""
+    import av
+    import numpy as np
+
+    resampler = av.audio.resampler.AudioResampler(format="s16", layout="mono", rate=SAMPLING_RATE)
+    n = 0
+
+    def write(frames, out):
+        nonlocal n
+        for f in frames:
+            chunk = f.to_ndarray().reshape(-1).astype(np.float32) / 32768.0
+            chunk.tofile(out)
+            n += len(chunk)
+
+    with av.open(src, mode="r", metadata_errors="ignore") as container, dest.open("wb") as out:
+        frames = container.decode(audio=0)
+        while True:
+            try:
+                frame = next(frames)
+            except StopIteration:
+                break
+            except av.error.InvalidDataError:
+                continue   # trame corrompue : ignorée, comme faster-whisper
+            write(resampler.resample(frame), out)
+        write(resampler.resample(None), out)
+    return n
+
+
+def open_pcm(path: Path) -> Any:
+    """Vue mémoire (lecture seule, sans copie) d'un fichier PCM décodé."""
+    import numpy as np
+    if path.stat().st_size == 0:
+        return np.zeros(0, dtype=DTYPE)
+    return np.memmap(str(path), dtype=DTYPE, mode="r")
+
+
+class DecodedAudioCache:
+    def __init__(self, index_dir: Path):
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self._guard = threading.Lock()
+        # sha256 -> [verrou, utilisateurs] ; l'entrée disparaît avec son dernier utilisateur
+        self._locks: Dict[str, List[Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, sha256: str, job_dir: Path) -> Path:
+        return job_dir / ".decoded" / f"{sha256}{SUFFIX}"
+
+    @contextmanager
+    def _locked(self, sha256: str):
+        """Verrou propre à ``sha256``, compté sous ``_guard`` : il n'est retiré du dict que
+        lorsque plus personne ne l'attend ni ne le détient."""
+        with self._guard:
+            entry = self._locks.setdefault(sha256, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[sha256]
+
+    def ensure(self, sha256: str, src: str, job_dir: Path) -> Path:
+        """Chemin du PCM décodé de ``src`` dans ``job_dir`` (décodé si aucun job ne l'a déjà fait)."""
+        local = self.path_for(sha256, job_dir)
+        with self._locked(sha256):
+            if local.exists():
+                self.hits += 1
+                return local
+            local.parent.mkdir(parents=True, exist_ok=True)
+            shared = self.index_dir / f"{sha256}{SUFFIX}"
+            if shared.exists():
+                try:
+                    os.link(shared, local)
+                except OSError:
+                    shutil.copy2(shared, local)
+                self.hits += 1
+                return local
+            self.misses += 1
+            tmp = local.parent / f".{uuid.uuid4().hex}.tmp"
+            try:
+                decode_to_file(src, tmp)
+                os.replace(tmp, local)
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
+            try:
+                os.link(local, shared)
+            except OSError:
+                pass   # autre volume : pas de partage entre jobs, le cache local suffit
+            return local
+
+    def load(self, sha256: str, src: str, job_dir: Path) -> Any:
+        return open_pcm(self.ensure(sha256, src, job_dir))
+
+    def gc(self) -> int:
+        """Supprime les entrées d'index dont plus aucun upload ne détient de lien."""
+        removed = 0
+        for p in self.index_dir.glob(f"*{SUFFIX}"):
+            with self._locked(p.stem):   # pas pendant qu'un job lie cette entrée
+                try:
+                    if p.stat().st_nlink <= 1:
+                        p.unlink()
+                        removed += 1
+                except OSError:
+                    continue
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        entries = list(self.index_dir.glob(f"*{SUFFIX}"))
+        return {
+            "entries": len(entries),
+            "bytes": sum(p.stat().st_size for p in entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,70 @@
+"""Découpage d'un audio trop gros pour l'API en morceaux compressés, coupés aux silences."""
+from fractions import Fraction
+from pathlib import Path
+from typing import Any, List, Tuple
+
+import parallel_transcribe
+
+SAMPLING_RATE = parallel_transcribe.SAMPLING_RATE
+AAC_FRAME = 1024
+
+
+def piece_seconds(max_bytes: int, bitrate: int, max_piece_s: float) -> float:
+    """Durée maximale d'un morceau pour rester sous ``max_bytes`` (10 % de marge conteneur)."""
+    return max(30.0, min(max_piece_s, max_bytes * 8 * 0.9 / bitrate))
+
+
+def encode_m4a(samples: Any, dest: Path, bitrate: int) -> None:
+    """Encode des échantillons float32 16 kHz mono en AAC/M4A avec PyAV."""
+    import av
+    with av.open(str(dest), "w", format="mp4") as out:
+        stream = out.add_stream("aac", rate=SAMPLING_RATE)
+        stream.bit_rate = bitrate
+        stream.codec_context.layout = "mono"
+        for i in range(0, len(samples), AAC_FRAME):
+            frame = av.AudioFrame.from_ndarray(
+                samples[i:i + AAC_FRAME].reshape(1, -1), format="fltp", layout="mono"
+            )
+            frame.sample_rate = SAMPLING_RATE
+            frame.pts = i
+            frame.time_base = Fraction(1, SAMPLING_RATE)
+            for packet in stream.encode(frame):
+                out.mux(packet)
+        for packet in stream.encode(None):
+            out.mux(packet)
+
+
+def split_for_upload(path: str, out_dir: Path, max_bytes: int, bitrate: int = 32000,
+                     max_piece_s: float = 600.0, audio: Any = None) -> List[Tuple[Path, float, float]]:
+    """Découpe ``path`` en morceaux M4A de moins de ``max_bytes`` octets.
+
+    Les coupures tombent dans les silences détectés par Silero VAD ; un morceau plus long
+    que la durée permise (long silence, aucune parole détectée) est coupé à intervalles
+    réguliers, et un morceau encodé qui dépasse malgré tout ``max_bytes`` est coupé en deux.
+    Renvoie ``[(chemin, début_s, fin_s), ...]`` dans l'ordre. ``audio`` : PCM 16 kHz déjà décodé.
+    """
+    import numpy as np
+
+    if audio is None:
+        from faster_whisper.audio import decode_audio
+        audio = decode_audio(path, sampling_rate=SAMPLING_RATE)
+    limit = int(piece_seconds(max_bytes, bitrate, max_piece_s) * SAMPLING_RATE)
+    # plan_chunks autorise jusqu'à 2×target : on vise la moitié de la durée max
+    bounds = parallel_transcribe.plan_chunks(
+        parallel_transcribe.speech_regions(audio), len(audio), limit // 2
+    ) or parallel_transcribe.cap_chunks([(0, len(audio))], limit)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = Path(path).stem
+    pieces = []
+    todo = list(reversed(bounds))
+    while todo:
+        a, b = todo.pop()
+        dest = out_dir / f"{stem}_part{len(pieces) + 1:03d}.m4a"
+        encode_m4a(np.ascontiguousarray(audio[a:b]), dest, bitrate)
+        if dest.stat().st_size > max_bytes and b - a > SAMPLING_RATE:
+            mid = (a + b) // 2   # débit réel au-dessus de l'estimation : deux moitiés
+            todo.extend([(mid, b), (a, mid)])
+            continue
+        pieces.append((dest, a / SAMPLING_RATE, b / SAMPLING_RATE))
+    return pieces
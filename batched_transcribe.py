@@ -0,0 +1,108 @@
+"""Inférence par lots (faster-whisper ``BatchedInferencePipeline``).
+
+- ``transcribe_file`` : les segments VAD d'un même fichier sont encodés/décodés par lots ;
+- ``transcribe_many`` : les segments VAD de plusieurs fichiers courts d'un job sont mis
+  bout à bout dans les mêmes lots, puis redistribués fichier par fichier.
+
+Le texte est à peu près celui du mode séquentiel, mais pas à l'identique : chaque morceau VAD
+est décodé sans le contexte du précédent, et les segments s'arrêtent aux frontières des
+morceaux.
+"""
+from bisect import bisect_right
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+SAMPLING_RATE = 16000
+MAX_CLIP_S = 30   # fenêtre de l'encodeur Whisper
+
+
+def _pipeline_class():
+    try:
+        from faster_whisper import BatchedInferencePipeline   # faster-whisper >= 1.1
+    except Exception:
+        return None
+    return BatchedInferencePipeline
+
+
+def available() -> bool:
+    return _pipeline_class() is not None
+
+
+def transcribe_file(model: Any, audio: Any, batch_size: int, options: Dict[str, Any]):
+    """``model.transcribe(audio, **options)`` par lots (segments découpés par morceau VAD) ;
+    renvoie ``(segments, info)``."""
+    pipe = _pipeline_class()(model=model)
+    return pipe.transcribe(audio, batch_size=batch_size, **options)
+
+
+class _Demux:
+    """Répartit un flux ``(index_fichier, début, fin, texte)`` en un itérateur par fichier.
+
+    Les itérateurs doivent être consommés dans l'ordre des fichiers ; une erreur du flux
+    est relancée pour le fichier en cours et pour tous les suivants.
+    """
+
+    _END = object()
+
+    def __init__(self, stream: Iterator[Tuple[int, float, float, str]]):
+        self._it = stream
+        self._head: Any = None
+        self._error: Optional[BaseException] = None
+
+    def _peek(self):
+        if self._error is not None:
+            raise self._error
+        if self._head is None:
+            try:
+                self._head = next(self._it, self._END)
+            except Exception as e:
+                self._error = e
+                raise
+        return self._head
+
+    def take(self, index: int) -> Iterator[Tuple[float, float, str]]:
+        while True:
+            head = self._peek()
+            if head is self._END or head[0] > index:
+                return
+            self._head = None
+            if head[0] == index:
+                yield head[1], head[2], head[3]
+            # head[0] < index : reste d'un fichier abandonné en cours de route, ignoré
+
+
+def transcribe_many(model: Any, audios: List[Any], batch_size: int,
+                    options: Dict[str, Any]) -> List[Iterator[Tuple[float, float, str]]]:
+    """Transcrit plusieurs fichiers courts (16 kHz mono) dans des lots communs.
+
+    Renvoie un itérateur paresseux de ``(début, fin, texte)`` par fichier (temps relatifs
+    au fichier), à consommer dans l'ordre.
+    """
+    import numpy as np
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    offsets: List[int] = []
+    clips: List[Dict[str, int]] = []
+    pos = 0
+    for audio in audios:
+        offsets.append(pos)
+        for ts in get_speech_timestamps(audio, VadOptions(max_speech_duration_s=MAX_CLIP_S)):
+            clips.append({"start": ts["start"] + pos, "end": ts["end"] + pos})
+        pos += len(audio)
+
+    def stream():
+        if not clips:
+            return
+        opts = {k: v for k, v in options.items() if k != "vad_filter"}
+        pipe = _pipeline_class()(model=model)
+        segments, _ = pipe.transcribe(
+            np.concatenate(audios), batch_size=batch_size,
+            vad_filter=False, clip_timestamps=clips, **opts,
+        )
+        for seg in segments:
+            middle = int((seg.start + seg.end) / 2 * SAMPLING_RATE)
+            i = max(0, bisect_right(offsets, middle) - 1)
+            base = offsets[i] / SAMPLING_RATE
+            yield i, seg.start - base, seg.end - base, seg.text or ""
+
+    demux = _Demux(stream())
+    return [demux.take(i) for i in range(len(audios))]
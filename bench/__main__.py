@@ -0,0 +1,118 @@
+"""Suite de benchmarks hors ligne ; résultats en JSON pour comparer les commits.
+
+    python -m bench local --models base,small --compute-types int8 --beams 1,5 --vad 1,0 --lengths 30,300
+    python -m bench api --clients 32 --jobs 128 --stub-latency 0.2
+    python -m bench download --weights-mb 256 --waiters 8
+    python -m bench all --out bench_output.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+
+from bench.audio import make_wav
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _csv(cast):
+    return lambda s: [cast(x) for x in s.split(",") if x.strip()]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _meta() -> Dict[str, Any]:
+    return {
+        "commit": _git_commit(),
+        "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _log(msg: str) -> None:
+    print(msg, file=sys.stderr, flush=True)
+
+
+def run_local(args) -> Any:
+    from bench import local
+    with tempfile.TemporaryDirectory() as tmp:
+        audio_files = {
+            float(s): str(make_wav(Path(tmp) / f"speech_{s:g}s.wav", s, seed=int(s)))
+            for s in args.lengths
+        }
+        return local.run(
+            args.models, args.compute_types, args.beams, [bool(v) for v in args.vad],
+            audio_files, lang=args.lang, cpu_threads=args.cpu_threads, log=_log,
+        )
+
+
+def run_api(args) -> Any:
+    from bench import api
+    return api.run(
+        clients=args.clients, jobs=args.jobs, audio_s=args.audio_s, stub_latency=args.stub_latency,
+        stub_fail_every=args.stub_fail_every, log=_log,
+    )
+
+
+def run_download(args) -> Any:
+    from bench import download
+    return download.run(weights_mb=args.weights_mb, clients=args.waiters,
+                        bytes_per_second=args.hub_bytes_per_second, log=_log)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(prog="python -m bench", description=__doc__.splitlines()[0])
+    ap.add_argument("suite", choices=["local", "api", "download", "all"])
+    ap.add_argument("--out", type=Path, help="fichier JSON (sinon sortie standard)")
+    g = ap.add_argument_group("local")
+    g.add_argument("--models", type=_csv(str), default=["base"])
+    g.add_argument("--compute-types", type=_csv(str), default=["int8"])
+    g.add_argument("--beams", type=_csv(int), default=[5])
+    g.add_argument("--vad", type=_csv(int), default=[1], help="1,0 pour comparer avec/sans VAD")
+    g.add_argument("--lengths", type=_csv(float), default=[30.0, 120.0], help="durées d'audio (s)")
+    g.add_argument("--lang", default="fr")
+    g.add_argument("--cpu-threads", type=int, default=0)
+    g = ap.add_argument_group("api")
+    g.add_argument("--clients", type=int, default=16)
+    g.add_argument("--jobs", type=int, default=64)
+    g.add_argument("--audio-s", type=float, default=5.0)
+    g.add_argument("--stub-latency", type=float, default=0.2)
+    g.add_argument("--stub-fail-every", type=int, default=0)
+    g = ap.add_argument_group("download")
+    g.add_argument("--weights-mb", type=float, default=64)
+    g.add_argument("--waiters", type=int, default=4, help="demandeurs simultanés du même modèle")
+    g.add_argument("--hub-bytes-per-second", type=float, default=0.0)
+    args = ap.parse_args()
+
+    result: Dict[str, Any] = {"meta": _meta()}
+    if args.suite in ("local", "all"):
+        result["local"] = run_local(args)
+    if args.suite in ("api", "all"):
+        result["api"] = run_api(args)
+    if args.suite in ("download", "all"):
+        result["download"] = run_download(args)
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.out:
+        args.out.write_text(text + "\n", encoding="utf-8")
+        _log(f"Résultats écrits dans {args.out}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Charge sur l'API HTTP : /api/transcribe et /api/status avec de nombreux clients simultanés.
+
+Le serveur est lancé dans un sous-processus uvicorn, en mode cloud branché sur le faux
+serveur OpenAI (``bench.stub_openai``) : on mesure la surcharge de l'API et du chemin
+cloud (file, pipeline, reprises) sans réseau ni modèle local. Les jobs créés (uploads/,
+transcriptions/, base des jobs) vont dans un WHISPER_DATA_DIR temporaire, supprimé à la fin.
+"""
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from bench import stub_openai
+from bench.audio import make_wav
+
+ROOT = Path(__file__).resolve().parent.parent
+_CONFIG_RE = re.compile(r'<script id="whisper-config" type="application/json">(.*?)</script>', re.S)
+
+
+def latency_summary(samples: List[float]) -> Dict[str, Any]:
+    if not samples:
+        return {"count": 0}
+    s = sorted(samples)
+
+    def pct(p: float) -> float:
+        return round(s[min(len(s) - 1, int(p * len(s)))] * 1000, 2)
+
+    return {
+        "count": len(s),
+        "mean_ms": round(statistics.fmean(s) * 1000, 2),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": round(s[-1] * 1000, 2),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, env: Dict[str, str]) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=str(ROOT), env={**os.environ, **env},
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Le serveur s'est arrêté (code {proc.returncode})")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("Le serveur n'a pas démarré en 60 s")
+
+
+def run(clients: int = 16, jobs: int = 64, audio_s: float = 5.0, stub_latency: float = 0.2,
+        stub_fail_every: int = 0, poll_interval: float = 0.25, port: Optional[int] = None,
+        log=print) -> Dict[str, Any]:
+    stub_cfg = stub_openai.StubConfig(latency=stub_latency, fail_every=stub_fail_every, fail_status=429)
+    stub = stub_openai.serve(0, stub_cfg)
+    port = port or _free_port()
+    data_dir = tempfile.TemporaryDirectory()
+    try:
+        server = start_server(port, {
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{stub.server_address[1]}/v1",
+            "OPENAI_API_KEY": "stub",
+            "WHISPER_PRELOAD_MODEL": "",
+            "WHISPER_DATA_DIR": data_dir.name,
+        })
+    except Exception:
+        data_dir.cleanup()
+        stub.shutdown()
+        raise
+    base = f"http://127.0.0.1:{port}"
+    try:
+        with httpx.Client(base_url=base, timeout=120,
+                          limits=httpx.Limits(max_connections=clients * 2)) as client:
+            cfg = json.loads(_CONFIG_RE.search(client.get("/").text).group(1))
+            with tempfile.TemporaryDirectory() as tmp:
+                # Un audio différent par job : sinon le cache des résultats répondrait à la place du pipeline
+                wavs = [make_wav(Path(tmp) / f"bench_{i:04d}.wav", audio_s, seed=i) for i in range(jobs)]
+                return _load_test(client, cfg, wavs, clients, poll_interval, stub_cfg, log)
+    finally:
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+        stub.shutdown()
+        data_dir.cleanup()
+
+
+def _load_test(client: httpx.Client, cfg: Dict[str, Any], wavs: List[Path], clients: int,
+               poll_interval: float, stub_cfg: stub_openai.StubConfig, log) -> Dict[str, Any]:
+    submit_lat: List[float] = []
+    status_lat: List[float] = []
+    codes: Dict[str, int] = {}
+    lock = threading.Lock()
+    form = {
+        "use_api": "1",
+        "model_label": cfg["MODELS_CLOUD"][-1],
+        "lang_label": cfg["DEFAULT_LANG"],
+        "output_type": "resume",
+    }
+
+    def submit(path: Path) -> Optional[Dict[str, Any]]:
+        t0 = time.perf_counter()
+        with path.open("rb") as fh:
+            r = client.post("/api/transcribe", data=form, files={"files": (path.name, fh, "audio/wav")})
+        elapsed = time.perf_counter() - t0
+        with lock:
+            submit_lat.append(elapsed)
+            codes[str(r.status_code)] = codes.get(str(r.status_code), 0) + 1
+        return {"job_id": r.json()["job_id"], "submitted": time.perf_counter()} if r.status_code == 200 else None
+
+    def follow(job: Dict[str, Any]) -> Dict[str, Any]:
+        since, rev = 0, None
+        while True:
+            params = {"since": since, **({"rev": rev} if rev is not None else {})}
+            t0 = time.perf_counter()
+            r = client.get(f"/api/status/{job['job_id']}", params=params)
+            with lock:
+                status_lat.append(time.perf_counter() - t0)
+            data = r.json()
+            since, rev = data.get("log_offset", since), data.get("rev", rev)
+            if data["status"] in ("done", "error"):
+                return {"status": data["status"], "e2e_s": time.perf_counter() - job["submitted"],
+                        "timings": data.get("timings", {})}
+            time.sleep(poll_interval)
+
+    log(f"[api] {len(wavs)} jobs, {clients} clients")
+    t_start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        submitted = [j for j in pool.map(submit, wavs) if j]
+        t_submitted = time.perf_counter()
+        finished = list(pool.map(follow, submitted))
+    wall = time.perf_counter() - t_start
+
+    metrics_text = client.get("/metrics").text
+    with stub_cfg.lock:
+        stub_stats = dict(stub_cfg.stats)
+    return {
+        "clients": clients,
+        "jobs_submitted": len(submitted),
+        "submit_status_codes": codes,
+        "transcribe": {**latency_summary(submit_lat),
+                       "throughput_rps": round(len(submit_lat) / max(t_submitted - t_start, 1e-9), 2)},
+        "status": {**latency_summary(status_lat),
+                   "throughput_rps": round(len(status_lat) / max(wall, 1e-9), 2)},
+        "jobs": {
+            "done": sum(1 for f in finished if f["status"] == "done"),
+            "error": sum(1 for f in finished if f["status"] == "error"),
+            "e2e": latency_summary([f["e2e_s"] for f in finished]),
+            "jobs_per_s": round(len(finished) / max(wall, 1e-9), 2),
+        },
+        "stub": stub_stats,
+        "server_jobs_lock_wait": _metric_sum(metrics_text, "whisper_jobs_lock_wait_seconds"),
+        "wall_s": round(wall, 3),
+    }
+
+
+def _metric_sum(text: str, name: str) -> Dict[str, float]:
+    """``{"sum_s", "count"}`` d'un histogramme sans étiquettes lu dans la sortie de /metrics."""
+    out = {}
+    for line in text.splitlines():
+        if line.startswith(f"{name}_sum "):
+            out["sum_s"] = float(line.split()[-1])
+        elif line.startswith(f"{name}_count "):
+            out["count"] = float(line.split()[-1])
+    return out
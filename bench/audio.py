@@ -0,0 +1,60 @@
+"""Audio synthétique « type parole » pour les benchmarks hors ligne.
+
+Des énoncés de 1,5 à 6 s faits de syllabes voisées (fondamentale 90–220 Hz, harmoniques
+filtrées par deux formants) séparés par des pauses : assez proche de la parole pour
+exercer Silero VAD et le décodeur, sans fichier à embarquer. Déterministe par ``seed``.
+"""
+import wave
+from pathlib import Path
+
+import numpy as np
+
+SAMPLING_RATE = 16000
+
+
+def _syllable(rng: np.random.Generator, sr: int) -> np.ndarray:
+    n = int(rng.uniform(0.12, 0.30) * sr)
+    t = np.arange(n) / sr
+    f0 = rng.uniform(90, 220) * (1 + rng.uniform(-0.15, 0.15) * t / max(t[-1], 1e-6))
+    phase = 2 * np.pi * np.cumsum(f0) / sr
+    f1, f2 = rng.uniform(300, 900), rng.uniform(900, 2500)
+    out = np.zeros(n)
+    for h in range(1, 16):
+        freq = h * f0.mean()
+        if freq > sr / 2:
+            break
+        gain = np.exp(-((freq - f1) / 200) ** 2) + 0.6 * np.exp(-((freq - f2) / 300) ** 2) + 0.02
+        out += gain * np.sin(h * phase)
+    out += 0.05 * rng.standard_normal(n)          # souffle
+    return out * np.hanning(n)
+
+
+def speech_like(seconds: float, seed: int = 0, sr: int = SAMPLING_RATE) -> np.ndarray:
+    """Signal mono float32 de ``seconds`` secondes à ``sr`` Hz."""
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sr)
+    out = np.zeros(total, dtype=np.float32)
+    pos = int(rng.uniform(0.1, 0.5) * sr)
+    while pos < total:
+        end = min(total, pos + int(rng.uniform(1.5, 6.0) * sr))
+        while pos < end:
+            syl = _syllable(rng, sr)[: end - pos]
+            out[pos:pos + len(syl)] += syl.astype(np.float32)
+            pos += len(syl) + int(rng.uniform(0.0, 0.06) * sr)
+        pos += int(rng.uniform(0.3, 1.5) * sr)    # pause entre énoncés
+    peak = float(np.abs(out).max()) or 1.0
+    return (0.5 * out / peak).astype(np.float32)
+
+
+def write_wav(path: Path, samples: np.ndarray, sr: int = SAMPLING_RATE) -> Path:
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sr)
+        w.writeframes(pcm.tobytes())
+    return path
+
+
+def make_wav(path: Path, seconds: float, seed: int = 0) -> Path:
+    return write_wav(path, speech_like(seconds, seed))
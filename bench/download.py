@@ -0,0 +1,63 @@
+"""Téléchargement des modèles contre un faux hub local (``bench.stub_hub``).
+
+Plusieurs demandeurs simultanés du même modèle (un seul transfert attendu), débit et
+surcoût de la vérification, reprise après coupure et détection d'un fichier corrompu.
+"""
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict
+
+from bench import stub_hub
+
+REPO = "stub/faster-whisper-bench"
+
+
+def _scenario(root: Path, cfg: stub_hub.StubConfig, clients: int) -> Dict[str, Any]:
+    import model_download
+    server = stub_hub.serve(cfg)
+    try:
+        dl = model_download.ModelDownloader(
+            root / "models", {"bench": REPO},
+            endpoint=f"http://127.0.0.1:{server.server_address[1]}", retries=2,
+        )
+        updates = []
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(clients) as pool:
+            futures = [pool.submit(dl.ensure, "bench", lambda d, t: updates.append(d)) for _ in range(clients)]
+            errors = []
+            for f in futures:
+                try:
+                    f.result()
+                except model_download.DownloadError as e:
+                    errors.append(str(e))
+        elapsed = time.perf_counter() - t0
+        size = dl.size("bench") or 0
+        return {
+            "ready": dl.is_ready("bench"),
+            "errors": sorted(set(errors)),
+            "seconds": round(elapsed, 3),
+            "mb_per_s": round(size / 1024**2 / elapsed, 1) if size else None,
+            "progress_updates": len(updates),
+            "server": dict(cfg.stats),
+        }
+    finally:
+        server.shutdown()
+
+
+def run(weights_mb: float = 64, clients: int = 4, bytes_per_second: float = 0.0, log=print) -> Dict[str, Any]:
+    weights = int(weights_mb * 1024**2)
+    result: Dict[str, Any] = {"weights_mb": weights_mb, "clients": clients}
+    for name, opts in (
+        ("shared", {}),
+        ("resume", {"cut_after": weights // 2}),
+        ("corrupt", {"corrupt": True}),
+    ):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            stub_hub.make_repo(root / "hub", REPO, weights)
+            cfg = stub_hub.StubConfig(root / "hub", bytes_per_second=bytes_per_second, **opts)
+            log(f"[download] {name}…")
+            result[name] = _scenario(root, cfg, clients)
+    return result
@@ -0,0 +1,100 @@
+"""Benchmark du chemin local : RTF, pic de mémoire et chargement à froid / à chaud.
+
+Chaque combinaison (modèle, compute_type, beam_size, VAD) tourne dans un processus neuf
+(« spawn ») pour que le pic RSS et le premier chargement du modèle lui soient propres :
+
+- ``load_cold_s`` : premier chargement dans le processus (fichiers éventuellement déjà
+  dans le cache disque de l'OS si une configuration précédente a lu le même modèle) ;
+- ``load_warm_s`` : second chargement du même modèle dans le même processus.
+
+Le modèle est chargé et l'audio transcrit par le chemin du serveur (``_load_whisper_model``,
+``_local_segments`` : options, VAD, lots ou mode parallèle selon les variables WHISPER_*),
+avec un WHISPER_DATA_DIR temporaire. Les modèles sont lus dans WHISPER_MODELS_DIR (comme le
+serveur) : lancer le benchmark hors ligne suppose qu'ils y ont déjà été téléchargés.
+"""
+import gc
+import itertools
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:   # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)   # octets sur macOS, Ko ailleurs
+
+
+def _run_config(config: Dict[str, Any], audio_files: Dict[float, str], data_dir: str, lang: str,
+                cpu_threads: int) -> Dict[str, Any]:
+    """Exécuté dans un processus dédié : le serveur y est importé avec les réglages de la combinaison."""
+    os.environ.update({
+        "WHISPER_DATA_DIR": data_dir,
+        "WHISPER_COMPUTE_TYPE": config["compute_type"],
+        "WHISPER_CPU_THREADS": str(cpu_threads),
+        "WHISPER_PRELOAD_MODEL": "",
+    })
+    import server
+    server.LOCAL_VAD_FILTER = config["vad"]   # réglage du module, sans variable d'environnement
+    server._ensure_vad_assets()
+    key = server._local_model_key(config["model"])
+
+    def load():
+        t0 = time.perf_counter()
+        model = server._load_whisper_model(key)
+        return model, time.perf_counter() - t0
+
+    model, cold = load()
+    del model
+    gc.collect()
+    model, warm = load()
+
+    runs: List[Dict[str, Any]] = []
+    job = {"model": config["model"], "lang": lang, "beam_size": config["beam_size"]}
+    for seconds, path in sorted(audio_files.items()):
+        fmeta = {"name": Path(path).name, "path": path}
+        t0 = time.perf_counter()
+        _duration, segments, mode = server._local_segments(None, job, lambda: model, fmeta)
+        n_segments = sum(1 for _ in segments)     # le générateur fait le vrai travail
+        elapsed = time.perf_counter() - t0
+        runs.append({
+            "audio_s": seconds,
+            "elapsed_s": round(elapsed, 3),
+            "rtf": round(elapsed / seconds, 4),
+            "segments": n_segments,
+            "mode": mode,
+        })
+    return {
+        **config,
+        "cpu_threads": cpu_threads,
+        "load_cold_s": round(cold, 3),
+        "load_warm_s": round(warm, 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "runs": runs,
+    }
+
+
+def run(models: List[str], compute_types: List[str], beams: List[int], vad: List[bool],
+        audio_files: Dict[float, str], lang: str = "fr", cpu_threads: int = 0,
+        log=print) -> List[Dict[str, Any]]:
+    """Balaye toutes les combinaisons ; une erreur (modèle absent…) est rapportée sans arrêter le reste."""
+    cpu_threads = cpu_threads or (os.cpu_count() or 1)
+    results = []
+    for model, compute_type, beam, use_vad in itertools.product(models, compute_types, beams, vad):
+        config = {"model": model, "compute_type": compute_type, "beam_size": beam, "vad": use_vad}
+        log(f"[local] {config}")
+        with tempfile.TemporaryDirectory() as data_dir, \
+                ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as ex:
+            try:
+                results.append(ex.submit(_run_config, config, audio_files, data_dir, lang, cpu_threads).result())
+            except Exception as e:
+                results.append({**config, "error": f"{type(e).__name__}: {e}"})
+    return results
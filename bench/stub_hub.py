@@ -0,0 +1,190 @@
+"""Faux hub de modèles local : sert un dossier avec les deux routes utilisées par model_download.
+
+    python -m bench.stub_hub --root ./fake_hub --port 8766 --bytes-per-second 50e6
+    HF_ENDPOINT=http://127.0.0.1:8766 python server.py
+
+``root/<org>/<dépôt>/…`` devient le dépôt ``<org>/<dépôt>``. Les fichiers de plus de
+``lfs_threshold`` octets sont annoncés en LFS (SHA-256), les autres avec leur SHA-1 git.
+"""
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict
+
+_INFO_RE = re.compile(r"^/api/models/(?P<repo>[^/]+/[^/]+)/revision/[^/]+$")
+_FILE_RE = re.compile(r"^/(?P<repo>[^/]+/[^/]+)/resolve/[^/]+/(?P<name>.+)$")
+
+
+class StubConfig:
+    def __init__(self, root: Path, bytes_per_second: float = 0.0, lfs_threshold: int = 1024 * 1024,
+                 corrupt: bool = False, cut_after: int = 0):
+        self.root = Path(root)
+        self.bytes_per_second = bytes_per_second   # débit simulé par requête (0 = illimité)
+        self.lfs_threshold = lfs_threshold
+        self.corrupt = corrupt                     # un octet altéré dans chaque fichier servi
+        self.cut_after = cut_after                 # coupe la première réponse après N octets (0 = jamais)
+        self.lock = threading.Lock()
+        self.stats: Dict[str, Any] = {"info": 0, "files": 0, "ranges": 0, "bytes": 0}
+        self._cut_done = False
+        self._hashes: Dict[Path, str] = {}
+
+    def digest(self, path: Path, algo: str) -> str:
+        with self.lock:
+            cached = self._hashes.get(path)
+        if cached is None:
+            data = path.read_bytes()
+            if algo == "sha256":
+                cached = hashlib.sha256(data).hexdigest()
+            else:
+                cached = hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+            with self.lock:
+                self._hashes[path] = cached
+        return cached
+
+
+def make_handler(cfg: StubConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):   # silencieux
+            pass
+
+        def _send_json(self, status: int, body: Any):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            path = urllib.parse.unquote(self.path.split("?", 1)[0])
+            if path == "/stats":
+                with cfg.lock:
+                    return self._send_json(200, dict(cfg.stats))
+            m = _INFO_RE.match(path)
+            if m:
+                return self._info(m.group("repo"))
+            m = _FILE_RE.match(path)
+            if m:
+                return self._file(m.group("repo"), m.group("name"))
+            self._send_json(404, {"error": "not found"})
+
+        def _info(self, repo: str):
+            base = cfg.root / repo
+            if not base.is_dir():
+                return self._send_json(404, {"error": f"unknown repo {repo}"})
+            siblings = []
+            for p in sorted(x for x in base.rglob("*") if x.is_file()):
+                size = p.stat().st_size
+                entry: Dict[str, Any] = {"rfilename": p.relative_to(base).as_posix(), "size": size}
+                if size > cfg.lfs_threshold:
+                    entry["lfs"] = {"sha256": cfg.digest(p, "sha256"), "size": size}
+                else:
+                    entry["blobId"] = cfg.digest(p, "sha1")
+                siblings.append(entry)
+            with cfg.lock:
+                cfg.stats["info"] += 1
+            self._send_json(200, {"id": repo, "siblings": siblings})
+
+        def _file(self, repo: str, name: str):
+            p = (cfg.root / repo / name).resolve()
+            if not p.is_file() or cfg.root.resolve() not in p.parents:
+                return self._send_json(404, {"error": "not found"})
+            size = p.stat().st_size
+            start = 0
+            m = re.match(r"bytes=(\d+)-$", self.headers.get("Range") or "")
+            if m:
+                start = int(m.group(1))
+                if start >= size:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Length", str(size - start))
+            self.send_header("Content-Type", "application/octet-stream")
+            self.end_headers()
+            with cfg.lock:
+                cfg.stats["files"] += 1
+                cfg.stats["ranges"] += bool(m)
+                cut = cfg.cut_after if cfg.cut_after and not cfg._cut_done and size - start > cfg.cut_after else 0
+                cfg._cut_done = cfg._cut_done or bool(cut)
+            sent = 0
+            with p.open("rb") as f:
+                f.seek(start)
+                while True:
+                    chunk = f.read(256 * 1024)
+                    if not chunk:
+                        break
+                    if cfg.corrupt and sent == 0:
+                        chunk = bytes([chunk[0] ^ 0xFF]) + chunk[1:]
+                    if cut and sent + len(chunk) > cut:
+                        self.wfile.write(chunk[: cut - sent])
+                        self.close_connection = True   # coupure simulée en cours de transfert
+                        return
+                    self.wfile.write(chunk)
+                    sent += len(chunk)
+                    with cfg.lock:
+                        cfg.stats["bytes"] += len(chunk)
+                    if cfg.bytes_per_second:
+                        time.sleep(len(chunk) / cfg.bytes_per_second)
+
+    return Handler
+
+
+def serve(cfg: StubConfig, port: int = 0) -> ThreadingHTTPServer:
+    """Démarre le serveur dans un thread ; ``server.server_address[1]`` donne le port réel."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(cfg))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_repo(root: Path, repo: str, weights_bytes: int, seed: int = 0) -> Path:
+    """Dépôt factice façon faster-whisper : ``model.bin`` de ``weights_bytes`` octets et
+    quelques petits fichiers de configuration."""
+    import random
+    base = Path(root) / repo
+    base.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    with (base / "model.bin").open("wb") as f:
+        left = weights_bytes
+        while left > 0:
+            n = min(left, 1024 * 1024)
+            f.write(rng.randbytes(n))
+            left -= n
+    (base / "config.json").write_text(json.dumps({"stub": True, "seed": seed}), encoding="utf-8")
+    (base / "vocabulary.txt").write_text("\n".join(f"tok{i}" for i in range(2000)), encoding="utf-8")
+    return base
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--root", type=Path, required=True)
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--bytes-per-second", type=float, default=0.0)
+    ap.add_argument("--corrupt", action="store_true")
+    ap.add_argument("--cut-after", type=int, default=0)
+    args = ap.parse_args()
+    server = serve(StubConfig(args.root, args.bytes_per_second, corrupt=args.corrupt,
+                              cut_after=args.cut_after), args.port)
+    print(f"Stub hub sur http://127.0.0.1:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
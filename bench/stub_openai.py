@@ -0,0 +1,134 @@
+"""Faux serveur OpenAI local (transcriptions audio + Responses) pour tester le chemin cloud hors ligne.
+
+    python -m bench.stub_openai --port 8765 --latency 0.2 --fail-every 3 --fail-status 429
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub python server.py
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+
+class StubConfig:
+    def __init__(self, latency: float = 0.0, bytes_per_second: float = 0.0,
+                 fail_every: int = 0, fail_status: int = 500):
+        self.latency = latency                   # délai fixe par requête (s)
+        self.bytes_per_second = bytes_per_second # délai proportionnel à la taille envoyée (0 = aucun)
+        self.fail_every = fail_every             # une requête sur N échoue (0 = jamais)
+        self.fail_status = fail_status
+        self.counter = itertools.count(1)
+        self.lock = threading.Lock()
+        self.stats: Dict[str, int] = {"transcriptions": 0, "responses": 0, "failures": 0, "in_flight_max": 0}
+        self._in_flight = 0
+
+
+def _response_body(text: str) -> Dict[str, Any]:
+    return {
+        "id": "resp_stub",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": "gpt-4o",
+        "status": "completed",
+        "output": [{
+            "type": "message",
+            "id": "msg_stub",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }],
+    }
+
+
+def make_handler(cfg: StubConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):   # silencieux
+            pass
+
+        def _send(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/stats":
+                with cfg.lock:
+                    self._send(200, dict(cfg.stats))
+            else:
+                self._send(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            n = next(cfg.counter)
+            with cfg.lock:
+                cfg._in_flight += 1
+                cfg.stats["in_flight_max"] = max(cfg.stats["in_flight_max"], cfg._in_flight)
+            try:
+                delay = cfg.latency + (len(body) / cfg.bytes_per_second if cfg.bytes_per_second else 0.0)
+                if delay:
+                    time.sleep(delay)
+                if cfg.fail_every and n % cfg.fail_every == 0:
+                    with cfg.lock:
+                        cfg.stats["failures"] += 1
+                    self._send(cfg.fail_status, {"error": {"message": "stub failure", "type": "stub"}},
+                               headers={"Retry-After": "0"})
+                    return
+                path = self.path.split("?", 1)[0].rstrip("/")
+                if path.endswith("/audio/transcriptions"):
+                    with cfg.lock:
+                        cfg.stats["transcriptions"] += 1
+                    self._send(200, {"text": f"Transcription factice ({len(body)} octets reçus)."})
+                elif path.endswith("/responses"):
+                    with cfg.lock:
+                        cfg.stats["responses"] += 1
+                    try:
+                        prompt = json.loads(body or b"{}").get("input", "")
+                    except ValueError:
+                        prompt = ""
+                    self._send(200, _response_body(f"Synthèse factice ({len(str(prompt))} caractères)."))
+                else:
+                    self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+            finally:
+                with cfg.lock:
+                    cfg._in_flight -= 1
+
+    return Handler
+
+
+def serve(port: int = 0, cfg: Optional[StubConfig] = None) -> ThreadingHTTPServer:
+    """Démarre le serveur dans un thread ; ``server.server_address[1]`` donne le port réel."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(cfg or StubConfig()))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.0)
+    ap.add_argument("--bytes-per-second", type=float, default=0.0)
+    ap.add_argument("--fail-every", type=int, default=0)
+    ap.add_argument("--fail-status", type=int, default=500)
+    args = ap.parse_args()
+    cfg = StubConfig(args.latency, args.bytes_per_second, args.fail_every, args.fail_status)
+    server = serve(args.port, cfg)
+    print(f"Stub OpenAI sur http://127.0.0.1:{server.server_address[1]}/v1")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Accès à l'API OpenAI : client HTTP partagé, limiteur de débit et reprises exponentielles.
+
+Les requêtes sont interruptibles sans thread supplémentaire : les sockets du client partagé
+passent par un backend réseau qui, pendant ``call_with_retries``, appelle le ``check`` de
+l'appelant avant chaque envoi et toutes les INTERRUPT_POLL_S pendant l'attente de la
+réponse. L'exception levée (annulation) coupe la connexion : envoi et attente s'arrêtent.
+"""
+import email.utils
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 409, 429}
+
+INTERRUPT_POLL_S = 0.2
+
+_HTTP_LOCK = threading.Lock()
+_HTTP_CLIENT = None
+_SCOPE = threading.local()   # ``check`` de l'appel en cours dans ce thread
+
+
+@contextmanager
+def interruptible(check: Optional[Callable[[], None]]) -> Iterator[None]:
+    """Pendant le bloc, les requêtes du client partagé faites par ce thread appellent ``check``."""
+    previous = getattr(_SCOPE, "check", None)
+    _SCOPE.check = check
+    try:
+        yield
+    finally:
+        _SCOPE.check = previous
+
+
+def shared_http_client(max_connections: int = 16):
+    """Client httpx unique (pool de connexions keep-alive) partagé par tous les clients OpenAI."""
+    global _HTTP_CLIENT
+    with _HTTP_LOCK:
+        if _HTTP_CLIENT is None:
+            import httpx
+            limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+            _HTTP_CLIENT = httpx.Client(
+                transport=_interruptible_transport(limits),
+                timeout=httpx.Timeout(600.0, connect=10.0),
+            )
+        return _HTTP_CLIENT
+
+
+def _interruptible_transport(limits):
+    import httpcore
+    import httpx
+
+    class Stream(httpcore.NetworkStream):
+        def __init__(self, stream):
+            self._stream = stream
+
+        def read(self, max_bytes: int, timeout: Optional[float] = None) -> bytes:
+            check = getattr(_SCOPE, "check", None)
+            if check is None:
+                return self._stream.read(max_bytes, timeout)
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                check()
+                step = INTERRUPT_POLL_S if deadline is None else min(INTERRUPT_POLL_S, deadline - time.monotonic())
+                if step <= 0:
+                    raise httpcore.ReadTimeout("timed out")
+                try:
+                    return self._stream.read(max_bytes, step)
+                except httpcore.ReadTimeout:
+                    continue   # rien reçu pendant ce pas : nouvelle vérification puis attente
+
+        def write(self, buffer: bytes, timeout: Optional[float] = None) -> None:
+            check = getattr(_SCOPE, "check", None)
+            if check is not None:
+                check()   # le corps (fichier audio) part par blocs : l'envoi s'arrête au bloc suivant
+            self._stream.write(buffer, timeout)
+
+        def close(self) -> None:
+            self._stream.close()
+
+        def start_tls(self, ssl_context, server_hostname=None, timeout=None):
+            return Stream(self._stream.start_tls(ssl_context, server_hostname, timeout))
+
+        def get_extra_info(self, info: str) -> Any:
+            return self._stream.get_extra_info(info)
+
+    class Backend(httpcore.NetworkBackend):
+        def __init__(self, backend):
+            self._backend = backend
+
+        def connect_tcp(self, *args, **kwargs):
+            return Stream(self._backend.connect_tcp(*args, **kwargs))
+
+        def connect_unix_socket(self, *args, **kwargs):
+            return Stream(self._backend.connect_unix_socket(*args, **kwargs))
+
+        def sleep(self, seconds: float) -> None:
+            self._backend.sleep(seconds)
+
+    transport = httpx.HTTPTransport(limits=limits)
+    # httpx ne permet pas de passer le backend réseau : on enveloppe celui du pool httpcore
+    # (versions épinglées dans requirements.txt, chemin couvert par tests/test_cloud_client.py).
+    # Sans ce point d'accroche, l'annulation ne marcherait plus : erreur plutôt que silence.
+    pool = getattr(transport, "_pool", None)
+    if pool is None or not hasattr(pool, "_network_backend"):
+        raise RuntimeError(f"httpx {httpx.__version__} / httpcore {httpcore.__version__} non pris en charge : "
+                           "requêtes cloud non interruptibles (voir requirements.txt)")
+    pool._network_backend = Backend(pool._network_backend)
+    return transport
+
+
+class RateLimiter:
+    """Double seau à jetons : requêtes par minute et tokens par minute (0 = illimité)."""
+
+    def __init__(self, rpm: float = 0, tpm: float = 0):
+        self.rpm = float(rpm)
+        self.tpm = float(tpm)
+        self._lock = threading.Lock()
+        self._req = self.rpm
+        self._tok = self.tpm
+        self._last = time.monotonic()
+
+    def _refill_locked(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last
+        self._last = now
+        if self.rpm:
+            self._req = min(self.rpm, self._req + elapsed * self.rpm / 60.0)
+        if self.tpm:
+            self._tok = min(self.tpm, self._tok + elapsed * self.tpm / 60.0)
+
+    def acquire(self, tokens: int = 0, check: Optional[Callable[[], None]] = None) -> float:
+        """Bloque jusqu'à ce qu'une requête de ``tokens`` tokens soit permise ; renvoie l'attente (s).
+
+        ``check`` est appelé pendant l'attente et peut l'interrompre en levant une exception.
+        """
+        waited = 0.0
+        if self.tpm:
+            tokens = min(tokens, int(self.tpm))   # une requête énorme passe quand le seau est plein
+        while True:
+            with self._lock:
+                self._refill_locked()
+                need_req = 1.0 - self._req if self.rpm else 0.0
+                need_tok = tokens - self._tok if self.tpm else 0.0
+                if need_req <= 0 and need_tok <= 0:
+                    if self.rpm:
+                        self._req -= 1.0
+                    if self.tpm:
+                        self._tok -= tokens
+                    return waited
+                delay = max(
+                    need_req * 60.0 / self.rpm if need_req > 0 else 0.0,
+                    need_tok * 60.0 / self.tpm if need_tok > 0 else 0.0,
+                )
+            delay = max(0.01, delay)
+            if check is not None:
+                check()
+                delay = min(delay, INTERRUPT_POLL_S)
+            time.sleep(delay)
+            waited += delay
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    code = status_code(exc)
+    if code is not None:
+        return code in RETRYABLE_STATUS or code >= 500
+    # Erreurs réseau / timeouts (openai.APIConnectionError, httpx.TransportError…)
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    return bool(names & {"APIConnectionError", "APITimeoutError", "TransportError", "TimeoutException"})
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Délai demandé par le serveur (en-tête Retry-After), en secondes."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        parsed = email.utils.parsedate_to_datetime(value)
+        return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+
+def call_with_retries(
+    fn: Callable[[], T],
+    *,
+    retries: int = 5,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+    limiter: Optional[RateLimiter] = None,
+    tokens: int = 0,
+    on_retry: Optional[Callable[[BaseException, int, float], Any]] = None,
+    check: Optional[Callable[[], None]] = None,
+) -> T:
+    """Appelle ``fn`` en réessayant sur 429/5xx/erreurs réseau avec un backoff exponentiel.
+
+    ``fn`` doit être rejouable (rouvrir le fichier à envoyer à chaque tentative).
+    ``check`` (annulation) est appelé avant chaque tentative, pendant l'attente du limiteur,
+    pendant l'envoi et l'attente de la réponse (client partagé) et pendant les pauses ;
+    l'exception qu'il lève interrompt tout.
+    """
+    attempt = 0
+    while True:
+        if check is not None:
+            check()
+        if limiter is not None:
+            limiter.acquire(tokens, check)
+        try:
+            with interruptible(check):
+                return fn()
+        except Exception as e:
+            if check is not None:
+                check()   # annulation pendant l'appel (le SDK l'enveloppe dans APIConnectionError)
+            if attempt >= retries or not is_retryable(e):
+                raise
+            delay = retry_after(e)
+            if delay is None:
+                # backoff exponentiel avec gigue (évite que tous les workers repartent ensemble)
+                delay = min(max_delay, base_delay * (2 ** attempt)) * (0.5 + random.random() / 2)
+            attempt += 1
+            if on_retry is not None:
+                on_retry(e, attempt, delay)
+            _sleep(min(delay, max_delay), check)
+
+
+def _sleep(delay: float, check: Optional[Callable[[], None]], step: float = 0.2) -> None:
+    end = time.monotonic() + delay
+    while True:
+        if check is not None:
+            check()
+        left = end - time.monotonic()
+        if left <= 0:
+            return
+        time.sleep(min(step, left))
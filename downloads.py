@@ -0,0 +1,152 @@
+"""Téléchargements : archives construites une fois par version des sorties, ETag et Range."""
+import hashlib
+import os
+import re
+import threading
+import uuid
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+READ_CHUNK = 256 * 1024
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+_BUILD_LOCKS: Dict[str, threading.Lock] = {}
+_BUILD_LOCKS_GUARD = threading.Lock()
+
+
+def outputs_signature(files: List[Path]) -> str:
+    """Empreinte (nom, taille, date) d'un jeu de fichiers : change dès qu'une sortie change."""
+    h = hashlib.sha1()
+    for p in sorted(files):
+        st = p.stat()
+        h.update(f"{p.name}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()[:20]
+
+
+def cached_artifact(cache_dir: Path, name: str, signature: str, build: Callable[[Path], None]) -> Path:
+    """Renvoie ``cache_dir/<name>.<signature>`` en ne l'assemblant qu'une fois par signature.
+
+    La version précédente est gardée une génération de plus (une requête peut l'avoir
+    obtenue sans l'avoir encore ouverte), les plus anciennes sont supprimées ; deux requêtes
+    simultanées attendent la même construction au lieu de se marcher dessus.
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    target = cache_dir / f"{name}.{signature}"
+    key = str(target)
+    with _BUILD_LOCKS_GUARD:
+        lock = _BUILD_LOCKS.setdefault(key, threading.Lock())
+    with lock:
+        if not target.exists():
+            tmp = cache_dir / f".{name}.{uuid.uuid4().hex}.tmp"
+            try:
+                build(tmp)
+                os.replace(tmp, target)
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
+            stale = []
+            for old in cache_dir.glob(f"{name}.*"):
+                try:
+                    if old != target:
+                        stale.append((old.stat().st_mtime_ns, old))
+                except OSError:
+                    continue
+            for _mtime, old in sorted(stale, reverse=True)[1:]:
+                try:
+                    old.unlink()
+                except OSError:
+                    pass
+    with _BUILD_LOCKS_GUARD:
+        _BUILD_LOCKS.pop(key, None)
+    return target
+
+
+def build_zip(files: List[Path], root: Path) -> Callable[[Path], None]:
+    def build(dest: Path) -> None:
+        with zipfile.ZipFile(dest, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for p in sorted(files):
+                zf.write(p, arcname=str(p.relative_to(root)))
+    return build
+
+
+def build_merged_txt(files: List[Path]) -> Callable[[Path], None]:
+    def build(dest: Path) -> None:
+        with dest.open("w", encoding="utf-8", newline="\n") as out:
+            for i, p in enumerate(files, 1):
+                out.write(f"===== {p.name} =====\n")
+                content = p.read_text(encoding="utf-8")
+                out.write(content)
+                if not content.endswith("\n"):
+                    out.write("\n")
+                if i < len(files):
+                    out.write("\n")
+    return build
+
+
+def _iter_file(fh: BinaryIO, start: int, end: int) -> Iterator[bytes]:
+    with fh:
+        fh.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = fh.read(min(READ_CHUNK, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def file_response(request: Request, path: Path, media_type: str, filename: str,
+                  etag: Optional[str] = None) -> Response:
+    """Réponse en streaming avec ETag (304 si inchangé) et requêtes Range d'un seul intervalle.
+
+    Le fichier est ouvert ici, avant de répondre : un artefact remplacé entre-temps reste
+    lisible par cette réponse.
+    """
+    fh = path.open("rb")
+    try:
+        return _file_response(request, fh, path, media_type, filename, etag)
+    except BaseException:
+        fh.close()
+        raise
+
+
+def _file_response(request: Request, fh: BinaryIO, path: Path, media_type: str, filename: str,
+                   etag: Optional[str]) -> Response:
+    size = os.fstat(fh.fileno()).st_size
+    etag = f'"{etag or outputs_signature([path])}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "no-cache",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    }
+    if request.headers.get("if-none-match") == etag:
+        fh.close()
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    match = _RANGE_RE.match(range_header.strip()) if range_header else None
+    if match and (not if_range or if_range == etag):
+        first, last = match.groups()
+        if first == "" and last == "":
+            match = None
+        elif first == "":                    # bytes=-N : N derniers octets
+            start, end = max(0, size - int(last)), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        if match is not None:
+            if start >= size or start > end:
+                fh.close()
+                return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+            headers.update({"Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)})
+            return StreamingResponse(_iter_file(fh, start, end), status_code=206,
+                                     media_type=media_type, headers=headers)
+
+    headers["Content-Length"] = str(size)
+    return StreamingResponse(_iter_file(fh, 0, size - 1), media_type=media_type, headers=headers)
@@ -0,0 +1,227 @@
+"""File de jobs durable (SQLite) partagée entre processus API et workers, sans service externe.
+
+Mode réparti (WHISPER_ROLE=api / worker) : l'API ne fait qu'enregistrer le job et l'inscrire
+ici ; des workers — sur la même machine ou sur d'autres hôtes partageant le volume de
+données — le réclament avec un bail (``lease_until``) qu'ils renouvellent tant qu'ils
+travaillent. Un worker qui disparaît laisse expirer son bail : le job est réclamé par un
+autre, qui reprend au dernier segment journalisé. Les demandes d'annulation passent par
+la même ligne et sont relevées à chaque renouvellement.
+
+Le fichier SQLite doit se trouver sur un volume aux verrous POSIX fiables (disque local,
+volume partagé d'un orchestrateur…) ; éviter les montages NFS sans verrouillage.
+
+Aucune clé API n'est écrite ici : en mode réparti, les workers utilisent OPENAI_API_KEY.
+"""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_queue (
+    job_id        TEXT PRIMARY KEY,
+    lane          TEXT NOT NULL,
+    priority      INTEGER NOT NULL DEFAULT 0,
+    enqueued_at   REAL NOT NULL,
+    owner         TEXT,
+    lease_until   REAL NOT NULL DEFAULT 0,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    cancel        INTEGER NOT NULL DEFAULT 0,
+    cancel_files  TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS job_queue_order ON job_queue(lane, priority DESC, enqueued_at);
+"""
+
+
+class Claim:
+    __slots__ = ("job_id", "lane", "attempts")
+
+    def __init__(self, job_id: str, lane: str, attempts: int):
+        self.job_id = job_id
+        self.lane = lane
+        self.attempts = attempts
+
+
+class JobQueue:
+    """Une ligne par job en attente ou en cours ; elle disparaît quand le job se termine."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30,
+                                     isolation_level=None)   # transactions explicites (BEGIN IMMEDIATE)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # created : ce processus a créé la table (premier passage en mode réparti) ; un seul
+        # processus le voit, même si plusieurs démarrent ensemble
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.created = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='job_queue'").fetchone() is None
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    self._conn.execute(statement)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _tx(self, sql: str, params: Iterable[Any] = ()) -> sqlite3.Cursor:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cur = self._conn.execute(sql, tuple(params))
+                self._conn.execute("COMMIT")
+                return cur
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # --- côté API
+    def enqueue(self, job_id: str, lane: str, priority: int = 0) -> None:
+        self._tx(
+            "INSERT INTO job_queue(job_id, lane, priority, enqueued_at) VALUES (?,?,?,?) "
+            "ON CONFLICT(job_id) DO NOTHING",   # déjà en file (ou en cours) : inchangé
+            (job_id, lane, int(priority), time.time()),
+        )
+
+    def remove_if_waiting(self, job_id: str) -> bool:
+        """Retire un job que personne n'a encore réclamé (ou dont le bail a expiré)."""
+        cur = self._tx("DELETE FROM job_queue WHERE job_id=? AND (owner IS NULL OR lease_until<?)",
+                       (job_id, time.time()))
+        return cur.rowcount > 0
+
+    def request_cancel(self, job_id: str, file_index: Optional[int] = None) -> bool:
+        """Demande d'annulation (job entier, ou fichier ``file_index``) relevée par le worker."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT cancel_files FROM job_queue WHERE job_id=?", (job_id,)).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return False
+                if file_index is None:
+                    self._conn.execute("UPDATE job_queue SET cancel=1 WHERE job_id=?", (job_id,))
+                else:
+                    files = sorted(set(json.loads(row[0])) | {int(file_index)})
+                    self._conn.execute("UPDATE job_queue SET cancel_files=? WHERE job_id=?",
+                                       (json.dumps(files), job_id))
+                self._conn.execute("COMMIT")
+                return True
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def position(self, job_id: str) -> Optional[int]:
+        """Position 1-based parmi les jobs non réclamés de sa file, None s'il n'y attend pas."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lane, priority, enqueued_at FROM job_queue "
+                "WHERE job_id=? AND (owner IS NULL OR lease_until<?)", (job_id, now),
+            ).fetchone()
+            if row is None:
+                return None
+            lane, priority, enqueued_at = row
+            ahead = self._conn.execute(
+                "SELECT COUNT(*) FROM job_queue WHERE lane=? AND (owner IS NULL OR lease_until<?) "
+                "AND (priority>? OR (priority=? AND enqueued_at<?))",
+                (lane, now, priority, priority, enqueued_at),
+            ).fetchone()[0]
+        return ahead + 1
+
+    def waiting(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM job_queue WHERE owner IS NULL OR lease_until<?", (time.time(),)
+            ).fetchone()[0]
+
+    def job_ids(self, lane: str) -> List[str]:
+        """Jobs du couloir ``lane`` en attente ou en cours."""
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT job_id FROM job_queue WHERE lane=?", (lane,))]
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT lane, owner IS NOT NULL AND lease_until>=?, COUNT(*) FROM job_queue GROUP BY 1, 2",
+                (now,),
+            ).fetchall()
+            owners = [r[0] for r in self._conn.execute(
+                "SELECT DISTINCT owner FROM job_queue WHERE owner IS NOT NULL AND lease_until>=?", (now,),
+            )]
+        lanes: Dict[str, Dict[str, int]] = {}
+        for lane, claimed, n in rows:
+            lanes.setdefault(lane, {"queued": 0, "running": 0})["running" if claimed else "queued"] += n
+        return {"lanes": lanes, "workers": sorted(owners)}
+
+    # --- côté worker
+    def claim(self, owner: str, lanes: Iterable[str], lease_s: float) -> Optional[Claim]:
+        """Réclame le job le plus prioritaire (puis le plus ancien) libre ou au bail expiré."""
+        lanes = list(lanes)
+        marks = ",".join("?" * len(lanes))
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    f"SELECT job_id, lane, attempts FROM job_queue "
+                    f"WHERE lane IN ({marks}) AND (owner IS NULL OR lease_until<?) "
+                    f"ORDER BY priority DESC, enqueued_at LIMIT 1",
+                    (*lanes, now),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE job_queue SET owner=?, lease_until=?, attempts=attempts+1 WHERE job_id=?",
+                        (owner, now + lease_s, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return Claim(row[0], row[1], row[2] + 1) if row is not None else None
+
+    def heartbeat(self, job_id: str, owner: str, lease_s: float) -> Optional[Tuple[bool, Set[int]]]:
+        """Renouvelle le bail ; ``(annulation du job, fichiers annulés)``, ou None si le bail
+        est perdu (expiré puis repris par un autre worker, ou job retiré)."""
+        cur = self._tx("UPDATE job_queue SET lease_until=? WHERE job_id=? AND owner=?",
+                       (time.time() + lease_s, job_id, owner))
+        if cur.rowcount == 0:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT cancel, cancel_files FROM job_queue WHERE job_id=?",
+                                     (job_id,)).fetchone()
+        if row is None:
+            return None
+        return bool(row[0]), set(json.loads(row[1]))
+
+    def holds(self, job_id: str, owner: str, margin: float = 0.0) -> bool:
+        """Bail de ``job_id`` tenu par ``owner`` pour encore au moins ``margin`` secondes."""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM job_queue WHERE job_id=? AND owner=? AND lease_until>=?",
+                                     (job_id, owner, time.time() + margin)).fetchone()
+        return row is not None
+
+    def complete(self, job_id: str, owner: str) -> bool:
+        cur = self._tx("DELETE FROM job_queue WHERE job_id=? AND owner=?", (job_id, owner))
+        return cur.rowcount > 0
+
+    def hand_off(self, job_id: str, owner: str, lane: str) -> bool:
+        """Rend le job à la file dans un autre couloir (étape suivante sur d'autres workers)."""
+        cur = self._tx("UPDATE job_queue SET lane=?, owner=NULL, lease_until=0 WHERE job_id=? AND owner=?",
+                       (lane, job_id, owner))
+        return cur.rowcount > 0
+
+    def release(self, job_id: str, owner: str) -> bool:
+        """Rend le job à la file (arrêt du worker, préemption) ; False si le bail était perdu."""
+        cur = self._tx("UPDATE job_queue SET owner=NULL, lease_until=0 WHERE job_id=? AND owner=?",
+                       (job_id, owner))
+        return cur.rowcount > 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,201 @@
+"""État en mémoire d'un job : objets compacts (``__slots__``), verrou par job, instantanés partagés.
+
+- Les workers modifient un job sous son propre verrou : deux jobs ne se gênent jamais.
+- Les lectures de statut passent par ``JobState.snapshot()`` : une copie construite une
+  fois par version publiée et partagée par tous les lecteurs (à traiter en lecture seule).
+  Tant que la version ne change pas, lire un statut ne prend aucun verrou.
+- Les logs vivent dans un ``LogBuffer`` borné : au-delà de ``capacity`` lignes, les plus
+  anciennes sont écrites sur disque (``spill``) puis relues à la demande (``read``).
+
+Les deux classes gardent un accès façon dict (``job["files"]``, ``fmeta.get("sha256")``)
+pour le code qui manipulait des dicts.
+
+Annulation : ``JobState.check_cancel()`` est appelé par les workers aux points d'arrêt
+(entre deux segments, avant chaque appel à l'API) et lève ``Cancelled`` et ses variantes.
+"""
+import threading
+from collections import deque
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+FILE_FIELDS = ("name", "path", "size", "sha256", "status", "progress", "out_path", "error", "rev")
+JOB_FIELDS = (
+    "status", "created_at", "use_api", "model", "lang", "output_type", "formats",
+    "word_timestamps", "priority", "progress", "rev", "timings",
+    "profile", "beam_size", "expected_rtf", "audio_s", "deadline_s",
+)
+_FILE_DEFAULTS = {"status": "queued", "progress": 0.0, "rev": 0, "size": 0}
+_JOB_DEFAULTS = {"status": "queued", "progress": 0.0, "rev": 0, "priority": 0}
+
+
+class Cancelled(Exception):
+    """Le job a été annulé."""
+
+
+class FileCancelled(Cancelled):
+    """Seul le fichier en cours a été annulé : le job continue avec les suivants."""
+
+
+class Preempted(Cancelled):
+    """Job interrompu pour laisser passer un job prioritaire ; à remettre en file."""
+
+
+class _DictAccess:
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        setattr(self, key, value)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+
+class FileState(_DictAccess):
+    __slots__ = FILE_FIELDS
+
+    def __init__(self, data: Dict[str, Any]):
+        for f in FILE_FIELDS:
+            setattr(self, f, data.get(f, _FILE_DEFAULTS.get(f)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {f: getattr(self, f) for f in FILE_FIELDS}
+
+
+class LogBuffer:
+    """Lignes de log numérotées depuis 0 ; seules les ``capacity`` dernières restent en mémoire.
+
+    ``saved`` : nombre de lignes déjà persistées. Avant de sortir une ligne non persistée
+    de la mémoire, ``spill(début, lignes)`` l'écrit ; ``read(début, fin)`` relit une plage.
+    Pas de verrou interne : l'appelant tient celui du job.
+    """
+
+    __slots__ = ("capacity", "saved", "_first", "_lines", "_spill", "_read")
+
+    def __init__(self, capacity: int, spill: Callable[[int, List[str]], None],
+                 read: Callable[[int, int], List[str]], lines: Iterable[str] = (),
+                 first: int = 0, saved: int = 0):
+        self.capacity = max(2, capacity)
+        self.saved = saved
+        self._first = first
+        self._lines: Deque[str] = deque(lines)
+        self._spill = spill
+        self._read = read
+
+    def __len__(self) -> int:
+        return self._first + len(self._lines)
+
+    def append(self, message: str) -> None:
+        self._lines.append(message)
+        if len(self._lines) > self.capacity:
+            self._trim()
+
+    def _trim(self) -> None:
+        # Par moitié du tampon : une écriture disque toutes les capacity/2 lignes au plus
+        drop = len(self._lines) - self.capacity // 2
+        end = self._first + drop
+        if self.saved < end:
+            self._spill(self.saved, list(islice(self._lines, self.saved - self._first, drop)))
+            self.saved = end
+        for _ in range(drop):
+            self._lines.popleft()
+        self._first = end
+
+    def unsaved(self) -> Tuple[int, List[str]]:
+        start = max(self.saved, self._first)
+        return start, list(islice(self._lines, start - self._first, None))
+
+    def mark_saved(self, upto: int) -> None:
+        self.saved = max(self.saved, upto)
+
+    def tail(self, start: int) -> Tuple[int, List[str], int]:
+        """``(première ligne en mémoire, lignes en mémoire à partir de start, total)``."""
+        total = len(self)
+        start = max(0, min(start, total))
+        first = max(start, self._first)
+        return self._first, list(islice(self._lines, first - self._first, None)), total
+
+    def read(self, start: int, end: int) -> List[str]:
+        return self._read(start, end)
+
+
+class JobState(_DictAccess):
+    """``version`` augmente à chaque modification publiée ; ``dirty`` : à réécrire en base."""
+
+    __slots__ = JOB_FIELDS + (
+        "id", "lock", "files", "logs", "extra", "version", "dirty", "pending", "published_at", "_snapshot",
+        "cancel", "cancelled_files", "preempt",
+    )
+
+    def __init__(self, job_id: str, data: Dict[str, Any], logs: LogBuffer):
+        self.id = job_id
+        self.lock = threading.Lock()
+        for f in JOB_FIELDS:
+            setattr(self, f, data.get(f, _JOB_DEFAULTS.get(f)))
+        if self.timings is None:
+            self.timings = {}
+        self.files = [FileState(f) for f in data.get("files", ())]
+        self.logs = logs
+        # Champs inconnus (jobs enregistrés par une autre version) : conservés tels quels
+        self.extra = {k: v for k, v in data.items()
+                      if k not in JOB_FIELDS and k not in ("files", "logs", "log_offset")}
+        self.version = 0
+        self.dirty = True
+        self.pending = False
+        self.published_at = 0.0
+        self._snapshot: Optional[Tuple[int, Dict[str, Any]]] = None
+        self.cancel = threading.Event()
+        self.cancelled_files: Set[int] = set()
+        self.preempt = threading.Event()
+
+    def check_cancel(self, index: Optional[int] = None) -> None:
+        """Lève ``Cancelled`` (job), ``FileCancelled`` (fichier ``index``) ou ``Preempted``."""
+        if self.cancel.is_set():
+            raise Cancelled("Job annulé")
+        if index is not None and index in self.cancelled_files:
+            raise FileCancelled("Fichier annulé")
+        if self.preempt.is_set():
+            raise Preempted("Job préempté par un job prioritaire")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """État sérialisable sans les logs (à appeler sous ``lock``)."""
+        data = {**self.extra, **{f: getattr(self, f) for f in JOB_FIELDS}}
+        data["timings"] = dict(self.timings)
+        data["files"] = [f.to_dict() for f in self.files]
+        return data
+
+    def commit(self, now: float, coalesce_s: float = 0.0) -> bool:
+        """Clôt une modification (sous ``lock``). Avec ``coalesce_s``, une modification
+        survenant moins de ``coalesce_s`` s après la précédente publication reste en attente
+        (``pending``) ; renvoie True si elle est publiée (les abonnés sont à réveiller)."""
+        self.dirty = True
+        if coalesce_s and now - self.published_at < coalesce_s:
+            self.pending = True
+            return False
+        self.version += 1
+        self.pending = False
+        self.published_at = now
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Instantané de la dernière version publiée, partagé entre lecteurs (lecture seule)."""
+        snap = self._snapshot
+        if snap is not None and snap[0] == self.version:
+            return snap[1]
+        with self.lock:
+            data = self.to_dict()
+            self._snapshot = (self.version, data)
+        return data
+
+    def logs_since(self, start: int) -> Tuple[List[str], int]:
+        """Lignes à partir de ``start`` et offset de fin ; la partie sur disque est lue hors verrou."""
+        with self.lock:
+            first, lines, total = self.logs.tail(start)
+        if start < first:
+            lines = self.logs.read(max(0, start), first) + lines
+        return lines, total
@@ -0,0 +1,132 @@
+"""Stockage persistant des jobs (SQLite en mode WAL) : état, logs, reprise après redémarrage."""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    created_at  TEXT,
+    updated_at  REAL NOT NULL,
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, updated_at);
+CREATE TABLE IF NOT EXISTS job_logs (
+    job_id   TEXT NOT NULL,
+    seq      INTEGER NOT NULL,
+    message  TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+FINISHED = ("done", "error", "cancelled")
+
+
+class JobStore:
+    """Une ligne JSON par job (sans les logs) + une table de logs indexée par (job, numéro)."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    # --- écriture
+    def save(self, job_id: str, data: Dict[str, Any], new_logs: Iterable[str] = (), log_start: int = 0) -> None:
+        """Enregistre l'état du job et ajoute ``new_logs`` à partir du numéro ``log_start``
+        (idempotent : réécrire une plage déjà stockée ne crée pas de doublon)."""
+        row = (job_id, data.get("status", ""), data.get("created_at"), time.time(),
+               json.dumps(data, ensure_ascii=False))
+        logs = [(job_id, log_start + i, m) for i, m in enumerate(new_logs)]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs(id, status, created_at, updated_at, data) VALUES (?,?,?,?,?) "
+                "ON CONFLICT(id) DO UPDATE SET status=excluded.status, updated_at=excluded.updated_at, "
+                "data=excluded.data",
+                row,
+            )
+            if logs:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO job_logs(job_id, seq, message) VALUES (?,?,?)", logs
+                )
+
+    def append_logs(self, job_id: str, lines: Iterable[str], start: int) -> None:
+        """Écrit des lignes de log seules (débordement du tampon mémoire d'un job en cours)."""
+        rows = [(job_id, start + i, m) for i, m in enumerate(lines)]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO job_logs(job_id, seq, message) VALUES (?,?,?)", rows)
+
+    def delete(self, job_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs WHERE id=?", (job_id,))
+            self._conn.execute("DELETE FROM job_logs WHERE job_id=?", (job_id,))
+
+    # --- lecture
+    def load(self, job_id: str, log_since: Optional[int] = 0) -> Optional[Dict[str, Any]]:
+        """État du job ; ``logs`` contient les lignes à partir de ``log_since``
+        (``None`` : aucune ligne) et ``log_offset`` leur nombre total."""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE id=?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            data = json.loads(row[0])
+            total = self._conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM job_logs WHERE job_id=?", (job_id,)
+            ).fetchone()[0]
+            logs: List[str] = []
+            if log_since is not None:
+                logs = [r[0] for r in self._conn.execute(
+                    "SELECT message FROM job_logs WHERE job_id=? AND seq>=? ORDER BY seq",
+                    (job_id, max(0, log_since)),
+                )]
+        data["logs"] = logs
+        data["log_offset"] = total
+        return data
+
+    def logs(self, job_id: str, start: int, end: Optional[int] = None) -> List[str]:
+        with self._lock:
+            if end is None:
+                rows = self._conn.execute(
+                    "SELECT message FROM job_logs WHERE job_id=? AND seq>=? ORDER BY seq", (job_id, start)
+                )
+            else:
+                rows = self._conn.execute(
+                    "SELECT message FROM job_logs WHERE job_id=? AND seq>=? AND seq<? ORDER BY seq",
+                    (job_id, start, end),
+                )
+            return [r[0] for r in rows]
+
+    def ids_with_status(self, statuses: Iterable[str]) -> List[str]:
+        statuses = list(statuses)
+        marks = ",".join("?" * len(statuses))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id FROM jobs WHERE status IN ({marks}) ORDER BY created_at", statuses
+            )
+            return [r[0] for r in rows]
+
+    def finished_jobs(self) -> List[Tuple[str, float]]:
+        """``[(id, dernière mise à jour)]`` des jobs terminés, du plus ancien au plus récent."""
+        marks = ",".join("?" * len(FINISHED))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, updated_at FROM jobs WHERE status IN ({marks}) ORDER BY updated_at",
+                FINISHED,
+            )
+            return [(r[0], r[1]) for r in rows]
+
+    def known_ids(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT id FROM jobs")]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,94 @@
+"""Journal de segments sur disque : reprise d'une transcription interrompue.
+
+Une ligne JSON par segment, ajoutée au fil de l'eau (fsync au plus toutes les
+``fsync_interval`` secondes). La première ligne porte la clé des réglages : un journal
+produit avec d'autres réglages (modèle, langue…) est ignoré.
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# (début, fin, texte, mots horodatés ou None)
+Segment = Tuple[float, float, str, Optional[List[Dict[str, Any]]]]
+
+
+class SegmentJournal:
+    def __init__(self, path: Path, key: str, fsync_interval: float = 1.0):
+        self.path = Path(path)
+        self.key = key
+        self.fsync_interval = fsync_interval
+        self._fh = None
+        self._last_sync = 0.0
+
+    # --- lecture
+    def load(self) -> List[Segment]:
+        """Segments déjà validés (vide si pas de journal ou réglages différents)."""
+        if not self.path.exists():
+            return []
+        segments: List[Segment] = []
+        with self.path.open("r", encoding="utf-8") as fh:
+            header = fh.readline()
+            try:
+                if json.loads(header).get("key") != self.key:
+                    return []
+            except ValueError:
+                return []
+            for line in fh:
+                try:
+                    rec = json.loads(line)
+                    segments.append((float(rec["start"]), float(rec["end"]), rec["text"], rec.get("words")))
+                except (ValueError, KeyError):
+                    break   # dernière ligne tronquée par l'arrêt brutal : on s'arrête là
+        return segments
+
+    @staticmethod
+    def resume_point(segments: List[Segment]) -> float:
+        return max((seg[1] for seg in segments), default=0.0)
+
+    # --- écriture
+    def open(self, segments: List[Segment]) -> None:
+        """(Ré)écrit le journal avec ``segments`` puis le garde ouvert en ajout."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as fh:
+            fh.write(json.dumps({"key": self.key}) + "\n")
+            for seg in segments:
+                fh.write(self._line(seg))
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.path)
+        self._fh = self.path.open("a", encoding="utf-8")
+        self._last_sync = time.monotonic()
+
+    @staticmethod
+    def _line(seg: Segment) -> str:
+        start, end, text, words = seg
+        rec: Dict[str, Any] = {"start": round(start, 3), "end": round(end, 3), "text": text}
+        if words is not None:
+            rec["words"] = words
+        return json.dumps(rec, ensure_ascii=False) + "\n"
+
+    def append(self, start: float, end: float, text: str, words: Optional[List[Dict[str, Any]]] = None) -> None:
+        self._fh.write(self._line((start, end, text, words)))
+        self._fh.flush()
+        now = time.monotonic()
+        if now - self._last_sync >= self.fsync_interval:
+            os.fsync(self._fh.fileno())
+            self._last_sync = now
+
+    def close(self, remove: bool = False) -> None:
+        if self._fh is not None:
+            try:
+                self._fh.flush()
+                os.fsync(self._fh.fileno())
+            finally:
+                self._fh.close()
+                self._fh = None
+        if remove:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
@@ -1,4 +1,7 @@
-import threading, time, socket, uvicorn, webview
+import os, time
+os.environ.setdefault("WHISPER_LAUNCH_TIME", str(time.time()))  # durée de démarrage rapportée par /health
+
+import threading, socket, multiprocessing, uvicorn, webview
 from server import app  # 👈 import direct
 
 def is_up(h, p):
@@ -11,9 +14,10 @@ def run_server():
     uvicorn.run(app, host="127.0.0.1", port=8000, reload=False, log_level="warning", workers=1)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # pool de processus (fichiers longs) en build PyInstaller
     threading.Thread(target=run_server, daemon=True).start()
-    for _ in range(60):
+    for _ in range(300):  # 30 s max, vérifié toutes les 100 ms
         if is_up("127.0.0.1", 8000): break
-        time.sleep(0.5)
+        time.sleep(0.1)
     webview.create_window("Transcripteur Whisper", "http://127.0.0.1:8000", width=1100, height=740)
     webview.start()
@@ -0,0 +1,380 @@
+"""Téléchargement des modèles : progression à l'octet, vérification, un seul téléchargement par modèle.
+
+La liste des fichiers (taille, SHA-256 des fichiers LFS, identifiant git des autres) vient
+de l'API du hub (``{endpoint}/api/models/{repo}/revision/{rev}?blobs=true``). Chaque fichier
+est téléchargé en flux (``{endpoint}/{repo}/resolve/{rev}/{fichier}``) dans un ``.part``
+repris par Range, haché au passage, puis renommé une fois vérifié. Un modèle n'est prêt
+qu'avec le manifeste ``.complete.json``, écrit après vérification de tous ses fichiers.
+
+``endpoint`` vaut HF_ENDPOINT (https://huggingface.co par défaut) : un serveur local qui
+reproduit ces deux routes suffit pour les essais (``bench.stub_hub``).
+
+Un dossier installé sans manifeste (modèle livré avec l'application, téléchargement d'une
+version antérieure) est vérifié une seule fois : s'il correspond au hub, le manifeste est
+écrit ; si le hub sert une autre révision de fichiers complets, la copie locale est adoptée
+telle quelle (manifeste ``verified: false``) au lieu d'être remplacée. Hub injoignable : la
+copie sert sans manifeste jusqu'à la fin du processus, et la vérification est retentée au
+démarrage suivant (une copie tronquée n'est jamais marquée complète).
+"""
+import hashlib
+import http.client
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+MANIFEST = ".complete.json"
+CHUNK_SIZE = 1024 * 1024
+LEGACY_PROBE_TIMEOUT_S = 10.0   # dossier sans manifeste : le hub injoignable ne bloque pas plus
+PROGRESS_INTERVAL_S = 0.25     # rythme maximal des rappels de progression
+
+
+class DownloadError(Exception):
+    pass
+
+
+class FileSpec(NamedTuple):
+    name: str
+    size: int
+    sha256: Optional[str] = None    # fichiers LFS (poids)
+    blob_id: Optional[str] = None   # SHA-1 git des petits fichiers
+
+
+def _hasher(spec: FileSpec):
+    if spec.sha256:
+        return hashlib.sha256()
+    if spec.blob_id:
+        return hashlib.sha1(b"blob %d\0" % spec.size)
+    return None
+
+
+def _expected(spec: FileSpec) -> Optional[str]:
+    return spec.sha256 or spec.blob_id
+
+
+class Download:
+    """Téléchargement d'un modèle, partagé par tous ceux qui l'attendent.
+
+    ``state`` : pending → downloading → ready | error. Les abonnés reçoivent
+    ``(octets reçus, octets attendus)`` au plus toutes les PROGRESS_INTERVAL_S.
+    """
+
+    def __init__(self, model: str):
+        self.model = model
+        self.state = "pending"
+        self.total = 0
+        self.done = 0
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self._finished = threading.Event()
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[int, int], None]] = []
+        self._reported = 0.0
+
+    def subscribe(self, fn: Callable[[int, int], None]) -> None:
+        with self._lock:
+            self._listeners.append(fn)
+
+    def unsubscribe(self, fn: Callable[[int, int], None]) -> None:
+        with self._lock:
+            if fn in self._listeners:
+                self._listeners.remove(fn)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._finished.wait(timeout)
+
+    def _progress(self, done: int, force: bool = False) -> None:
+        self.done = done
+        now = time.monotonic()
+        if not force and now - self._reported < PROGRESS_INTERVAL_S:
+            return
+        self._reported = now
+        with self._lock:
+            listeners = list(self._listeners)
+        for fn in listeners:
+            try:
+                fn(self.done, self.total)
+            except Exception:
+                pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state, "bytes": self.done, "total": self.total, "error": self.error,
+            "elapsed_s": round(time.time() - self.started_at, 1),
+        }
+
+
+class ModelDownloader:
+    """Modèles rangés dans ``root/<nom>`` ; ``repos`` : nom → dépôt du hub."""
+
+    def __init__(self, root: Path, repos: Dict[str, str], endpoint: Optional[str] = None,
+                 revision: str = "main", token: Optional[str] = None, timeout: float = 30.0,
+                 retries: int = 3):
+        self.root = Path(root)
+        self.repos = dict(repos)
+        self.endpoint = (endpoint or os.getenv("HF_ENDPOINT") or "https://huggingface.co").rstrip("/")
+        self.revision = revision
+        self.token = token if token is not None else (os.getenv("HF_TOKEN") or None)
+        self.timeout = timeout
+        self.retries = retries
+        self._lock = threading.Lock()
+        self._active: Dict[str, Download] = {}
+        self._unverified: Set[str] = set()   # copies sans manifeste utilisées faute de hub
+
+    # --- état
+    def model_dir(self, model: str) -> Path:
+        return self.root / model
+
+    def manifest(self, model: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads((self.model_dir(model) / MANIFEST).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def unverified(self, model: str) -> bool:
+        """Copie sans manifeste utilisée dans ce processus faute d'avoir pu joindre le hub."""
+        return model in self._unverified
+
+    def is_ready(self, model: str) -> bool:
+        """Manifeste présent et fichiers à la bonne taille (quelques stat, sans relire les poids)."""
+        manifest = self.manifest(model)
+        if manifest is None:
+            return False
+        target = self.model_dir(model)
+        try:
+            return all((target / f["name"]).stat().st_size == f["size"] for f in manifest["files"])
+        except (OSError, KeyError, TypeError):
+            return False
+
+    def size(self, model: str) -> Optional[int]:
+        manifest = self.manifest(model)
+        return sum(f["size"] for f in manifest["files"]) if manifest else None
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            active = dict(self._active)
+        return {
+            model: {
+                "ready": self.is_ready(model),
+                "bytes": self.size(model),
+                "download": active[model].snapshot() if model in active else None,
+            }
+            for model in self.repos
+        }
+
+    # --- téléchargement
+    def start(self, model: str) -> Tuple[Download, bool]:
+        """Téléchargement en cours de ``model``, sinon un nouveau dans un thread dédié ;
+        renvoie ``(download, créé)``."""
+        if model not in self.repos:
+            raise DownloadError(f"Dépôt inconnu pour le modèle '{model}'")
+        with self._lock:
+            dl = self._active.get(model)
+            if dl is not None:
+                return dl, False
+            dl = Download(model)
+            self._active[model] = dl
+        threading.Thread(target=self._run, args=(dl,), name=f"download-{model}", daemon=True).start()
+        return dl, True
+
+    def ensure(self, model: str, on_progress: Optional[Callable[[int, int], None]] = None,
+               check: Optional[Callable[[], None]] = None, poll: float = 0.5) -> Path:
+        """Attend que ``model`` soit présent et vérifié (en le téléchargeant au besoin).
+
+        ``check`` est appelé pendant l'attente et peut lever (annulation) : le
+        téléchargement continue alors pour les autres demandeurs.
+        """
+        if self.is_ready(model):
+            return self.model_dir(model)
+        dl, _created = self.start(model)
+        if on_progress is not None:
+            dl.subscribe(on_progress)
+        try:
+            while not dl.wait(poll):
+                if check is not None:
+                    check()
+        finally:
+            if on_progress is not None:
+                dl.unsubscribe(on_progress)
+        if dl.state != "ready":
+            raise DownloadError(dl.error or f"Téléchargement du modèle '{model}' échoué")
+        return self.model_dir(model)
+
+    def _run(self, dl: Download) -> None:
+        repo = self.repos[dl.model]
+        try:
+            if not self.is_ready(dl.model) and not self._check_legacy(dl.model, repo):
+                files = self.list_files(repo)
+                dl.total = sum(f.size for f in files)
+                dl.state = "downloading"
+                target = self.model_dir(dl.model)
+                target.mkdir(parents=True, exist_ok=True)
+                base = 0
+                for spec in files:
+                    self._fetch(repo, spec, target, dl, base)
+                    base += spec.size
+                    dl._progress(base)
+                self._write_manifest(target, repo, files)
+            dl.state = "ready"
+        except Exception as e:
+            dl.error = str(e)
+            dl.state = "error"
+        finally:
+            dl._progress(dl.done, force=True)
+            with self._lock:
+                if self._active.get(dl.model) is dl:
+                    del self._active[dl.model]
+            dl._finished.set()
+
+    def _check_legacy(self, model: str, repo: str) -> bool:
+        """Dossier avec ``model.bin`` mais sans manifeste : manifeste écrit si les fichiers
+        correspondent au hub, copie adoptée si tous les fichiers sont complets mais d'une autre
+        révision. Hub injoignable : copie utilisée pour ce processus seulement, sans manifeste,
+        et vérifiée au prochain démarrage. False : téléchargement normal (réparation)."""
+        target = self.model_dir(model)
+        if not (target / "model.bin").is_file():
+            return False
+        if model in self._unverified:
+            return True
+        try:
+            files = self.list_files(repo, timeout=LEGACY_PROBE_TIMEOUT_S)
+        except Exception:
+            self._unverified.add(model)
+            return True
+        paths = [target / f.name for f in files]
+        if not all(p.is_file() and p.stat().st_size == f.size for p, f in zip(paths, files)):
+            return False
+        if all(self._verify_file(p, f) for p, f in zip(paths, files)):
+            self._write_manifest(target, repo, files)
+        else:
+            self._adopt(target, repo, "fichiers d'une autre révision que le hub")
+        return True
+
+    def _adopt(self, target: Path, repo: str, reason: str) -> None:
+        files = [
+            FileSpec(p.relative_to(target).as_posix(), p.stat().st_size)
+            for p in sorted(target.rglob("*"))
+            if p.is_file() and not p.name.startswith(MANIFEST) and not p.name.endswith(".part")
+        ]
+        self._write_manifest(target, repo, files, verified=False, note=reason)
+
+    def _open(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None):
+        headers = dict(headers or {})
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return urllib.request.urlopen(urllib.request.Request(url, headers=headers),
+                                      timeout=timeout or self.timeout)
+
+    def list_files(self, repo: str, timeout: Optional[float] = None) -> List[FileSpec]:
+        rev = urllib.parse.quote(self.revision, safe="")
+        with self._open(f"{self.endpoint}/api/models/{repo}/revision/{rev}?blobs=true", timeout=timeout) as resp:
+            info = json.load(resp)
+        files = []
+        for s in info.get("siblings", []):
+            lfs = s.get("lfs") or {}
+            files.append(FileSpec(
+                name=s["rfilename"],
+                size=int(lfs.get("size") or s.get("size") or 0),
+                sha256=lfs.get("sha256"),
+                blob_id=None if lfs else s.get("blobId"),
+            ))
+        if not files:
+            raise DownloadError(f"Aucun fichier dans le dépôt {repo}")
+        return files
+
+    def _fetch(self, repo: str, spec: FileSpec, target: Path, dl: Download, base: int) -> None:
+        dest = target / spec.name
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        # Fichier déjà en place (téléchargement antérieur au manifeste) : vérifié plutôt que retéléchargé
+        if dest.exists() and dest.stat().st_size == spec.size and self._verify_file(dest, spec):
+            return
+        part = dest.with_name(dest.name + ".part")
+        url = (f"{self.endpoint}/{repo}/resolve/{urllib.parse.quote(self.revision, safe='')}/"
+               f"{urllib.parse.quote(spec.name)}")
+        for attempt in range(self.retries + 1):
+            hasher = _hasher(spec)
+            offset = part.stat().st_size if part.exists() else 0
+            if offset > spec.size:
+                offset = 0
+            if offset and hasher is not None:
+                _hash_file(part, hasher)   # reprise : le début est haché depuis le disque
+            try:
+                if offset < spec.size or not spec.size:
+                    offset, hasher = self._stream(url, part, spec, offset, hasher,
+                                                  lambda n: dl._progress(base + n))
+            except urllib.error.HTTPError as e:
+                if e.code == 416:            # plage refusée : on repart de zéro
+                    part.unlink(missing_ok=True)
+                    if attempt == self.retries:
+                        raise DownloadError(f"{spec.name} : HTTP 416") from None
+                elif (e.code < 500 and e.code != 429) or attempt == self.retries:
+                    raise DownloadError(f"{spec.name} : HTTP {e.code}") from None
+                time.sleep(min(2 ** attempt, 10))
+                continue
+            except (OSError, http.client.HTTPException) as e:   # coupure, délai dépassé : reprise à l'offset atteint
+                if attempt == self.retries:
+                    raise DownloadError(f"{spec.name} : {e}") from None
+                time.sleep(min(2 ** attempt, 10))
+                continue
+            if spec.size and offset < spec.size:   # flux terminé avant la fin : reprise par Range
+                if attempt == self.retries:
+                    raise DownloadError(f"{spec.name} : transfert interrompu ({offset}/{spec.size} octets)")
+                continue
+            if spec.size and offset != spec.size:
+                error = f"taille inattendue ({offset} au lieu de {spec.size} octets)"
+            elif hasher is not None and hasher.hexdigest() != _expected(spec):
+                error = "somme de contrôle invalide"
+            else:
+                os.replace(part, dest)
+                return
+            part.unlink(missing_ok=True)   # contenu corrompu : nouvel essai depuis le début
+            if attempt == self.retries:
+                raise DownloadError(f"{spec.name} : {error}")
+        raise DownloadError(f"{spec.name} : abandon après {self.retries + 1} essais")
+
+    def _stream(self, url: str, part: Path, spec: FileSpec, offset: int, hasher,
+                progress: Callable[[int], None]):
+        with self._open(url, {"Range": f"bytes={offset}-"} if offset else None) as resp:
+            if offset and resp.status != 206:   # Range ignoré par le serveur : tout depuis le début
+                offset, hasher = 0, _hasher(spec)
+            with part.open("ab" if offset else "wb") as out:
+                while True:
+                    chunk = resp.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                    if hasher is not None:
+                        hasher.update(chunk)
+                    offset += len(chunk)
+                    progress(offset)
+        return offset, hasher
+
+    def _verify_file(self, path: Path, spec: FileSpec) -> bool:
+        hasher = _hasher(spec)
+        if hasher is None:
+            return True
+        _hash_file(path, hasher)
+        return hasher.hexdigest() == _expected(spec)
+
+    def _write_manifest(self, target: Path, repo: str, files: List[FileSpec], verified: bool = True,
+                        note: Optional[str] = None) -> None:
+        manifest = {
+            "repo": repo, "revision": self.revision, "verified": verified, "verified_at": time.time(),
+            "files": [f._asdict() for f in files],
+        }
+        if note:
+            manifest["note"] = note
+        tmp = target / (MANIFEST + ".tmp")
+        tmp.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+        os.replace(tmp, target / MANIFEST)
+
+
+def _hash_file(path: Path, hasher) -> None:
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hasher.update(block)
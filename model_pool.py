@@ -0,0 +1,171 @@
+"""Pool de modèles WhisperModel partagé par tout le processus (LRU sous budget mémoire)."""
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Tuple
+
+# (nom du modèle, compute_type, cpu_threads, num_workers)
+ModelKey = Tuple[str, str, int, int]
+
+
+class _Entry:
+    __slots__ = ("model", "size", "refs", "loaded_at", "last_used", "uses")
+
+    def __init__(self, model: Any, size: int):
+        self.model = model
+        self.size = size
+        self.refs = 0
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.uses = 0
+
+
+class ModelPool:
+    """Réutilise les modèles chargés entre les jobs.
+
+    - ``loader(key)`` construit le modèle (appelé hors verrou, un seul chargement par clé) ;
+    - ``estimate(key)`` estime son empreinte mémoire en octets ;
+    - les modèles inutilisés sont évincés du moins récemment utilisé au plus récent
+      dès que ``max_bytes`` est dépassé (0 = pas de limite). Un modèle en cours
+      d'utilisation n'est jamais évincé : le budget peut alors être dépassé temporairement.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[ModelKey], Any],
+        estimate: Callable[[ModelKey], int],
+        max_bytes: int = 0,
+    ):
+        self._loader = loader
+        self._estimate = estimate
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[ModelKey, _Entry]" = OrderedDict()
+        self._loading: Dict[ModelKey, threading.Event] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    # --- accès
+    @contextmanager
+    def acquire(self, key: ModelKey):
+        """Prête le modèle ``key`` (chargé si besoin) pour la durée du bloc ``with``."""
+        entry = self._checkout(key)
+        try:
+            yield entry.model
+        finally:
+            with self._lock:
+                entry.refs -= 1
+                entry.last_used = time.time()
+                self._evict_locked()
+
+    def preload(self, key: ModelKey) -> None:
+        with self.acquire(key):
+            pass
+
+    def _checkout(self, key: ModelKey) -> _Entry:
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self.hits += 1
+                    return self._take_locked(key, entry)
+                pending = self._loading.get(key)
+                if pending is None:
+                    # Ce thread se charge du chargement
+                    self.misses += 1
+                    pending = threading.Event()
+                    self._loading[key] = pending
+                    # Libère la place du futur modèle avant de le charger (pic RSS)
+                    self._evict_locked(reserve=max(0, int(self._estimate(key))))
+                    break
+            # Un autre thread charge déjà ce modèle : on attend puis on retente
+            pending.wait()
+
+        try:
+            t0 = time.perf_counter()
+            model = self._loader(key)
+            elapsed = time.perf_counter() - t0
+            size = max(0, int(self._estimate(key)))
+        except BaseException:
+            with self._lock:
+                self._loading.pop(key, None)
+            pending.set()
+            raise
+
+        with self._lock:
+            self.load_seconds += elapsed
+            entry = _Entry(model, size)
+            self._entries[key] = entry
+            self._loading.pop(key, None)
+            taken = self._take_locked(key, entry)
+            self._evict_locked()
+        pending.set()
+        return taken
+
+    def _take_locked(self, key: ModelKey, entry: _Entry) -> _Entry:
+        entry.refs += 1
+        entry.uses += 1
+        entry.last_used = time.time()
+        self._entries.move_to_end(key)
+        return entry
+
+    # --- éviction
+    def _evict_locked(self, reserve: int = 0) -> None:
+        if not self.max_bytes:
+            return
+        total = sum(e.size for e in self._entries.values()) + reserve
+        for key in list(self._entries.keys()):   # du plus ancien au plus récent
+            if total <= self.max_bytes:
+                break
+            entry = self._entries[key]
+            if entry.refs > 0:
+                continue
+            del self._entries[key]
+            total -= entry.size
+            self.evictions += 1
+
+    def clear(self) -> int:
+        """Décharge tous les modèles inutilisés ; renvoie le nombre de modèles retirés."""
+        with self._lock:
+            idle = [k for k, e in self._entries.items() if e.refs == 0]
+            for k in idle:
+                del self._entries[k]
+            self.evictions += len(idle)
+            return len(idle)
+
+    # --- introspection
+    def used_bytes(self) -> int:
+        with self._lock:
+            return sum(e.size for e in self._entries.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            models: List[Dict[str, Any]] = [
+                {
+                    "model": k[0],
+                    "compute_type": k[1],
+                    "cpu_threads": k[2],
+                    "num_workers": k[3],
+                    "size_bytes": e.size,
+                    "in_use": e.refs,
+                    "uses": e.uses,
+                    "loaded_at": e.loaded_at,
+                    "last_used": e.last_used,
+                }
+                for k, e in reversed(self._entries.items())   # plus récent d'abord
+            ]
+            lookups = self.hits + self.misses
+            return {
+                "models": models,
+                "loading": [list(k) for k in self._loading],
+                "used_bytes": sum(e.size for e in self._entries.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else None,
+                "evictions": self.evictions,
+                "load_seconds": round(self.load_seconds, 3),
+            }
@@ -0,0 +1,115 @@
+"""Sorties de transcription écrites au fil des segments : TXT, SRT, WebVTT, JSON lines."""
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# Formats horodatés proposés en plus du .txt
+FORMATS = ("srt", "vtt", "jsonl")
+
+MEDIA_TYPES = {
+    "txt": "text/plain; charset=utf-8",
+    "srt": "application/x-subrip",
+    "vtt": "text/vtt; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+}
+
+Words = Optional[List[Dict[str, Any]]]
+
+
+def segment_words(seg: Any, offset: float = 0.0) -> Words:
+    """Mots horodatés d'un segment faster-whisper (None sans ``word_timestamps``)."""
+    if not getattr(seg, "words", None):
+        return None
+    return [
+        {"start": round(offset + w.start, 3), "end": round(offset + w.end, 3),
+         "word": w.word, "probability": round(w.probability, 3)}
+        for w in seg.words
+    ]
+
+
+def _timestamp(seconds: float, sep: str) -> str:
+    ms = int(round(max(0.0, seconds) * 1000))
+    h, ms = divmod(ms, 3_600_000)
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}"
+
+
+class _Writer:
+    header = ""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.count = 0
+        # Nouvel inode : ``path`` peut être un lien physique vers une entrée du cache des résultats
+        path.unlink(missing_ok=True)
+        self._fh = path.open("w", encoding="utf-8", newline="\n")
+        self._fh.write(self.header)
+
+    def write(self, start: float, end: float, text: str, words: Words) -> None:
+        self.count += 1
+        self._fh.write(self.format(start, end, text, words))
+
+    def format(self, start: float, end: float, text: str, words: Words) -> str:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        self._fh.flush()
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+class TxtWriter(_Writer):
+    def format(self, start, end, text, words):
+        return text + "\n"
+
+
+class SrtWriter(_Writer):
+    def format(self, start, end, text, words):
+        return f"{self.count}\n{_timestamp(start, ',')} --> {_timestamp(end, ',')}\n{text}\n\n"
+
+
+class VttWriter(_Writer):
+    header = "WEBVTT\n\n"
+
+    def format(self, start, end, text, words):
+        return f"{_timestamp(start, '.')} --> {_timestamp(end, '.')}\n{text}\n\n"
+
+
+class JsonlWriter(_Writer):
+    def format(self, start, end, text, words):
+        rec: Dict[str, Any] = {"id": self.count, "start": round(start, 3), "end": round(end, 3), "text": text}
+        if words is not None:
+            rec["words"] = words
+        return json.dumps(rec, ensure_ascii=False) + "\n"
+
+
+WRITERS = {"txt": TxtWriter, "srt": SrtWriter, "vtt": VttWriter, "jsonl": JsonlWriter}
+
+
+class TranscriptWriters:
+    """Écrit un même flux de segments dans ``<stem>_transcription.<ext>`` pour chaque format.
+
+    Chaque segment est vidé sur disque aussitôt : les fichiers sont lisibles (et
+    téléchargeables) pendant la transcription.
+    """
+
+    def __init__(self, out_dir: Path, stem: str, formats: Iterable[str]):
+        self.paths = {fmt: out_dir / f"{stem}_transcription.{fmt}" for fmt in ("txt", *formats)}
+        self._writers = {fmt: WRITERS[fmt](path) for fmt, path in self.paths.items()}
+
+    def write(self, start: float, end: float, text: str, words: Words = None) -> None:
+        for w in self._writers.values():
+            w.write(start, end, text, words)
+            w.flush()
+
+    def close(self) -> None:
+        for w in self._writers.values():
+            w.close()
+
+    def __enter__(self) -> "TranscriptWriters":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
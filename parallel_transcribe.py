@@ -0,0 +1,205 @@
+"""Transcription parallèle d'un long enregistrement : découpage VAD + pool de processus.
+
+L'audio (16 kHz mono float32) est découpé aux silences détectés par Silero VAD, chaque
+morceau est transcrit par un processus du pool (qui garde son propre WhisperModel), puis
+les segments sont recollés dans l'ordre avec des horodatages absolus.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from output_formats import segment_words
+
+SAMPLING_RATE = 16000
+
+# (début, fin, texte, mots horodatés ou None) en secondes absolues
+ChunkSegment = Tuple[float, float, str, Optional[List[Dict[str, Any]]]]
+
+
+def plan_chunks(speech: List[Dict[str, int]], total: int, target: int) -> List[Tuple[int, int]]:
+    """Bornes (en échantillons) des morceaux à transcrire.
+
+    On coupe au milieu du silence qui précède la région de parole qui ferait dépasser
+    ``target`` échantillons ; une parole continue plus longue que ``2 * target`` est
+    coupée de force tous les ``target`` échantillons. Aucun morceau ne dépasse
+    ``2 * target`` : un long silence coupé en son milieu est redécoupé (``cap_chunks``).
+    """
+    if not speech:
+        return []
+    cuts = [0]
+    chunk_start = 0
+    prev_end: Optional[int] = None
+    for region in speech:
+        if prev_end is not None and region["end"] - chunk_start > target:
+            cut = (prev_end + region["start"]) // 2
+            if cut > chunk_start:
+                cuts.append(cut)
+                chunk_start = cut
+        while region["end"] - chunk_start > 2 * target:
+            chunk_start += target
+            cuts.append(chunk_start)
+        prev_end = region["end"]
+    cuts.append(total)
+    return cap_chunks([(a, b) for a, b in zip(cuts, cuts[1:]) if b > a], 2 * target)
+
+
+def cap_chunks(chunks: List[Tuple[int, int]], limit: int) -> List[Tuple[int, int]]:
+    """Redécoupe à intervalles réguliers les morceaux plus longs que ``limit`` échantillons."""
+    out: List[Tuple[int, int]] = []
+    for a, b in chunks:
+        n = max(1, -(-(b - a) // max(1, limit)))
+        out.extend((a + (b - a) * i // n, a + (b - a) * (i + 1) // n) for i in range(n))
+    return out
+
+
+# ========= Côté processus worker =========
+_WORKER_MODEL = None
+
+
+def _init_worker(model_source: str, compute_type: str, cpu_threads: int, download_root: str):
+    global _WORKER_MODEL
+    from faster_whisper import WhisperModel
+    _WORKER_MODEL = WhisperModel(
+        model_source,
+        device="cpu",
+        compute_type=compute_type,
+        cpu_threads=cpu_threads,
+        download_root=download_root,
+    )
+
+
+def _transcribe_chunk(audio: Any, offset_s: float, options: Dict[str, Any]) -> List[ChunkSegment]:
+    if isinstance(audio, tuple):
+        # ("pcm", chemin, début, fin) : tranche lue directement dans le PCM décodé, sans copie via pickle
+        import numpy as np
+        _, path, a, b = audio
+        audio = np.memmap(path, dtype=np.float32, mode="r")[a:b]
+    segments, _ = _WORKER_MODEL.transcribe(audio, **options)
+    return [
+        (offset_s + seg.start, offset_s + seg.end, seg.text or "", segment_words(seg, offset_s))
+        for seg in segments
+    ]
+
+
+# ========= Côté serveur =========
+# Un pool par réglage (processus, modèle, compute_type, threads), compté par ses utilisateurs :
+# un job avec un autre modèle ou profil ne coupe jamais le pool d'un job en cours. Seul le
+# dernier pool demandé est gardé une fois inutilisé (réutilisé par le job suivant).
+_POOL_LOCK = threading.Lock()
+_POOLS: Dict[Tuple[Any, ...], List[Any]] = {}    # clé → [pool, utilisateurs]
+_LATEST_KEY: Optional[Tuple[Any, ...]] = None
+
+
+def _acquire_pool(processes: int, model_source: str, compute_type: str, cpu_threads: int,
+                  download_root: str) -> Tuple[Tuple[Any, ...], ProcessPoolExecutor]:
+    global _LATEST_KEY
+    key = (processes, model_source, compute_type, cpu_threads)
+    with _POOL_LOCK:
+        entry = _POOLS.get(key)
+        if entry is None:
+            # "spawn" : pas de fork d'un processus multi-threadé qui a déjà chargé CTranslate2
+            pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_source, compute_type, cpu_threads, download_root),
+            )
+            entry = _POOLS[key] = [pool, 0]
+        entry[1] += 1
+        _LATEST_KEY = key
+        for other, (pool, users) in list(_POOLS.items()):   # pools inutilisés d'un ancien réglage
+            if other != key and users == 0:
+                del _POOLS[other]
+                pool.shutdown(wait=False, cancel_futures=True)
+        return key, entry[0]
+
+
+def _release_pool(key: Tuple[Any, ...]) -> None:
+    with _POOL_LOCK:
+        entry = _POOLS.get(key)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0 and key != _LATEST_KEY:
+            del _POOLS[key]
+            entry[0].shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pool() -> None:
+    global _LATEST_KEY
+    with _POOL_LOCK:
+        for pool, _users in _POOLS.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _POOLS.clear()
+        _LATEST_KEY = None
+
+
+def speech_regions(audio: Any, min_silence_ms: int = 1000) -> List[Dict[str, int]]:
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+    return get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=min_silence_ms))
+
+
+def iter_parallel_chunks(
+    audio: Any,
+    *,
+    processes: int,
+    model_source: str,
+    compute_type: str,
+    cpu_threads: int,
+    download_root: str,
+    options: Dict[str, Any],
+    chunk_s: Optional[float] = None,
+    pcm_path: Optional[str] = None,
+    offset: int = 0,
+) -> Iterator[Tuple[List[ChunkSegment], float, int, int]]:
+    """Transcrit ``audio`` en parallèle et produit, dans l'ordre des morceaux,
+    ``(segments, secondes_terminées, morceaux_terminés, nb_morceaux)``.
+
+    Si ``audio`` est la projection mémoire du fichier ``pcm_path`` (float32 brut), les
+    processus y lisent leur tranche eux-mêmes au lieu de recevoir une copie. ``offset`` :
+    position (en échantillons) de ``audio`` dans ce fichier, pour reprendre en cours de route.
+
+    ``secondes_terminées`` compte tous les morceaux finis (même ceux pas encore émis),
+    pour que la progression avance au rythme réel du pool.
+    """
+    total = len(audio)
+    duration = total / SAMPLING_RATE
+    if chunk_s is None:
+        # ~2 morceaux par processus pour lisser les écarts de durée, entre 30 s et 10 min
+        chunk_s = max(30.0, min(600.0, duration / (2 * max(1, processes))))
+    chunks = plan_chunks(speech_regions(audio), total, int(chunk_s * SAMPLING_RATE))
+    if not chunks:
+        yield [], duration, 0, 0
+        return
+
+    key, pool = _acquire_pool(processes, model_source, compute_type, cpu_threads, download_root)
+    pending: set = set()
+    try:
+        futures = {
+            pool.submit(
+                _transcribe_chunk,
+                ("pcm", pcm_path, offset + a, offset + b) if pcm_path else audio[a:b],
+                (offset + a) / SAMPLING_RATE,
+                options,
+            ): i
+            for i, (a, b) in enumerate(chunks)
+        }
+        results: Dict[int, List[ChunkSegment]] = {}
+        done_s = 0.0
+        next_i = 0
+        pending = set(futures)
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                i = futures[fut]
+                results[i] = fut.result()
+                a, b = chunks[i]
+                done_s += (b - a) / SAMPLING_RATE
+            while next_i in results:
+                yield results.pop(next_i), done_s, next_i + 1, len(chunks)
+                next_i += 1
+    finally:
+        for fut in pending:
+            fut.cancel()
+        _release_pool(key)
@@ -0,0 +1,95 @@
+"""Profils vitesse / précision du chemin local et choix automatique selon la charge.
+
+Un profil fixe le faisceau de décodage et, au besoin, plafonne la taille du modèle.
+Le RTF attendu (temps de calcul / durée de l'audio) vient d'abord des RTF mesurés sur
+ce serveur (moyenne glissante par modèle, faisceau et mode d'exécution : séquentiel, par
+lots ou parallèle), à défaut d'une table indicative.
+"""
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Du plus léger au plus lourd
+MODEL_ORDER = ("base", "small", "medium", "large-v2", "large-v3")
+
+# RTF indicatif sur CPU (int8, beam_size=5, un worker) avant toute mesure
+DEFAULT_RTF = {"base": 0.08, "small": 0.2, "medium": 0.5, "large-v2": 1.0, "large-v3": 1.0}
+# Coût relatif du faisceau par rapport à beam_size=5
+BEAM_COST = {1: 0.6, 2: 0.7, 3: 0.8, 4: 0.9, 5: 1.0}
+
+
+class Profile(NamedTuple):
+    name: str
+    label: str
+    beam_size: int
+    max_model: Optional[str] = None     # None = modèle demandé
+
+
+# Du plus précis au plus rapide : l'ordre sert au mode « auto »
+PROFILES: Dict[str, Profile] = {
+    p.name: p for p in (
+        Profile("standard", "Standard", 5),
+        Profile("equilibre", "Équilibré", 2),
+        Profile("rapide", "Rapide", 1, max_model="small"),
+        Profile("express", "Express", 1, max_model="base"),
+    )
+}
+DEFAULT_PROFILE = "standard"
+AUTO = "auto"
+
+
+def profile_model(profile: Profile, requested: str) -> str:
+    """Modèle effectif : le modèle demandé, ramené au plafond du profil s'il le dépasse."""
+    if profile.max_model is None or requested not in MODEL_ORDER:
+        return requested
+    return min(requested, profile.max_model, key=MODEL_ORDER.index)
+
+
+SEQUENTIAL = "sequential"   # autres modes : "batched", "parallel"
+
+
+class RtfEstimator:
+    """RTF attendu par (modèle, faisceau, mode) : moyenne glissante des mesures, sinon celle
+    du mode séquentiel (la plus lente), sinon table."""
+
+    def __init__(self, alpha: float = 0.3):
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._seen: Dict[Tuple[str, int, str], float] = {}
+
+    def observe(self, model: str, beam_size: int, rtf: float, mode: str = SEQUENTIAL) -> None:
+        key = (model, beam_size, mode)
+        with self._lock:
+            prev = self._seen.get(key)
+            self._seen[key] = rtf if prev is None else prev + self.alpha * (rtf - prev)
+
+    def estimate(self, model: str, beam_size: int, mode: str = SEQUENTIAL) -> float:
+        with self._lock:
+            seen = self._seen.get((model, beam_size, mode))
+            if seen is None:
+                seen = self._seen.get((model, beam_size, SEQUENTIAL))
+        if seen is not None:
+            return seen
+        return DEFAULT_RTF.get(model, 1.0) * BEAM_COST.get(beam_size, 1.0)
+
+    def stats(self) -> List[Dict[str, object]]:
+        with self._lock:
+            return [{"model": m, "beam_size": b, "mode": mode, "rtf": round(r, 4)}
+                    for (m, b, mode), r in sorted(self._seen.items())]
+
+
+def choose(requested: str, duration_s: float, backlog_s: float, deadline_s: float,
+           estimator: RtfEstimator, mode: str = SEQUENTIAL) -> Tuple[Profile, str, float]:
+    """Profil le plus précis qui termine dans les temps : ``backlog_s`` (travail déjà en
+    file devant le job) + ``duration_s`` × RTF ≤ ``deadline_s``. Sinon le plus rapide.
+
+    Renvoie ``(profil, modèle effectif, RTF attendu)``.
+    """
+    candidates = list(PROFILES.values())
+    for profile in candidates:
+        model = profile_model(profile, requested)
+        rtf = estimator.estimate(model, profile.beam_size, mode)
+        if backlog_s + duration_s * rtf <= deadline_s:
+            return profile, model, rtf
+    fastest = candidates[-1]
+    model = profile_model(fastest, requested)
+    return fastest, model, estimator.estimate(model, fastest.beam_size, mode)
@@ -0,0 +1,152 @@
+"""Cache persistant des résultats de transcription, adressé par le contenu audio."""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+META_NAME = "meta.json"
+
+
+def link_or_copy(src: Path, dst: Path) -> None:
+    """Lien physique ``src`` → ``dst`` (même volume), copie sinon.
+
+    ``dst`` partage alors son contenu avec l'entrée du cache : il ne doit jamais être
+    réécrit sur place (voir ``write_text_atomic``).
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if dst.exists():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def write_text_atomic(path: Path, text: str) -> None:
+    """Écrit ``path`` via un fichier temporaire renommé : un lien physique vers le cache
+    à cet emplacement est remplacé, jamais tronqué."""
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+class ResultCache:
+    """Stocke, par clé, un petit jeu de fichiers texte (transcription, résumé…).
+
+    Une entrée est un dossier ``root/<kk>/<clé>/`` contenant ``<nom>.txt`` et ``meta.json``.
+    L'éviction retire les entrées les moins récemment lues dès que ``max_bytes`` est dépassé.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = 0):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        self._index: Dict[str, Tuple[int, float]] = {}   # clé → (octets, dernier accès)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._scan()
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        blob = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def _scan(self) -> None:
+        for meta in self.root.glob(f"*/*/{META_NAME}"):
+            entry = meta.parent
+            try:
+                size = sum(p.stat().st_size for p in entry.iterdir() if p.is_file())
+                self._index[entry.name] = (size, meta.stat().st_mtime)
+            except OSError:
+                continue
+
+    # --- lecture
+    def get(self, key: str) -> Optional[Dict[str, Path]]:
+        """Renvoie ``{nom: chemin}`` pour une entrée présente, sinon None."""
+        entry = self._entry_dir(key)
+        meta = entry / META_NAME
+        with self._lock:
+            if key not in self._index or not meta.exists():
+                self._index.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            size, _ = self._index[key]
+            now = time.time()
+            self._index[key] = (size, now)
+        try:
+            os.utime(meta, (now, now))   # LRU persistant entre redémarrages
+        except OSError:
+            pass
+        return {p.stem: p for p in entry.glob("*.txt")}
+
+    # --- écriture
+    def put(self, key: str, texts: Dict[str, str], meta: Optional[Dict[str, Any]] = None) -> None:
+        entry = self._entry_dir(key)
+        staging = self.root / f".tmp-{uuid.uuid4().hex}"
+        staging.mkdir(parents=True)
+        try:
+            for name, text in texts.items():
+                (staging / f"{name}.txt").write_text(text, encoding="utf-8")
+            (staging / META_NAME).write_text(
+                json.dumps({**(meta or {}), "stored_at": time.time()}, ensure_ascii=False),
+                encoding="utf-8",
+            )
+            size = sum(p.stat().st_size for p in staging.iterdir())
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            if entry.exists():
+                shutil.rmtree(entry, ignore_errors=True)
+            os.replace(staging, entry)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        with self._lock:
+            self._index[key] = (size, time.time())
+            self.stores += 1
+            victims = self._select_victims_locked(keep=key)
+        for victim in victims:
+            shutil.rmtree(self._entry_dir(victim), ignore_errors=True)
+
+    def _select_victims_locked(self, keep: str):
+        if not self.max_bytes:
+            return []
+        total = sum(size for size, _ in self._index.values())
+        victims = []
+        for key, (size, _) in sorted(self._index.items(), key=lambda kv: kv[1][1]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            victims.append(key)
+            total -= size
+        for key in victims:
+            del self._index[key]
+        self.evictions += len(victims)
+        return victims
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._index),
+                "used_bytes": sum(size for size, _ in self._index.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else None,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
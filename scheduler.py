@@ -0,0 +1,171 @@
+"""Ordonnanceur de jobs : files bornées à priorité et pools de workers par type (local / cloud)."""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+
+class QueueFull(Exception):
+    """La limite d'admission est atteinte : le job doit être refusé (HTTP 429)."""
+
+
+class _Lane:
+    """Une file à priorité servie par un nombre fixe de threads workers."""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = max(1, int(workers))
+        self.heap: List[Tuple[int, int, str, Callable[[], None]]] = []
+        self.running: Dict[str, float] = {}
+        self.running_priority: Dict[str, int] = {}
+        self.preempting: Set[str] = set()
+
+
+class JobScheduler:
+    """Remplace le « un thread par job ».
+
+    - ``submit(job_id, fn, lane, priority)`` met le job en file (priorité haute = servi d'abord,
+      FIFO à priorité égale) ou lève ``QueueFull`` si ``max_queued`` jobs attendent déjà ;
+    - chaque file (« local », « cloud ») a son propre nombre de workers concurrents ;
+    - ``cancel(job_id)`` retire un job encore en attente ;
+    - avec ``preempt``, un job soumis alors que tous les workers de sa file sont pris
+      demande ``preempt(job_id)`` au job en cours de plus basse priorité (strictement
+      inférieure) : à lui de s'arrêter à un point sûr et de se soumettre à nouveau.
+    """
+
+    def __init__(self, lanes: Dict[str, int], max_queued: int = 0,
+                 preempt: Optional[Callable[[str], None]] = None):
+        self.max_queued = max(0, int(max_queued))   # 0 = pas de limite
+        self.preempt = preempt
+        self._cond = threading.Condition()
+        self._lanes: Dict[str, _Lane] = {name: _Lane(name, n) for name, n in lanes.items()}
+        self._seq = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._started = False
+        self.submitted = 0
+        self.rejected = 0
+
+    # --- cycle de vie
+    def start(self) -> None:
+        with self._cond:
+            if self._started:
+                return
+            self._started = True
+        for lane in self._lanes.values():
+            for i in range(lane.workers):
+                t = threading.Thread(
+                    target=self._worker, args=(lane,), name=f"job-{lane.name}-{i}", daemon=True
+                )
+                t.start()
+                self._threads.append(t)
+
+    # --- soumission
+    def submit(self, job_id: str, fn: Callable[[], None], lane: str = "local", priority: int = 0,
+               requeue: bool = False) -> int:
+        """Met ``fn`` en file ; renvoie la position (1 = prochain servi).
+
+        ``requeue`` : job déjà admis (préempté) remis en file, hors limite d'admission.
+        """
+        victim = None
+        with self._cond:
+            if not requeue and self.max_queued and self.queued() >= self.max_queued:
+                self.rejected += 1
+                raise QueueFull(f"{self.queued()} job(s) déjà en attente")
+            q = self._lanes[lane]
+            heapq.heappush(q.heap, (-int(priority), next(self._seq), job_id, fn))
+            self.submitted += 1
+            self._cond.notify_all()
+            if self.preempt is not None and len(q.running) >= q.workers:
+                victim = self._victim_locked(q, int(priority))
+            position = self._position_locked(q, job_id) or 0
+        if victim is not None:
+            try:
+                self.preempt(victim)
+            except Exception:
+                logging.exception("Préemption du job %s échouée", victim)
+        return position
+
+    @staticmethod
+    def _victim_locked(q: _Lane, priority: int) -> Optional[str]:
+        candidates = [(p, jid) for jid, p in q.running_priority.items()
+                      if p < priority and jid not in q.preempting]
+        if not candidates:
+            return None
+        _, victim = min(candidates)
+        q.preempting.add(victim)
+        return victim
+
+    def cancel(self, job_id: str) -> bool:
+        """Retire un job en attente ; False s'il n'est pas (ou plus) en file."""
+        with self._cond:
+            for q in self._lanes.values():
+                kept = [item for item in q.heap if item[2] != job_id]
+                if len(kept) != len(q.heap):
+                    q.heap[:] = kept
+                    heapq.heapify(q.heap)
+                    return True
+        return False
+
+    def is_full(self) -> bool:
+        with self._cond:
+            return bool(self.max_queued) and self.queued() >= self.max_queued
+
+    # --- introspection
+    def queued(self) -> int:
+        return sum(len(q.heap) for q in self._lanes.values())
+
+    def position(self, job_id: str) -> Optional[int]:
+        """Position 1-based du job dans sa file, ou None s'il n'est pas (ou plus) en attente."""
+        with self._cond:
+            for q in self._lanes.values():
+                pos = self._position_locked(q, job_id)
+                if pos is not None:
+                    return pos
+        return None
+
+    @staticmethod
+    def _position_locked(q: _Lane, job_id: str) -> Optional[int]:
+        for i, item in enumerate(sorted(q.heap, key=lambda it: (it[0], it[1])), 1):
+            if item[2] == job_id:
+                return i
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "max_queued": self.max_queued,
+                "queued": self.queued(),
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "lanes": {
+                    name: {
+                        "workers": q.workers,
+                        "queued": len(q.heap),
+                        "running": sorted(q.running),
+                    }
+                    for name, q in self._lanes.items()
+                },
+            }
+
+    # --- workers
+    def _worker(self, q: _Lane) -> None:
+        while True:
+            with self._cond:
+                while not q.heap:
+                    self._cond.wait()
+                neg_priority, _, job_id, fn = heapq.heappop(q.heap)
+                started = q.running[job_id] = time.time()
+                q.running_priority[job_id] = -neg_priority
+            try:
+                fn()
+            except Exception:
+                logging.exception("Job %s : erreur non gérée dans le worker %s", job_id, q.name)
+            finally:
+                with self._cond:
+                    # Un job préempté s'est remis en file : un autre worker a pu le reprendre
+                    if q.running.get(job_id) is started:
+                        q.running.pop(job_id, None)
+                        q.running_priority.pop(job_id, None)
+                        q.preempting.discard(job_id)
@@ -1,33 +1,54 @@
 import os
 import sys
+import socket
+import json
+import asyncio
 import shutil
+import hashlib
 import uuid
 import pathlib
 import threading
 import time
+import wave
+_IMPORT_T0 = time.perf_counter()   # mesure du démarrage (/health)
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, List, Dict, Any, Optional, Set, Tuple
+from importlib.util import find_spec
 from pathlib import Path
 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, PlainTextResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query, Request, WebSocket
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
-# ----- LOCAL (faster-whisper)
-from faster_whisper import WhisperModel
-
-# ----- CLOUD (OpenAI) — optionnel
-try:
-    from openai import OpenAI  # lib openai >= 1.x
-except Exception:
-    OpenAI = None  # type: ignore
-
-# ----- Téléchargement Hugging Face (pour montrer la progression)
-try:
-    from huggingface_hub import snapshot_download
-except Exception:
-    snapshot_download = None  # type: ignore
+# faster-whisper (et avec lui ctranslate2/onnxruntime), openai, huggingface_hub, av et
+# numpy sont importés au premier usage : l'application sert / sans les charger.
+if TYPE_CHECKING:
+    from faster_whisper import WhisperModel
+    from openai import OpenAI
+
+from model_pool import ModelPool, ModelKey
+from scheduler import JobScheduler, QueueFull
+from result_cache import ResultCache, link_or_copy, write_text_atomic
+import parallel_transcribe
+from cloud_client import RateLimiter, call_with_retries, shared_http_client, status_code
+import audio_split
+from job_store import JobStore, FINISHED
+import downloads
+import audio_cache
+from audio_cache import DecodedAudioCache
+import batched_transcribe
+from journal import SegmentJournal
+import output_formats
+from output_formats import TranscriptWriters
+import metrics
+from job_state import JobState, LogBuffer, Cancelled, FileCancelled, Preempted
+from job_queue import JobQueue
+from model_download import ModelDownloader, DownloadError
+import qos
+import summarize
 
 
 # ========= Base dir compatible PyInstaller =========
@@ -41,9 +62,13 @@ def get_base_dir() -> Path:
 BASE_DIR = get_base_dir()
 
 # ========= Dossiers de travail =========
-UPLOAD_DIR = BASE_DIR / "uploads"
-TRANS_DIR  = BASE_DIR / "transcriptions"
-TEMP_DIR   = BASE_DIR / "tmp"
+# WHISPER_DATA_DIR : données des jobs (uploads, sorties, base) ; en mode réparti, volume
+# partagé par l'API et les workers.
+DATA_DIR   = Path(os.getenv("WHISPER_DATA_DIR") or BASE_DIR).expanduser()
+UPLOAD_DIR = DATA_DIR / "uploads"
+TRANS_DIR  = DATA_DIR / "transcriptions"
+TEMP_DIR   = DATA_DIR / "tmp"
+CACHE_DIR  = DATA_DIR / "cache"
 ASSETS_DIR = BASE_DIR / "assets"
 
 # Répertoire persistant pour les modèles Whisper.
@@ -57,7 +82,7 @@ def _get_models_dir() -> Path:
 
 MODELS_DIR = _get_models_dir()
 
-for d in (UPLOAD_DIR, TRANS_DIR, TEMP_DIR, MODELS_DIR):
+for d in (UPLOAD_DIR, TRANS_DIR, TEMP_DIR, CACHE_DIR, MODELS_DIR):
     d.mkdir(parents=True, exist_ok=True)
 
 # ========= App, statiques & templates =========
@@ -81,9 +106,13 @@ async def all_errors(request: Request, exc: Exception):
     return PlainTextResponse("Internal Server Error\n\n" + tb, status_code=500)
 
 # ========= Health =========
+# Durées de démarrage (s) : import de ce module, prêt à servir (événement startup) et, si
+# main_gui.py a fourni WHISPER_LAUNCH_TIME, depuis le lancement du processus
+STARTUP: Dict[str, Optional[float]] = {"import_s": None, "ready_s": None, "since_launch_s": None}
+
 @app.get("/health")
 def health():
-    return {"ok": True, "base_dir": str(BASE_DIR)}
+    return {"ok": True, "base_dir": str(BASE_DIR), "startup": STARTUP, "warmup": _warmup_status()}
 
 # ========= Paramètres =========
 MODELS_LOCAL: Dict[str, str] = {
@@ -118,8 +147,8 @@ OUTPUT_PROMPTS: Dict[str, str] = {
     ),
 }
 
-# — tailles approximatives pour le suivi de progression (octets)
-#   valeurs proches des poids CTranslate2 (pratique pour une jauge réaliste)
+# — tailles approximatives (octets) : mémoire d'un modèle pas encore téléchargé
+#   valeurs proches des poids CTranslate2
 MODEL_APPROX_SIZE = {
     "base":     150 * 1024**2,   # ~150 MB
     "small":    470 * 1024**2,   # ~470 MB
@@ -137,24 +166,383 @@ REPO_MAP = {
     "large-v3": "Systran/faster-whisper-large-v3",
 }
 
+# — décodage local
+LOCAL_BEAM_SIZE = 5
+LOCAL_VAD_FILTER = True
+
+# — profils vitesse / précision (qos.PROFILES ou "auto") ; en "auto" sans échéance,
+#   le job doit finir (attente comprise) en moins de durée × QOS_AUTO_TARGET_RTF
+QOS_DEFAULT_PROFILE = os.getenv("WHISPER_PROFILE", qos.DEFAULT_PROFILE)
+QOS_AUTO_TARGET_RTF = float(os.getenv("WHISPER_QOS_AUTO_TARGET_RTF", "1.0"))
+
+# — fichiers longs : découpage VAD puis transcription parallèle sur N processus (0 = désactivé)
+PARALLEL_PROCS = int(os.getenv("WHISPER_PARALLEL_PROCS", "0"))
+LONG_FILE_MIN_S = float(os.getenv("WHISPER_LONG_FILE_MIN_S", "600"))
+PARALLEL_CPU_THREADS = max(1, (os.cpu_count() or 1) // max(1, PARALLEL_PROCS))
+
+# — inférence par lots (faster-whisper >= 1.1) : taille de lot (0 = désactivé) et durée
+#   maximale d'un fichier « court » regroupé avec les autres fichiers courts du job
+BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", "0"))
+BATCH_SHORT_FILE_S = float(os.getenv("WHISPER_BATCH_SHORT_FILE_S", "120"))
+
+# — audio décodé une fois (PCM 16 kHz float32, projeté en mémoire) et réutilisé
+DECODED_AUDIO_CACHE = os.getenv("WHISPER_DECODED_CACHE", "1") == "1"
+
+# — cache des résultats (adressé par le SHA-256 de l'audio), taille max en Mo
+RESULT_CACHE_MB = float(os.getenv("WHISPER_RESULT_CACHE_MB", "512"))
+
+# — ordonnancement : workers concurrents par type de job et limite d'admission
+LOCAL_WORKERS = max(1, int(os.getenv("WHISPER_LOCAL_WORKERS", "1")))
+CLOUD_WORKERS = max(1, int(os.getenv("WHISPER_CLOUD_WORKERS", "4")))
+MAX_QUEUED_JOBS = int(os.getenv("WHISPER_MAX_QUEUED_JOBS", "32"))    # 0 = illimité
+# Préemption : un job local plus prioritaire interrompt (entre deux segments) le job local
+# de plus basse priorité quand tous les workers sont pris ; celui-ci reprendra plus tard
+PREEMPT = os.getenv("WHISPER_PREEMPT", "0") == "1"
+
+# — exécution répartie : "all" (API et workers dans ce processus), "api" (l'API inscrit les
+#   jobs dans la file durable sans les traiter) ou "worker" (voir worker.py)
+ROLE = os.getenv("WHISPER_ROLE", "all").strip().lower()
+WORKER_ID = os.getenv("WHISPER_WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+WORKER_LEASE_S = float(os.getenv("WHISPER_WORKER_LEASE_S", "60"))   # bail renouvelé tous les tiers
+WORKER_POLL_S = 1.0            # attente entre deux réclamations infructueuses
+STORE_POLL_S = 1.0             # SSE côté API : relecture de la base (pas de notification inter-processus)
+
+# — chemin cloud : fichiers traités en parallèle par job, reprises sur 429/5xx,
+#   limites de débit côté client (requêtes/min, tokens/min ; 0 = illimité)
+CLOUD_FILE_CONCURRENCY = max(1, int(os.getenv("WHISPER_CLOUD_CONCURRENCY", "3")))
+CLOUD_MAX_RETRIES = int(os.getenv("WHISPER_CLOUD_MAX_RETRIES", "5"))
+CLOUD_RPM = float(os.getenv("WHISPER_CLOUD_RPM", "0"))
+CLOUD_TPM = float(os.getenv("WHISPER_CLOUD_TPM", "0"))
+SUMMARY_MODEL = "gpt-4o"
+# — transcriptions longues : résumé map-reduce (morceaux d'au plus N caractères résumés en
+#   parallèle, puis synthèse au format demandé) ; les notes par morceau sont mises en cache
+SUMMARY_CHUNK_CHARS = int(os.getenv("WHISPER_SUMMARY_CHUNK_CHARS", "24000"))
+SUMMARY_CONCURRENCY = max(1, int(os.getenv("WHISPER_SUMMARY_CONCURRENCY", "4")))
+# — fichiers trop gros pour l'API (25 Mo) : découpés en morceaux M4A envoyés en parallèle
+CLOUD_MAX_UPLOAD_BYTES = int(float(os.getenv("WHISPER_CLOUD_MAX_UPLOAD_MB", "24")) * 1024**2)
+CLOUD_PIECE_MAX_S = float(os.getenv("WHISPER_CLOUD_PIECE_MAX_S", "600"))
+CLOUD_PIECE_BITRATE = 32000
+
+# — persistance des jobs (SQLite WAL) et rétention
+JOB_FLUSH_INTERVAL_S = 1.0
+# — état des jobs en mémoire
+PROGRESS_INTERVAL_S = 0.25     # progression et logs publiés au plus à ce rythme par job
+LOG_BUFFER_LINES = int(os.getenv("WHISPER_LOG_BUFFER_LINES", "2000"))   # lignes de log gardées en mémoire par job
+JOB_TTL_S = float(os.getenv("WHISPER_JOB_TTL_S", "3600"))              # jobs terminés gardés en mémoire
+RETENTION_DAYS = float(os.getenv("WHISPER_RETENTION_DAYS", "7"))        # 0 = jamais de purge par âge
+DISK_QUOTA_BYTES = int(float(os.getenv("WHISPER_DISK_QUOTA_GB", "0")) * 1024**3)  # 0 = pas de quota
+ORPHAN_GRACE_S = 3600.0   # dossier sans job écrit depuis moins longtemps : envoi en cours, épargné
+
+# — réception des fichiers : copie par blocs, taille maximale par requête (Mo, 0 = illimité)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(float(os.getenv("WHISPER_MAX_UPLOAD_MB", "0")) * 1024**2)
+
+# — transcription en direct (WebSocket) : sessions simultanées, rythme des résultats partiels
+STREAM_MAX_SESSIONS = max(1, int(os.getenv("WHISPER_STREAM_MAX_SESSIONS", "2")))
+STREAM_PARTIAL_INTERVAL_S = float(os.getenv("WHISPER_STREAM_PARTIAL_S", "1.0"))
+
+# — réglages du modèle local partagé
+LOCAL_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+# Les cœurs sont répartis entre les workers locaux et, quand ils partagent le processus
+# (WHISPER_ROLE=all), les sessions en direct qui tournent hors ordonnanceur : chacun décode
+# avec cpu_threads threads sur sa propre réplique CTranslate2 (num_workers = LOCAL_WORKERS
+# ou STREAM_MAX_SESSIONS, poids partagés). La part des flux reste réservée sans session ouverte.
+STREAM_CPU_THREADS = int(os.getenv("WHISPER_STREAM_CPU_THREADS", "0")) or max(
+    1, (os.cpu_count() or 1) // (LOCAL_WORKERS + STREAM_MAX_SESSIONS))
+_STREAM_RESERVED_CPUS = STREAM_MAX_SESSIONS * STREAM_CPU_THREADS if ROLE == "all" else 0
+LOCAL_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0")) or max(
+    1, ((os.cpu_count() or 1) - _STREAM_RESERVED_CPUS) // LOCAL_WORKERS)
+# Budget mémoire du pool de modèles (Go, 0 = illimité)
+MODEL_POOL_MAX_GB = float(os.getenv("WHISPER_MODEL_POOL_MAX_GB", "0"))
+# Préchauffage en arrière-plan au démarrage (import de faster-whisper, chargement du modèle,
+# premier décodage) : "1" = modèle local par défaut, sinon nom du modèle ("small"…)
+PRELOAD_MODEL = os.getenv("WHISPER_PRELOAD_MODEL", "").strip()
+
 # ========= Patch VAD (local) =========
+# Copie faite en arrière-plan au démarrage ; le premier chargement d'un modèle l'attend.
+_VAD_ASSETS_READY = threading.Event()
+
 def _ensure_vad_assets():
-    src_assets = ASSETS_DIR
-    dst_assets = Path.home() / ".cache" / "faster-whisper" / "assets"
-    dst_assets.mkdir(parents=True, exist_ok=True)
-    for fname in ("silero_vad.onnx", "silero_encoder_v5.onnx", "silero_decoder_v5.onnx"):
-        s = src_assets / fname
-        d = dst_assets / fname
-        try:
-            if s.exists() and not d.exists():
-                shutil.copy2(s, d)
-        except Exception as e:
-            print(f"[WARN] Copie VAD échouée ({fname}): {e}")
+    try:
+        src_assets = ASSETS_DIR
+        dst_assets = Path.home() / ".cache" / "faster-whisper" / "assets"
+        dst_assets.mkdir(parents=True, exist_ok=True)
+        for fname in ("silero_vad.onnx", "silero_encoder_v5.onnx", "silero_decoder_v5.onnx"):
+            s = src_assets / fname
+            d = dst_assets / fname
+            try:
+                if s.exists() and not d.exists():
+                    shutil.copy2(s, d)
+            except Exception as e:
+                print(f"[WARN] Copie VAD échouée ({fname}): {e}")
+    except Exception as e:
+        print(f"[WARN] Dossier VAD indisponible : {e}")
+    finally:
+        _VAD_ASSETS_READY.set()
 
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 # Evite les barres tqdm de HF dans la console
 os.environ.setdefault("HF_HUB_DISABLE_PROGRESS_BARS", "1")
-_ensure_vad_assets()
+
+@app.on_event("startup")
+def _start_vad_assets():
+    threading.Thread(target=_ensure_vad_assets, name="vad-assets", daemon=True).start()
+
+# ========= Métriques (/metrics) =========
+METRICS = metrics.Registry()
+STAGE_SECONDS = METRICS.histogram(
+    "whisper_stage_seconds", "Durée des étapes d'un job (upload, file d'attente, modèle, décodage, transcription…)",
+    ["stage"],
+)
+RTF = METRICS.histogram(
+    "whisper_real_time_factor",
+    "Temps de traitement / durée de l'audio, par fichier (mode : cloud, local_sequential, local_batched, local_parallel)",
+    ["mode", "model"], buckets=metrics.RTF_BUCKETS,
+)
+CLOUD_LATENCY = METRICS.histogram("whisper_cloud_request_seconds", "Latence des appels à l'API OpenAI", ["op"])
+CLOUD_ERRORS = METRICS.counter("whisper_cloud_errors_total", "Appels à l'API OpenAI en échec", ["op", "code"])
+JOBS_LOCK_WAIT = METRICS.histogram(
+    "whisper_jobs_lock_wait_seconds", "Attente pour acquérir JOBS_LOCK", buckets=metrics.LOCK_BUCKETS,
+)
+
+def _record_stage(job_id: Optional[str], stage: str, seconds: float):
+    """Alimente l'histogramme de l'étape et le cumul ``timings`` du job (visible dans /api/status)."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    if job_id:
+        def _add(j):
+            j.timings[stage] = round(j.timings.get(stage, 0.0) + seconds, 3)
+        with_job(job_id, _add)
+
+@contextmanager
+def _stage(job_id: Optional[str], stage: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_stage(job_id, stage, time.perf_counter() - t0)
+
+# ========= Pool de modèles (local) =========
+def _local_model_key(model_name: str) -> ModelKey:
+    return (model_name, LOCAL_COMPUTE_TYPE, LOCAL_CPU_THREADS, LOCAL_WORKERS)
+
+def _stream_model_key(model_name: str) -> ModelKey:
+    return (model_name, LOCAL_COMPUTE_TYPE, STREAM_CPU_THREADS, STREAM_MAX_SESSIONS)
+
+# Téléchargements vérifiés et partagés entre jobs (HF_ENDPOINT, HF_TOKEN)
+MODEL_DOWNLOADS = ModelDownloader(MODELS_DIR, REPO_MAP)
+
+def _model_source(model_name: str) -> str:
+    # Dossier vérifié par MODEL_DOWNLOADS (ou copie antérieure, voir _ensure_local_model_with_progress)
+    # → chargement direct
+    local_dir = MODELS_DIR / model_name
+    if MODEL_DOWNLOADS.is_ready(model_name) or (local_dir / "model.bin").exists():
+        return str(local_dir)
+    return model_name
+
+def _load_whisper_model(key: ModelKey) -> "WhisperModel":
+    from faster_whisper import WhisperModel
+    _VAD_ASSETS_READY.wait()
+    model_name, compute_type, cpu_threads, num_workers = key
+    source = _model_source(model_name)
+    logging.info("Chargement du modèle %s (%s, cpu_threads=%s, num_workers=%s)",
+                 model_name, compute_type, cpu_threads, num_workers)
+    return WhisperModel(
+        source,
+        device="cpu",
+        compute_type=compute_type,
+        cpu_threads=cpu_threads,
+        num_workers=num_workers,
+        download_root=str(MODELS_DIR),
+    )
+
+def _estimate_model_bytes(key: ModelKey) -> int:
+    weights = MODELS_DIR / key[0] / "model.bin"
+    try:
+        return weights.stat().st_size
+    except OSError:
+        return MODEL_APPROX_SIZE.get(key[0], 1024**3)
+
+MODEL_POOL = ModelPool(
+    loader=_load_whisper_model,
+    estimate=_estimate_model_bytes,
+    max_bytes=int(MODEL_POOL_MAX_GB * 1024**3),
+)
+
+# ========= Préchauffage =========
+# État observable (/api/warmup, /health) : off → [downloading →] importing → loading → ready | error
+WARMUP: Dict[str, Any] = {"state": "off"}
+_WARMUP_LOCK = threading.Lock()
+
+def _warmup_status() -> Dict[str, Any]:
+    with _WARMUP_LOCK:
+        return dict(WARMUP)
+
+def _set_warmup(**fields):
+    with _WARMUP_LOCK:
+        WARMUP.update(fields)
+
+def start_warmup(model_name: str) -> bool:
+    """Lance le préchauffage de ``model_name`` en arrière-plan ; False s'il y en a déjà un en cours."""
+    with _WARMUP_LOCK:
+        if WARMUP["state"] in ("downloading", "importing", "loading"):
+            return False
+        WARMUP.clear()
+        WARMUP.update(state="importing", model=model_name)
+    threading.Thread(target=_warmup, args=(model_name,), name="warmup", daemon=True).start()
+    return True
+
+def _warmup(model_name: str):
+    t0 = time.perf_counter()
+    try:
+        if model_name in REPO_MAP and not MODEL_DOWNLOADS.is_ready(model_name):
+            _set_warmup(state="downloading")
+            MODEL_DOWNLOADS.ensure(model_name, lambda done, total: _set_warmup(bytes=done, total=total))
+        _set_warmup(state="importing")
+        t_import = time.perf_counter()
+        import faster_whisper  # noqa: F401  — ctranslate2, onnxruntime…
+        _set_warmup(state="loading", import_s=round(time.perf_counter() - t_import, 2))
+        with MODEL_POOL.acquire(_local_model_key(model_name)) as model:
+            import numpy as np
+            # Un décodage d'une seconde de silence : allocations et noyaux prêts pour le premier job
+            segments, _info = model.transcribe(np.zeros(audio_cache.SAMPLING_RATE, dtype=np.float32),
+                                               beam_size=1, vad_filter=False, without_timestamps=True)
+            for _ in segments:
+                pass
+        _set_warmup(state="ready", seconds=round(time.perf_counter() - t0, 2))
+        logging.info("Modèle '%s' préchauffé en %.1f s.", model_name, time.perf_counter() - t0)
+    except Exception as e:
+        _set_warmup(state="error", error=str(e))
+        logging.warning("Préchauffage du modèle '%s' échoué : %s", model_name, e)
+
+@app.on_event("startup")
+def _preload_default_model():
+    if PRELOAD_MODEL:
+        start_warmup(MODELS_LOCAL[DEFAULT_MODEL_LOCAL] if PRELOAD_MODEL == "1" else PRELOAD_MODEL)
+
+@app.get("/api/warmup")
+def warmup_status():
+    return _warmup_status()
+
+@app.post("/api/warmup")
+def warmup_start(model: Optional[str] = None):
+    """Préchauffe un modèle local (nom ou libellé ; défaut : modèle local par défaut)."""
+    model_name = MODELS_LOCAL.get(model or DEFAULT_MODEL_LOCAL, model)
+    if model_name not in MODELS_LOCAL.values():
+        raise HTTPException(status_code=400, detail="Modèle local inconnu")
+    started = start_warmup(model_name)
+    return JSONResponse({**_warmup_status(), "started": started}, status_code=202 if started else 200)
+
+@app.get("/api/models/pool")
+def model_pool_status():
+    return MODEL_POOL.stats()
+
+@app.get("/api/models/downloads")
+def model_downloads_status():
+    return MODEL_DOWNLOADS.status()
+
+@app.post("/api/models/{model}/prefetch")
+def prefetch_model(model: str):
+    """Télécharge (et vérifie) un modèle local à l'avance, sans le charger ; nom ou libellé."""
+    model_name = MODELS_LOCAL.get(model, model)
+    if model_name not in REPO_MAP:
+        raise HTTPException(status_code=404, detail="Modèle local inconnu")
+    if MODEL_DOWNLOADS.is_ready(model_name):
+        return {"model": model_name, "state": "ready", "started": False}
+    dl, created = MODEL_DOWNLOADS.start(model_name)
+    return JSONResponse({"model": model_name, **dl.snapshot(), "started": created}, status_code=202)
+
+# ========= Cache des résultats =========
+RESULT_CACHE = ResultCache(CACHE_DIR / "results", max_bytes=int(RESULT_CACHE_MB * 1024**2))
+
+def _local_cache_key(job: Dict[str, Any], fmeta: Dict[str, Any]) -> Optional[str]:
+    if not fmeta.get("sha256"):
+        return None
+    return ResultCache.make_key(
+        audio=fmeta["sha256"], mode="local", model=job["model"], compute_type=LOCAL_COMPUTE_TYPE,
+        lang=job["lang"], beam_size=_beam_size(job), vad=LOCAL_VAD_FILTER,
+        words=bool(job.get("word_timestamps")),
+    )
+
+def _cloud_cache_key(job: Dict[str, Any], fmeta: Dict[str, Any]) -> Optional[str]:
+    if not fmeta.get("sha256"):
+        return None
+    return ResultCache.make_key(
+        audio=fmeta["sha256"], mode="cloud", model=job["model"], lang=job["lang"],
+        output_type=job.get("output_type"),
+    )
+
+def _cloud_transcript_key(job: Dict[str, Any], fmeta: Dict[str, Any]) -> Optional[str]:
+    """Transcription API seule, réutilisée quel que soit le format de sortie demandé."""
+    if not fmeta.get("sha256"):
+        return None
+    return ResultCache.make_key(audio=fmeta["sha256"], mode="cloud", model=job["model"], lang=job["lang"])
+
+def _cached_text(key: str, name: str) -> Optional[str]:
+    hit = RESULT_CACHE.get(key)
+    if not hit or name not in hit:
+        return None
+    try:
+        return hit[name].read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+def _serve_from_cache(job_id: str, idx: int, fmeta: Dict[str, Any], key: Optional[str],
+                      outputs: Dict[str, str]) -> bool:
+    """Si ``key`` est en cache, lie ses fichiers dans TRANS_DIR/<job_id> et clôt le fichier.
+
+    ``outputs`` associe chaque nom en cache au suffixe du fichier de sortie
+    (ex. {"transcription": "transcription.txt", "summary": "resume.txt"}) ; le dernier
+    devient la sortie affichée du fichier.
+    """
+    hit = RESULT_CACHE.get(key) if key else None
+    if not hit or any(name not in hit for name in outputs):
+        return False
+    _fence_outputs(job_id)
+    out_dir = TRANS_DIR / job_id
+    stem = pathlib.Path(fmeta["name"]).stem
+    out_file = None
+    for name, suffix in outputs.items():
+        out_file = out_dir / f"{stem}_{suffix}"
+        link_or_copy(hit[name], out_file)
+    set_file_output(job_id, idx, str(out_file))
+    set_file_progress(job_id, idx, 1.0)
+    update_file_status(job_id, idx, "done")
+    append_log(job_id, f"♻ Résultat en cache : {fmeta['name']} → {out_file.name}")
+    logging.info("Cache hit %s (job %s, %s)", key, job_id, fmeta["name"])
+    return True
+
+def _store_in_cache(key: Optional[str], texts: Dict[str, str], fmeta: Dict[str, Any]):
+    if not key:
+        return
+    try:
+        RESULT_CACHE.put(key, texts, meta={"name": fmeta["name"], "sha256": fmeta.get("sha256")})
+    except Exception as e:
+        logging.warning("Mise en cache échouée pour %s : %s", fmeta["name"], e)
+
+# ========= Audio décodé =========
+DECODED_CACHE = DecodedAudioCache(CACHE_DIR / "decoded") if DECODED_AUDIO_CACHE else None
+
+def _decoded_pcm_path(job_id: str, fmeta: Dict[str, Any]) -> Optional[Path]:
+    if DECODED_CACHE is None or not fmeta.get("sha256"):
+        return None
+    with _stage(job_id, "decode"):
+        return DECODED_CACHE.ensure(fmeta["sha256"], fmeta["path"], UPLOAD_DIR / job_id)
+
+def _decoded_audio(job_id: str, fmeta: Dict[str, Any]):
+    """PCM 16 kHz mono float32 du fichier : projection mémoire du cache, sinon décodage direct."""
+    pcm = _decoded_pcm_path(job_id, fmeta)
+    if pcm is not None:
+        return audio_cache.open_pcm(pcm)
+    from faster_whisper.audio import decode_audio
+    with _stage(job_id, "decode"):
+        return decode_audio(fmeta["path"], sampling_rate=audio_cache.SAMPLING_RATE)
+
+@app.get("/api/cache")
+def result_cache_status():
+    stats = RESULT_CACHE.stats()
+    if DECODED_CACHE is not None:
+        stats["decoded"] = DECODED_CACHE.stats()
+    return stats
 
 # ========= Page d’accueil =========
 @app.get("/", response_class=HTMLResponse)
@@ -168,12 +556,331 @@ def index(request: Request):
             "langs": list(LANGS.keys()),
             "DEFAULT_MODEL_LOCAL": DEFAULT_MODEL_LOCAL,
             "DEFAULT_LANG": DEFAULT_LANG,
+            "profiles": [{"name": p.name, "label": p.label} for p in qos.PROFILES.values()],
+            "DEFAULT_PROFILE": QOS_DEFAULT_PROFILE,
         },
     )
 
 # ========= Jobs =========
-JOBS: Dict[str, Dict[str, Any]] = {}
-JOBS_LOCK = threading.Lock()
+# JOBS_LOCK ne protège que le registre (ajout, retrait, parcours) : chaque job a son propre
+# verrou, et une lecture JOBS.get() isolée n'en prend aucun.
+JOBS: Dict[str, JobState] = {}
+JOBS_LOCK = metrics.TimedLock(JOBS_LOCK_WAIT)   # se comporte comme threading.Lock
+
+def _request_preempt(job_id: str):
+    job = JOBS.get(job_id)
+    if job is None or job.use_api:   # préemption aux frontières de segments : chemin local seulement
+        return
+    job.preempt.set()
+    append_log(job_id, "⏸ Un job prioritaire attend : arrêt au prochain segment.")
+
+SCHEDULER = JobScheduler(
+    {"local": LOCAL_WORKERS, "cloud": CLOUD_WORKERS}, max_queued=MAX_QUEUED_JOBS,
+    preempt=_request_preempt if PREEMPT else None,
+)
+
+# File durable partagée entre processus (mode réparti), à côté de JOB_STORE
+QUEUE: Optional[JobQueue] = JobQueue(DATA_DIR / "jobs.sqlite3") if ROLE in ("api", "worker") else None
+
+@app.on_event("startup")
+def _start_scheduler():
+    if QUEUE is None:
+        SCHEDULER.start()
+
+def _queue_full() -> bool:
+    if QUEUE is not None:
+        return MAX_QUEUED_JOBS > 0 and QUEUE.waiting() >= MAX_QUEUED_JOBS
+    return SCHEDULER.is_full()
+
+def _queue_position(job_id: str) -> Optional[int]:
+    return QUEUE.position(job_id) if QUEUE is not None else SCHEDULER.position(job_id)
+
+def _submit_job(job_id: str, api_key: Optional[str], lane: str, priority: int) -> Optional[int]:
+    """Met un job en file : ordonnanceur de ce processus (la clé saisie reste en mémoire),
+    ou file durable en mode réparti (sans clé : les workers utilisent OPENAI_API_KEY)."""
+    if QUEUE is not None:
+        QUEUE.enqueue(job_id, lane, priority)
+        return QUEUE.position(job_id)
+    return SCHEDULER.submit(job_id, lambda: run_job(job_id, api_key), lane=lane, priority=priority)
+
+# ========= Persistance des jobs =========
+# JOBS ne garde que les jobs « chauds » ; tout est écrit en différé dans JOB_STORE
+# (immédiatement lors d'un changement de statut) pour survivre à un redémarrage.
+JOB_STORE = JobStore(DATA_DIR / "jobs.sqlite3")
+_FINISHED_AT: Dict[str, float] = {}
+_FLUSH_LOCK = threading.Lock()   # une sauvegarde à la fois : pas d'état ancien écrit après un plus récent
+_LOST_LEASES: Set[str] = set()   # mode worker : jobs repris par un autre worker, plus rien à écrire
+
+def _new_job_state(job_id: str, data: Dict[str, Any], first_log: int = 0) -> JobState:
+    """JobState dont les logs débordent dans JOB_STORE ; ``first_log`` : lignes déjà en base."""
+    logs = LogBuffer(
+        LOG_BUFFER_LINES,
+        spill=lambda start, lines: JOB_STORE.append_logs(job_id, lines, start),
+        read=lambda start, end: JOB_STORE.logs(job_id, start, end),
+        lines=data.get("logs", ()), first=first_log, saved=first_log,
+    )
+    return JobState(job_id, data, logs)
+
+def _flush_job(job_id: str):
+    with _FLUSH_LOCK:
+        job = JOBS.get(job_id)
+        if job is None or job_id in _LOST_LEASES:
+            return
+        with job.lock:
+            job.dirty = False
+            data = job.to_dict()
+            start, new_logs = job.logs.unsaved()
+        JOB_STORE.save(job_id, data, new_logs, start)
+        with job.lock:
+            job.logs.mark_saved(start + len(new_logs))
+
+def _publish_pending():
+    """Publie les mises à jour regroupées restées en attente (worker silencieux depuis)."""
+    now = time.monotonic()
+    for job in list(JOBS.values()):
+        if job.pending:
+            with job.lock:
+                published = job.pending and job.commit(now)
+            if published:
+                JOB_EVENTS.notify(job.id)
+
+def _flush_dirty():
+    for job in list(JOBS.values()):
+        if not job.dirty:
+            continue
+        try:
+            _flush_job(job.id)
+        except Exception as e:
+            logging.warning("Sauvegarde du job %s échouée : %s", job.id, e)
+
+def _evict_finished_jobs():
+    """Retire de la mémoire les jobs terminés depuis plus de JOB_TTL_S (ils restent en base)."""
+    cutoff = time.time() - JOB_TTL_S
+    for job_id, finished in list(_FINISHED_AT.items()):
+        if finished > cutoff:
+            continue
+        _flush_job(job_id)
+        with _FLUSH_LOCK:
+            job = JOBS.get(job_id)
+            if job is not None and job.dirty:
+                continue
+            with JOBS_LOCK:
+                JOBS.pop(job_id, None)
+            _FINISHED_AT.pop(job_id, None)
+
+def _job_dirs(job_id: str) -> List[Path]:
+    return [UPLOAD_DIR / job_id, TRANS_DIR / job_id, TEMP_DIR / job_id] + \
+        list(TEMP_DIR.glob(f"*_{job_id}.*"))
+
+def _newest_mtime(paths: List[Path]) -> Optional[float]:
+    newest = None
+    for path in paths:
+        try:
+            for p in [path, *(path.rglob("*") if path.is_dir() else ())]:
+                mtime = p.stat().st_mtime
+                newest = mtime if newest is None else max(newest, mtime)
+        except OSError:
+            continue
+    return newest
+
+def _purge_job_files(job_id: str):
+    for path in _job_dirs(job_id):
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        elif path.exists():
+            path.unlink()
+    JOB_STORE.delete(job_id)
+    logging.info("Rétention : job %s purgé", job_id)
+
+def _enforce_retention():
+    """Purge les fichiers des jobs terminés trop vieux, puis les plus anciens tant que
+    l'espace occupé dépasse DISK_QUOTA_BYTES. Les jobs en cours ne sont jamais touchés."""
+    with JOBS_LOCK:
+        hot = {jid for jid, j in JOBS.items() if j.get("status") not in FINISHED}
+    known = set(JOB_STORE.known_ids())
+    ages = {jid: ts for jid, ts in JOB_STORE.finished_jobs() if jid not in hot}
+    # Dossiers orphelins (jobs antérieurs au stockage persistant, envois interrompus) : âge =
+    # dernière écriture dans les dossiers du job. Un envoi en cours n'a pas encore de job,
+    # mais y écrit sans cesse : épargné tant qu'il a écrit depuis moins d'ORPHAN_GRACE_S.
+    orphans = {d.name for root in (UPLOAD_DIR, TRANS_DIR) for d in root.iterdir()
+               if d.is_dir() and d.name not in known and d.name not in hot and d.name not in ages}
+    now = time.time()
+    for jid in orphans:
+        newest = _newest_mtime(_job_dirs(jid))
+        if newest is not None and now - newest >= ORPHAN_GRACE_S:
+            ages[jid] = newest
+    candidates = sorted(ages.items(), key=lambda c: c[1])
+
+    if RETENTION_DAYS > 0:
+        cutoff = time.time() - RETENTION_DAYS * 86400
+        for jid, ts in [c for c in candidates if c[1] < cutoff]:
+            _purge_job_files(jid)
+            candidates.remove((jid, ts))
+    if DISK_QUOTA_BYTES > 0:
+        used = sum(_dir_size_bytes(d) for d in (UPLOAD_DIR, TRANS_DIR, TEMP_DIR))
+        for jid, _ts in candidates:
+            if used <= DISK_QUOTA_BYTES:
+                break
+            freed = sum(_dir_size_bytes(p) if p.is_dir() else p.stat().st_size for p in _job_dirs(jid) if p.exists())
+            _purge_job_files(jid)
+            used -= freed
+    if DECODED_CACHE is not None:
+        DECODED_CACHE.gc()   # PCM décodés dont l'upload a été purgé
+
+def _maintenance_loop():
+    last_flush = last_gc = 0.0
+    while True:
+        time.sleep(PROGRESS_INTERVAL_S)
+        _publish_pending()
+        if time.time() - last_flush < JOB_FLUSH_INTERVAL_S:
+            continue
+        last_flush = time.time()
+        _flush_dirty()
+        if time.time() - last_gc >= 60:
+            last_gc = time.time()
+            try:
+                _evict_finished_jobs()
+                if ROLE != "worker":   # une seule sorte de processus purge : l'API
+                    _enforce_retention()
+            except Exception as e:
+                logging.warning("Maintenance des jobs échouée : %s", e)
+
+def _load_job(job_id: str, log_since: Optional[int] = 0) -> Optional[Dict[str, Any]]:
+    """Job évincé de la mémoire (ou d'avant un redémarrage), relu depuis la base."""
+    return JOB_STORE.load(job_id, log_since)
+
+def _start_maintenance():
+    threading.Thread(target=_maintenance_loop, name="job-maintenance", daemon=True).start()
+
+@app.on_event("startup")
+def _recover_jobs():
+    """Remet en file les jobs « queued »/« running » interrompus par un arrêt du serveur."""
+    if QUEUE is not None:
+        _enqueue_orphans()
+        _start_maintenance()
+        return
+    for job_id in JOB_STORE.ids_with_status(("queued", "running", "pending")):
+        data = JOB_STORE.load(job_id, log_since=None)   # anciens logs relus depuis la base à la demande
+        if data is None:
+            continue
+        for f in data["files"]:
+            if f.get("status") != "done":
+                f["status"], f["progress"] = "queued", 0.0
+        data["status"] = "queued"
+        data["logs"] = ["↻ Serveur redémarré : job remis en file."]
+        job = _new_job_state(job_id, data, first_log=data.pop("log_offset"))
+        with JOBS_LOCK:
+            JOBS[job_id] = job
+        try:
+            SCHEDULER.submit(
+                job_id,
+                lambda jid=job_id: run_job(jid, None),   # clé API non conservée : OPENAI_API_KEY
+                lane=_job_lane(data),
+                priority=job.get("priority", 0),
+            )
+        except QueueFull:
+            job.status = "error"
+            job.logs.append("[ERREUR JOB] File d'attente pleine au redémarrage.")
+        _flush_job(job_id)
+        logging.info("Job %s repris après redémarrage", job_id)
+    _start_maintenance()
+
+def _enqueue_orphans():
+    """Mode réparti : au premier démarrage sur une file durable neuve, y inscrit les jobs en
+    attente enregistrés en mode « all ». Ensuite, jamais : un job « running » absent de la
+    file peut être un flux en direct d'un autre processus API, et un job abandonné par son
+    worker est repris à l'expiration de son bail."""
+    if not QUEUE.created:
+        return
+    for job_id in JOB_STORE.ids_with_status(("queued", "running", "pending")):
+        data = JOB_STORE.load(job_id, log_since=0)
+        if data is not None:
+            QUEUE.enqueue(job_id, _job_lane(data), data.get("priority", 0))
+
+@app.get("/api/scheduler")
+def scheduler_status():
+    stats = {**SCHEDULER.stats(), "qos": {"backlog_s": round(_local_backlog_s(), 1), "rtf": QOS_RTF.stats()}}
+    if QUEUE is not None:
+        stats["shared_queue"] = QUEUE.stats()
+    return stats
+
+# ========= Profils vitesse / précision (local) =========
+QOS_RTF = qos.RtfEstimator()
+
+def _local_backlog_s() -> float:
+    """Temps de calcul local encore attendu pour les jobs en file ou en cours, par worker.
+
+    En mode réparti, les jobs sont lus dans la file durable (couloir local) et leur état
+    en base : la mémoire de l'API ne voit pas ceux que traitent les workers."""
+    if QUEUE is not None:
+        jobs = [d for d in (JOB_STORE.load(jid, log_since=None) for jid in QUEUE.job_ids("local"))
+                if d is not None]
+    else:
+        with JOBS_LOCK:
+            jobs = [j for j in JOBS.values() if not j.use_api and j.status in ("queued", "running")]
+    work = sum((j.get("audio_s") or 0.0) * (j.get("expected_rtf") or 1.0) * (1.0 - (j.get("progress") or 0.0))
+               for j in jobs)
+    return work / LOCAL_WORKERS
+
+def _expected_mode(audio_s: float) -> str:
+    """Mode d'exécution probable d'un job local (mêmes seuils que ``_local_segments``)."""
+    if PARALLEL_PROCS > 0 and audio_s >= LONG_FILE_MIN_S:
+        return "parallel"
+    return "batched" if BATCH_SIZE > 0 else qos.SEQUENTIAL
+
+def _local_profile(requested: str, profile: str, audio_s: float, deadline_s: float) -> Tuple[Dict[str, Any], str]:
+    """Champs du job (dont le modèle effectif) et ligne de log pour le profil demandé ;
+    en « auto », choix selon la durée de l'audio, le travail en file et l'échéance."""
+    if profile == qos.AUTO:
+        backlog = _local_backlog_s()
+        target = deadline_s if deadline_s > 0 else audio_s * QOS_AUTO_TARGET_RTF
+        chosen, model, rtf = qos.choose(requested, audio_s, backlog, target, QOS_RTF, _expected_mode(audio_s))
+        note = f"Profil auto → {chosen.name} ({audio_s:.0f} s d'audio, {backlog:.0f} s de calcul en file, échéance {target:.0f} s)"
+    else:
+        chosen = qos.PROFILES[profile]
+        model = qos.profile_model(chosen, requested)
+        rtf = QOS_RTF.estimate(model, chosen.beam_size, _expected_mode(audio_s))
+        note = f"Profil {chosen.name}"
+    if model != requested:
+        note += f" · modèle {requested} → {model}"
+    return {
+        "model": model,
+        "profile": chosen.name,
+        "beam_size": chosen.beam_size,
+        "expected_rtf": round(rtf, 3),
+        "audio_s": round(audio_s, 1),
+        "deadline_s": deadline_s or None,
+    }, note + f" · RTF attendu ~{rtf:.2f}"
+
+def _lane_gauge(field: str):
+    def read():
+        lanes = SCHEDULER.stats()["lanes"]
+        return {(name,): (len(q[field]) if isinstance(q[field], list) else q[field]) for name, q in lanes.items()}
+    return read
+
+def _jobs_by_status():
+    counts: Dict[Tuple[str, ...], float] = {}
+    with JOBS_LOCK:
+        for job in JOBS.values():
+            counts[(job["status"],)] = counts.get((job["status"],), 0) + 1
+    return counts
+
+METRICS.gauge("whisper_queue_depth", "Jobs en attente par file", _lane_gauge("queued"), ["lane"])
+METRICS.gauge("whisper_active_workers", "Workers occupés par file", _lane_gauge("running"), ["lane"])
+METRICS.gauge("whisper_workers", "Workers configurés par file", _lane_gauge("workers"), ["lane"])
+METRICS.gauge("whisper_jobs_in_memory", "Jobs chargés en mémoire, par statut", _jobs_by_status, ["status"])
+METRICS.gauge(
+    "whisper_model_pool_bytes", "Mémoire des modèles chargés (used) et plafond (max, 0 = illimité)",
+    lambda: {("used",): MODEL_POOL.used_bytes(), ("max",): MODEL_POOL.max_bytes}, ["kind"],
+)
+METRICS.gauge(
+    "whisper_model_pool_lookups", "Demandes de modèle au pool (hit = déjà chargé)",
+    lambda: {("hit",): MODEL_POOL.hits, ("miss",): MODEL_POOL.misses}, ["result"],
+)
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.post("/api/transcribe")
 async def transcribe_endpoint(
@@ -182,10 +889,17 @@ async def transcribe_endpoint(
     model_label: str = Form(...),
     lang_label: str = Form(...),
     output_type: Optional[str] = Form(None),
+    formats: str = Form(""),
+    word_timestamps: str = Form("0"),
+    priority: int = Form(0),
+    profile: str = Form(""),
+    deadline_s: float = Form(0),
     files: List[UploadFile] = File(...),
 ):
     if not files:
         raise HTTPException(status_code=400, detail="Aucun fichier envoyé")
+    if _queue_full():
+        raise HTTPException(status_code=429, detail="File d'attente pleine, réessayez plus tard")
 
     use_api_bool = (use_api == "1")
 
@@ -193,7 +907,7 @@ async def transcribe_endpoint(
         if model_label not in MODELS_CLOUD:
             raise HTTPException(status_code=400, detail="Modèle API inconnu")
         model_name = model_label
-        if OpenAI is None:
+        if find_spec("openai") is None:   # sans l'importer : fait au premier appel, hors boucle
             raise HTTPException(status_code=400, detail="Le package 'openai' n'est pas installé côté serveur.")
     else:
         if model_label not in MODELS_LOCAL:
@@ -204,13 +918,33 @@ async def transcribe_endpoint(
         raise HTTPException(status_code=400, detail="Langue inconnue")
     lang_code = LANGS[lang_label]
 
-    if use_api_bool:
-        if not output_type:
-            output_type = "resume"
+    if use_api_bool and not output_type:
+        output_type = "resume"
+    if QUEUE is not None and (api_key or "").strip() and (use_api_bool or output_type):
+        # La clé ne quitte pas ce processus (jamais écrite dans la file partagée)
+        raise HTTPException(status_code=400, detail="Mode réparti : clé API par requête non prise en charge, "
+                                                    "définir OPENAI_API_KEY sur les workers")
+    output_type = output_type or None   # local : résumé facultatif (API OpenAI) après transcription
+    if output_type is not None:
         if output_type not in OUTPUT_PROMPTS:
             raise HTTPException(status_code=400, detail="Format de sortie inconnu")
-    else:
-        output_type = None
+        if not use_api_bool:
+            if find_spec("openai") is None:
+                raise HTTPException(status_code=400, detail="Le package 'openai' n'est pas installé côté serveur.")
+            if QUEUE is None and not ((api_key or "").strip() or os.getenv("OPENAI_API_KEY")):
+                raise HTTPException(status_code=400, detail="Résumé demandé sans clé API (champ vide et OPENAI_API_KEY non défini)")
+
+    # Sorties horodatées (mode local) : "srt,vtt,jsonl"
+    formats_list = [f for f in dict.fromkeys(x.strip().lower() for x in formats.split(",")) if f]
+    if any(f not in output_formats.FORMATS for f in formats_list):
+        raise HTTPException(status_code=400, detail="Format horodaté inconnu")
+    if use_api_bool:
+        formats_list = []
+    word_timestamps_bool = word_timestamps == "1" and not use_api_bool
+
+    profile = profile.strip().lower() or QOS_DEFAULT_PROFILE
+    if not use_api_bool and profile != qos.AUTO and profile not in qos.PROFILES:
+        raise HTTPException(status_code=400, detail="Profil inconnu")
 
     job_id = str(uuid.uuid4())
     job_upload_dir = UPLOAD_DIR / job_id
@@ -219,68 +953,304 @@ async def transcribe_endpoint(
     job_trans_dir.mkdir(parents=True, exist_ok=True)
 
     files_meta = []
+    received = 0
+    audio_s = 0.0
+    t_upload = time.perf_counter()
+    stems: Set[str] = set()
     for f in files:
-        dest = job_upload_dir / f.filename
-        with dest.open("wb") as out:
-            out.write(await f.read())
+        name = _unique_name(Path(f.filename or "audio").name, stems)
+        dest = job_upload_dir / name
+        budget = (MAX_UPLOAD_BYTES - received) if MAX_UPLOAD_BYTES else None
+        try:
+            size, digest = await _stream_upload(f, dest, budget)
+        except UploadTooLarge:
+            shutil.rmtree(job_upload_dir, ignore_errors=True)
+            shutil.rmtree(job_trans_dir, ignore_errors=True)
+            raise HTTPException(status_code=413, detail=f"Envoi trop volumineux (max {_fmt_size(MAX_UPLOAD_BYTES)})")
+        received += size
+        if not use_api_bool:
+            audio_s += await asyncio.to_thread(_probe_duration, str(dest)) or size / 16000   # ~128 kb/s
         files_meta.append({
-            "name": f.filename,
+            "name": name,
             "path": str(dest),
+            "size": size,
+            "sha256": digest,
             "status": "queued",
             "progress": 0.0,
             "out_path": None,
             "error": None,
+            "rev": 0,
         })
 
-    job: Dict[str, Any] = {
-        "status": "pending",
+    qos_fields, qos_note = ({}, None) if use_api_bool else _local_profile(model_name, profile, audio_s, deadline_s)
+    job = _new_job_state(job_id, {
+        "status": "queued",
         "created_at": datetime.utcnow().isoformat(),
         "use_api": use_api_bool,
         "model": model_name,
         "lang": lang_code,
         "output_type": output_type,
+        "formats": formats_list,
+        "word_timestamps": word_timestamps_bool,
+        "priority": priority,
         "progress": 0.0,
-        "logs": [f"Job {job_id} créé avec {len(files_meta)} fichier(s)."],
+        "rev": 0,
+        "logs": [f"Job {job_id} créé avec {len(files_meta)} fichier(s)."] + ([qos_note] if qos_note else []),
         "files": files_meta,
-    }
+        "timings": {},
+        **qos_fields,   # modèle effectif, profil, faisceau, RTF attendu
+    })
     with JOBS_LOCK:
         JOBS[job_id] = job
+    _record_stage(job_id, "upload", time.perf_counter() - t_upload)
 
-    threading.Thread(target=run_job, args=(job_id, api_key), daemon=True).start()
-    return {"job_id": job_id}
+    if QUEUE is not None:
+        _flush_job(job_id)   # en base avant d'être visible des workers
+    try:
+        position = _submit_job(job_id, api_key, "cloud" if use_api_bool else "local", priority)
+    except QueueFull:
+        with JOBS_LOCK:
+            JOBS.pop(job_id, None)
+        shutil.rmtree(job_upload_dir, ignore_errors=True)
+        shutil.rmtree(job_trans_dir, ignore_errors=True)
+        raise HTTPException(status_code=429, detail="File d'attente pleine, réessayez plus tard")
+    _flush_job(job_id)
+    if QUEUE is not None:
+        with _FLUSH_LOCK, JOBS_LOCK:   # suivi relu depuis la base, tenue à jour par le worker
+            JOBS.pop(job_id, None)
+    return {"job_id": job_id, "queue_position": position}
+
+class UploadTooLarge(Exception):
+    pass
+
+def _unique_name(name: str, stems: Set[str]) -> str:
+    """Nom de fichier dont le radical n'est pas encore pris dans le job : les sorties
+    (<radical>_transcription.txt…) de « reunion.mp3 » et « reunion.wav » ne se chevauchent pas."""
+    path = Path(name)
+    stem, n = path.stem, 2
+    while stem.lower() in stems:
+        stem = f"{path.stem}_{n}"
+        n += 1
+    stems.add(stem.lower())
+    return stem + path.suffix
+
+async def _stream_upload(f: UploadFile, dest: Path, budget: Optional[int]) -> Tuple[int, str]:
+    """Copie l'upload par blocs de UPLOAD_CHUNK_SIZE en calculant le SHA-256 au passage."""
+    h = hashlib.sha256()
+    size = 0
+    with dest.open("wb") as out:
+        while True:
+            chunk = await f.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if budget is not None and size > budget:
+                raise UploadTooLarge()
+            h.update(chunk)
+            out.write(chunk)
+    return size, h.hexdigest()
+
+class _UploadSizeLimit:
+    """Limite le corps de /api/transcribe pendant sa réception.
+
+    Starlette met tout le multipart en fichier temporaire avant l'endpoint : le contrôle se
+    fait donc ici, sur les octets reçus du client (Content-Length annoncé ou envoi chunked),
+    et non après coup. ``_stream_upload`` applique ensuite la limite exacte par fichier.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not MAX_UPLOAD_BYTES or scope["type"] != "http" or scope["path"] != "/api/transcribe":
+            return await self.app(scope, receive, send)
+        limit = MAX_UPLOAD_BYTES + UPLOAD_CHUNK_SIZE   # marge pour l'enveloppe multipart
+        detail = f"Envoi trop volumineux (max {_fmt_size(MAX_UPLOAD_BYTES)})"
+        try:
+            length = int(dict(scope["headers"]).get(b"content-length") or 0)
+        except ValueError:
+            length = 0
+        if length > limit:   # refus anticipé, avant de lire le corps
+            return await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:   # remonte par l'analyse du formulaire : réponse 413
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+app.add_middleware(_UploadSizeLimit)
+
+def _job_snapshot(job_id: str, since: Optional[int] = None, rev: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """État d'un job pour /api/status et /api/events, sans bloquer les workers.
+
+    Sans ``since`` : état complet. Avec ``since`` : seulement les lignes de log à partir de
+    cet offset et, si ``rev`` est donné, les fichiers modifiés depuis cette révision
+    (chacun porte son ``index``). Un job absent de la mémoire est relu depuis la base.
+    """
+    job = JOBS.get(job_id)
+    if job is not None:
+        snap = job.snapshot()   # partagé entre lecteurs : on ne le modifie pas
+        data = {k: v for k, v in snap.items() if k != "files"}
+        files = snap["files"]
+        data["logs"], data["log_offset"] = job.logs_since(since or 0)
+    else:
+        data = _load_job(job_id, since or 0)
+        if data is None:
+            return None
+        files = data["files"]
+
+    if since is None:
+        data["files"] = files
+    else:
+        data["files"] = [
+            {**f, "index": i}
+            for i, f in enumerate(files)
+            if rev is None or f.get("rev", 0) > rev
+        ]
+    data["queue_position"] = _queue_position(job_id)
+    return data
 
 @app.get("/api/status/{job_id}")
-def job_status(job_id: str):
-    with JOBS_LOCK:
-        job = JOBS.get(job_id)
-        if not job:
-            raise HTTPException(status_code=404, detail="Job introuvable")
-        return JSONResponse(job)
+def job_status(job_id: str, since: Optional[int] = None, rev: Optional[int] = None):
+    data = _job_snapshot(job_id, since, rev)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Job introuvable")
+    return JSONResponse(data)
+
+# ========= Progression poussée (Server-Sent Events) =========
+class _JobEvents:
+    """Réveille les flux SSE abonnés à un job depuis les threads workers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subs: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+
+    def subscribe(self, job_id: str) -> asyncio.Event:
+        ev = asyncio.Event()
+        with self._lock:
+            self._subs.setdefault(job_id, []).append((asyncio.get_running_loop(), ev))
+        return ev
+
+    def unsubscribe(self, job_id: str, ev: asyncio.Event):
+        with self._lock:
+            subs = [s for s in self._subs.get(job_id, []) if s[1] is not ev]
+            if subs:
+                self._subs[job_id] = subs
+            else:
+                self._subs.pop(job_id, None)
+
+    def notify(self, job_id: str):
+        with self._lock:
+            subs = list(self._subs.get(job_id, ()))
+        for loop, ev in subs:
+            try:
+                loop.call_soon_threadsafe(ev.set)
+            except RuntimeError:   # boucle fermée
+                pass
+
+JOB_EVENTS = _JobEvents()
+SSE_MIN_INTERVAL = 0.25      # regroupe les mises à jour rapprochées (s)
+SSE_KEEPALIVE = 15.0
+
+@app.get("/api/events/{job_id}")
+async def job_events(job_id: str, since: int = 0):
+    if _job_snapshot(job_id, since, None) is None:
+        raise HTTPException(status_code=404, detail="Job introuvable")
+
+    async def stream():
+        ev = JOB_EVENTS.subscribe(job_id)
+        offset, rev = since, None
+        last, idle = None, 0.0
+        try:
+            while True:
+                ev.clear()
+                data = _job_snapshot(job_id, offset, rev)
+                if data is None:
+                    break
+                # Job traité ailleurs (mode réparti) : la base est relue à intervalle régulier,
+                # on n'envoie que ce qui a changé
+                state = (data["status"], data["progress"], data["rev"], data["log_offset"], data["queue_position"])
+                if state != last:
+                    yield f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+                    last, idle = state, 0.0
+                offset, rev = data["log_offset"], data["rev"]
+                if data["status"] in FINISHED:
+                    break
+                wait = SSE_KEEPALIVE if QUEUE is None or job_id in JOBS else STORE_POLL_S
+                try:
+                    await asyncio.wait_for(ev.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    idle += wait
+                    if idle >= SSE_KEEPALIVE:
+                        yield ": keepalive\n\n"
+                        idle = 0.0
+                await asyncio.sleep(SSE_MIN_INTERVAL)
+        finally:
+            JOB_EVENTS.unsubscribe(job_id, ev)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+# Archives / fusions mises en cache par version des sorties dans TEMP_DIR/<job_id>/downloads
+def _download_format(fmt: str) -> str:
+    fmt = fmt.lower()
+    if fmt not in output_formats.MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Format inconnu")
+    return fmt
+
+def _zip_response(request: Request, job_id: str, files: List[Path], root: Path, name: str) -> Response:
+    sig = downloads.outputs_signature(files)
+    zip_path = downloads.cached_artifact(
+        TEMP_DIR / job_id / "downloads", f"{name}.zip", sig, downloads.build_zip(files, root),
+    )
+    return downloads.file_response(request, zip_path, "application/zip", f"{name}_{job_id}.zip", etag=sig)
 
 @app.get("/api/download/{job_id}")
-def download_zip(job_id: str):
+def download_zip(job_id: str, request: Request, fmt: Optional[str] = Query(None, alias="format")):
     job_trans_dir = TRANS_DIR / job_id
     if not job_trans_dir.exists():
         raise HTTPException(status_code=404, detail="Transcriptions introuvables")
-    zip_path = TEMP_DIR / f"transcriptions_{job_id}.zip"
-    if zip_path.exists():
-        zip_path.unlink()
-    shutil.make_archive(str(zip_path.with_suffix("")), "zip", root_dir=job_trans_dir)
-    return FileResponse(
-        path=str(zip_path),
-        filename=zip_path.name,
-        media_type="application/zip",
-        headers={"Cache-Control": "no-store"},
-    )
+    files = [p for p in job_trans_dir.rglob("*") if p.is_file()]
+    name = "transcriptions"
+    if fmt:
+        fmt = _download_format(fmt)
+        files = [p for p in files if p.suffix == f".{fmt}"]
+        name = f"transcriptions_{fmt}"
+        if not files:
+            raise HTTPException(status_code=404, detail=f"Aucun .{fmt} trouvé")
+    return _zip_response(request, job_id, files, job_trans_dir, name)
 
 @app.get("/api/download-txt/{job_id}")
-def download_txt(job_id: str, kind: str = "transcription", merge: bool = True):
+def download_txt(job_id: str, request: Request, kind: str = "transcription", merge: bool = True,
+                 fmt: str = Query("txt", alias="format")):
     job_trans_dir = TRANS_DIR / job_id
     if not job_trans_dir.exists():
         raise HTTPException(status_code=404, detail="Transcriptions introuvables")
 
+    fmt = _download_format(fmt)
+    if fmt != "txt" and kind == "transcription":
+        # Sous-titres / JSON lines : un fichier seul tel quel, plusieurs en ZIP (pas de fusion)
+        files = sorted(job_trans_dir.glob(f"*_transcription.{fmt}"))
+        if not files:
+            raise HTTPException(status_code=404, detail=f"Aucun .{fmt} trouvé")
+        if len(files) > 1:
+            return _zip_response(request, job_id, files, job_trans_dir, f"transcriptions_{fmt}")
+        return downloads.file_response(request, files[0], output_formats.MEDIA_TYPES[fmt], files[0].name)
+
     with JOBS_LOCK:
         job = JOBS.get(job_id)
+    if job is None:
+        job = _load_job(job_id, log_since=None)
     output_type = job.get("output_type") if job else None
 
     if kind == "summary":
@@ -299,31 +1269,103 @@ def download_txt(job_id: str, kind: str = "transcription", merge: bool = True):
         raise HTTPException(status_code=404, detail="Aucun .txt trouvé")
 
     name_root = output_type if kind == "summary" and output_type else "transcriptions"
-    out_txt = TEMP_DIR / f"{name_root}_{job_id}.txt"
+    sig = downloads.outputs_signature(txt_files)
 
     if merge or len(txt_files) > 1:
-        with out_txt.open("w", encoding="utf-8", newline="\n") as out:
-            for i, p in enumerate(txt_files, 1):
-                out.write(f"===== {p.name} =====\n")
-                content = p.read_text(encoding="utf-8")
-                out.write(content)
-                if not content.endswith("\n"):
-                    out.write("\n")
-                if i < len(txt_files):
-                    out.write("\n")
+        filename = f"{name_root}_{job_id}.txt"
+        out_txt = downloads.cached_artifact(
+            TEMP_DIR / job_id / "downloads", f"{name_root}.txt", sig,
+            downloads.build_merged_txt(txt_files),
+        )
     else:
         out_txt = txt_files[0]
-
-    headers = {
-        "Cache-Control": "no-store",
-        "Content-Disposition": f'attachment; filename="{out_txt.name}"',
-    }
-    return FileResponse(
-        path=str(out_txt),
-        media_type="text/plain; charset=utf-8",
-        headers=headers,
-        filename=out_txt.name,
-    )
+        filename = out_txt.name
+
+    return downloads.file_response(request, out_txt, "text/plain; charset=utf-8", filename, etag=sig)
+
+# ========= Annulation =========
+@app.delete("/api/jobs/{job_id}")
+def cancel_job(job_id: str, purge: bool = Query(False)):
+    """Annule un job en file ou en cours (arrêt au prochain segment / appel API).
+
+    Un job déjà terminé n'est supprimé (fichiers et historique) qu'avec ``?purge=1`` ;
+    sinon 409 : un clic sur « Arrêter » juste après la fin ne détruit pas les résultats.
+    """
+    job = JOBS.get(job_id)
+    if job is None and QUEUE is not None:
+        return _cancel_shared(job_id, purge=purge)
+    if job is None or job.status in FINISHED:
+        if job is None and _load_job(job_id, log_since=None) is None:
+            raise HTTPException(status_code=404, detail="Job introuvable")
+        if not purge:
+            raise HTTPException(status_code=409, detail="Job déjà terminé (?purge=1 pour le supprimer)")
+        with _FLUSH_LOCK:
+            with JOBS_LOCK:
+                JOBS.pop(job_id, None)
+            _FINISHED_AT.pop(job_id, None)
+        _purge_job_files(job_id)
+        return {"job_id": job_id, "status": "deleted"}
+    job.cancel.set()
+    if SCHEDULER.cancel(job_id):   # encore en file : rien à interrompre
+        _mark_cancelled(job_id)
+        return {"job_id": job_id, "status": "cancelled"}
+    append_log(job_id, "⛔ Annulation demandée…")
+    return {"job_id": job_id, "status": "cancelling"}
+
+@app.delete("/api/jobs/{job_id}/files/{index}")
+def cancel_file(job_id: str, index: int):
+    """Annule un seul fichier ; les autres fichiers du job continuent."""
+    job = JOBS.get(job_id)
+    if job is None and QUEUE is not None:
+        return _cancel_shared(job_id, index)
+    if job is None or job.status in FINISHED:
+        raise HTTPException(status_code=404, detail="Job introuvable ou terminé")
+    if not 0 <= index < len(job.files):
+        raise HTTPException(status_code=404, detail="Fichier introuvable")
+    status = job.files[index].status
+    if status in FINISHED:
+        raise HTTPException(status_code=409, detail=f"Fichier déjà terminé ({status})")
+    with job.lock:
+        job.cancelled_files.add(index)
+    if status == "queued":
+        update_file_status(job_id, index, "cancelled")
+        return {"job_id": job_id, "index": index, "status": "cancelled"}
+    return {"job_id": job_id, "index": index, "status": "cancelling"}
+
+def _cancel_shared(job_id: str, index: Optional[int] = None, purge: bool = False) -> Dict[str, Any]:
+    """Mode réparti : le job n'est pas dans ce processus. Encore en file, il en est retiré ;
+    réclamé par un worker, la demande passe par la file durable et il l'applique au
+    prochain renouvellement de son bail."""
+    data = _load_job(job_id, log_since=None)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Job introuvable")
+    files = data["files"]
+    if index is not None:
+        if data["status"] in FINISHED:
+            raise HTTPException(status_code=404, detail="Job introuvable ou terminé")
+        if not 0 <= index < len(files):
+            raise HTTPException(status_code=404, detail="Fichier introuvable")
+        if files[index].get("status") in FINISHED:
+            raise HTTPException(status_code=409, detail=f"Fichier déjà terminé ({files[index]['status']})")
+        QUEUE.request_cancel(job_id, index)
+        return {"job_id": job_id, "index": index, "status": "cancelling"}
+    if data["status"] in FINISHED:
+        if not purge:
+            raise HTTPException(status_code=409, detail="Job déjà terminé (?purge=1 pour le supprimer)")
+        _purge_job_files(job_id)
+        return {"job_id": job_id, "status": "deleted"}
+    if not QUEUE.remove_if_waiting(job_id):
+        QUEUE.request_cancel(job_id)
+        return {"job_id": job_id, "status": "cancelling"}
+    for f in files:
+        if f.get("status") not in FINISHED:
+            data["rev"] = data.get("rev", 0) + 1   # comme _touch_file
+            f["status"], f["rev"] = "cancelled", data["rev"]
+    data["status"] = "cancelled"
+    offset = data.pop("log_offset")
+    data.pop("logs", None)
+    JOB_STORE.save(job_id, data, ["⛔ Job annulé."], offset)
+    return {"job_id": job_id, "status": "cancelled"}
 
 # ========= Worker principal =========
 def run_job(job_id: str, api_key: Optional[str]):
@@ -333,205 +1375,698 @@ def run_job(job_id: str, api_key: Optional[str]):
         return
 
     try:
+        job.check_cancel()   # annulé entre la sortie de file et le démarrage
+        if "queue" not in job.timings:   # job préempté puis repris : attente déjà comptée
+            waited = (datetime.utcnow() - datetime.fromisoformat(job["created_at"])).total_seconds()
+            _record_stage(job_id, "queue", max(0.0, waited))
         set_job_status(job_id, "running")
         if job["use_api"]:
             append_log(job_id, f"Mode API OpenAI · modèle: {job['model']} · langue: {job['lang']}")
             client = _make_openai_client(api_key)
             _run_cloud(job_id, client)
-        else:
-            append_log(job_id, f"Mode local (CPU int8) · modèle: {job['model']} · langue: {job['lang']}")
+        elif not _transcribed(job):
+            append_log(job_id, f"Mode local (CPU {LOCAL_COMPUTE_TYPE}) · modèle: {job['model']} · langue: {job['lang']}"
+                               + (f" · profil: {job['profile']} (RTF attendu ~{job['expected_rtf']:.2f})" if job.get("profile") else ""))
             _run_local(job_id)
+            if job.get("output_type"):
+                _defer_summaries(job_id, api_key)   # le cœur CPU est libéré pendant les appels API
+                return
+        elif job.get("output_type"):
+            _summarize_local(job_id, api_key)
 
         set_job_progress(job_id, 1.0)
         set_job_status(job_id, "done")
         append_log(job_id, "Tous les fichiers ont été traités. Vous pouvez télécharger les résultats.")
+    except Preempted:
+        _requeue_preempted(job_id, api_key)
+    except Cancelled:
+        _mark_cancelled(job_id)
     except Exception as e:
         set_job_status(job_id, "error")
         append_log(job_id, f"[ERREUR JOB] {e}")
 
+def _transcribed(job: JobState) -> bool:
+    """Job local dont tous les fichiers sont terminés : il ne reste que les résumés."""
+    return not job["use_api"] and all(f["status"] in FINISHED for f in job["files"])
+
+def _job_lane(data: Dict[str, Any]) -> str:
+    use_api = data.get("use_api")
+    if use_api or (data.get("output_type") and all(f.get("status") in FINISHED for f in data["files"])):
+        return "cloud"
+    return "local"
+
+def _defer_summaries(job_id: str, api_key: Optional[str]):
+    """Remet un job local transcrit en file sur le couloir cloud pour ses résumés (attente
+    réseau) ; le job reste « running » jusque-là."""
+    job = JOBS[job_id]
+    append_log(job_id, "Transcriptions terminées : résumés en file (API).")
+    if QUEUE is None:
+        SCHEDULER.submit(job_id, lambda: run_job(job_id, api_key), lane="cloud",
+                         priority=job.priority, requeue=True)
+        return
+    _flush_job(job_id)   # état à jour en base avant qu'un autre worker le réclame
+    if QUEUE.hand_off(job_id, WORKER_ID, "cloud"):
+        _LOST_LEASES.add(job_id)   # plus à ce worker : ni écriture, ni retrait de la file
+    else:
+        raise Preempted()   # bail perdu entre-temps : le nouveau propriétaire s'en charge
+
+def _mark_cancelled(job_id: str):
+    def _upd(j):
+        for idx, f in enumerate(j.files):
+            if f.status not in FINISHED:
+                _touch_file(j, idx).status = "cancelled"
+    with_job(job_id, _upd)
+    append_log(job_id, "⛔ Job annulé.")
+    set_job_status(job_id, "cancelled")
+
+def _requeue_preempted(job_id: str, api_key: Optional[str]):
+    """Remet en file un job préempté ; ses fichiers reprendront au dernier segment journalisé."""
+    if QUEUE is not None:
+        return   # worker dont le bail a été perdu : le job appartient désormais à un autre
+    job = JOBS[job_id]
+    job.preempt.clear()
+    def _upd(j):
+        for idx, f in enumerate(j.files):
+            if f.status == "running":
+                _touch_file(j, idx).status = "queued"
+    with_job(job_id, _upd)
+    set_job_status(job_id, "queued")
+    append_log(job_id, "⏸ Job préempté par un job prioritaire : remis en file, reprise là où il s'est arrêté.")
+    SCHEDULER.submit(job_id, lambda: run_job(job_id, api_key), lane="local",
+                     priority=job.priority, requeue=True)
+
 # ========= OpenAI (cloud) =========
+CLOUD_LIMITER = RateLimiter(rpm=CLOUD_RPM, tpm=CLOUD_TPM)
+
 def _make_openai_client(api_key: Optional[str]):
-    if OpenAI is None:
-        raise RuntimeError("Le package 'openai' n'est pas installé côté serveur.")
+    try:
+        from openai import OpenAI  # lib openai >= 1.x
+    except ImportError:
+        raise RuntimeError("Le package 'openai' n'est pas installé côté serveur.") from None
     key = (api_key or os.getenv("OPENAI_API_KEY") or "").strip()
     if not key:
         raise RuntimeError("Aucune clé API fournie (champ vide et OPENAI_API_KEY non défini).")
-    return OpenAI(api_key=key)
+    # Reprises gérées par call_with_retries ; OPENAI_BASE_URL permet de viser un serveur de test local
+    return OpenAI(
+        api_key=key,
+        base_url=os.getenv("OPENAI_BASE_URL") or None,
+        http_client=shared_http_client(max_connections=CLOUD_WORKERS * CLOUD_FILE_CONCURRENCY * 2),
+        max_retries=0,
+    )
+
+def _cloud_call(job_id: str, what: str, fn, tokens: int = 0, op: str = "transcription",
+                index: Optional[int] = None):
+    """Appel à l'API avec reprises ; abandonné dès que le job (ou le fichier ``index``) est annulé."""
+    job = JOBS.get(job_id)
+    check = (lambda: job.check_cancel(index)) if job is not None else None
+
+    def on_retry(e, attempt, delay):
+        append_log(job_id, f"[RETRY] {what} : {e} → essai {attempt + 1}/{CLOUD_MAX_RETRIES + 1} dans {delay:.1f} s")
+
+    def timed():
+        t0 = time.perf_counter()
+        try:
+            return fn()
+        except Exception as e:
+            CLOUD_ERRORS.inc(op=op, code=str(status_code(e) or type(e).__name__))
+            raise
+        finally:
+            CLOUD_LATENCY.observe(time.perf_counter() - t0, op=op)
+
+    return call_with_retries(
+        timed, retries=CLOUD_MAX_RETRIES, limiter=CLOUD_LIMITER, tokens=tokens, on_retry=on_retry,
+        check=check,
+    )
+
+def _cloud_transcribe(job_id: str, client: "OpenAI", path: str, name: str, model_name: str, lang: str,
+                      index: Optional[int] = None) -> str:
+    def call():
+        with open(path, "rb") as fh:
+            return client.audio.transcriptions.create(model=model_name, file=fh, language=lang)
+    resp = _cloud_call(job_id, f"transcription {name}", call, index=index)
+    return (getattr(resp, "text", "") or "").strip()
+
+def _cloud_transcribe_pieces(job_id: str, client: "OpenAI", idx: int, fmeta: Dict[str, Any],
+                             model_name: str, lang: str, pieces_pool: ThreadPoolExecutor,
+                             progress_share: float) -> str:
+    """Transcrit un fichier trop gros pour l'API morceau par morceau (chacun avec ses reprises)."""
+    work_dir = TEMP_DIR / job_id / f"pieces_{idx}"
+    try:
+        audio = _decoded_audio(job_id, fmeta)
+        with _stage(job_id, "split"):
+            pieces = audio_split.split_for_upload(
+                fmeta["path"], work_dir, CLOUD_MAX_UPLOAD_BYTES,
+                bitrate=CLOUD_PIECE_BITRATE, max_piece_s=CLOUD_PIECE_MAX_S, audio=audio,
+            )
+        append_log(job_id, f"Fichier volumineux : {fmeta['name']} découpé en {len(pieces)} morceau(x)")
+        done = [0]
+        done_lock = threading.Lock()
+
+        def one(n: int, piece: Path) -> str:
+            text = _cloud_transcribe(job_id, client, str(piece), f"{fmeta['name']} [{n}/{len(pieces)}]",
+                                     model_name, lang, index=idx)
+            with done_lock:
+                done[0] += 1
+                set_file_progress(job_id, idx, progress_share * done[0] / len(pieces))
+            return text
+
+        futures = [pieces_pool.submit(one, n, p) for n, (p, _a, _b) in enumerate(pieces, 1)]
+        texts = [f.result() for f in futures]
+        return "\n".join(t for t in texts if t).strip()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def _cloud_summarize(job_id: str, client: "OpenAI", prompt: str, name: str, index: Optional[int] = None) -> str:
+    resp = _cloud_call(
+        job_id, f"résumé {name}",
+        lambda: client.responses.create(model=SUMMARY_MODEL, input=prompt),
+        tokens=len(prompt) // 3,   # estimation grossière pour le limiteur tokens/min
+        op="summary", index=index,
+    )
+    return (getattr(resp, "output_text", "") or "").strip()
+
+def _summarize_transcript(job_id: str, client: "OpenAI", text: str, output_type: str, name: str,
+                          index: Optional[int] = None) -> str:
+    """Résumé au format ``output_type`` : un appel si le texte tient en un morceau, sinon
+    map-reduce (summarize.py). Résultat final et notes par morceau sont en cache, adressés
+    par le contenu : un autre format sur la même transcription ne refait que la synthèse."""
+    text_sha = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    final_key = ResultCache.make_key(kind="summary", model=SUMMARY_MODEL, text=text_sha,
+                                     output_type=output_type, chunk_chars=SUMMARY_CHUNK_CHARS)
+    cached = _cached_text(final_key, "summary")
+    if cached is not None:
+        append_log(job_id, f"♻ Résumé '{output_type}' en cache : {name}")
+        return cached.strip()
+
+    def chunk_key(key: str) -> str:
+        return ResultCache.make_key(kind="summary_chunk", model=SUMMARY_MODEL, chunk=key)
+
+    def cache_put(key: str, notes: str):
+        try:
+            RESULT_CACHE.put(chunk_key(key), {"notes": notes}, meta={"name": name})
+        except Exception as e:
+            logging.warning("Mise en cache des notes échouée pour %s : %s", name, e)
+
+    def on_progress(done: int, total: int):
+        if done == 1 or done == total or done % 5 == 0:
+            append_log(job_id, f"Résumé de {name} : partie {done}/{total}")
+
+    summary = summarize.summarize(
+        text, OUTPUT_PROMPTS[output_type],
+        lambda prompt, label: _cloud_summarize(job_id, client, prompt, f"{name} ({label})", index=index),
+        max_chars=SUMMARY_CHUNK_CHARS, concurrency=SUMMARY_CONCURRENCY,
+        cache_get=lambda key: _cached_text(chunk_key(key), "notes"), cache_put=cache_put,
+        on_progress=on_progress,
+    )
+    if summary:
+        try:
+            RESULT_CACHE.put(final_key, {"summary": summary}, meta={"name": name})
+        except Exception as e:
+            logging.warning("Mise en cache du résumé échouée pour %s : %s", name, e)
+    return summary
 
 def _run_cloud(job_id: str, client: "OpenAI"):
+    """Fichiers traités en parallèle (CLOUD_FILE_CONCURRENCY) sur deux étages :
+    la transcription du fichier N+1 avance pendant le résumé du fichier N."""
     with JOBS_LOCK:
         job = JOBS[job_id]
     total = len(job["files"])
     model_name = job["model"]
     lang = job["lang"]
     output_type = job.get("output_type", "resume")
-
-    for idx, fmeta in enumerate(job["files"]):
+    prompt_tmpl = OUTPUT_PROMPTS.get(output_type)
+    out_dir = TRANS_DIR / job_id
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    outputs = {"transcription": "transcription.txt"}
+    if output_type in OUTPUT_PROMPTS:
+        outputs["summary"] = f"{output_type}.txt"
+
+    finished = [0]
+    finished_lock = threading.Lock()
+
+    def file_finished():
+        with finished_lock:
+            finished[0] += 1
+            n = finished[0]
+        set_job_progress(job_id, n / max(total, 1))
+
+    def file_failed(idx: int, fmeta: Dict[str, Any], e: Exception):
+        update_file_status(job_id, idx, "error", error=str(e))
+        append_log(job_id, f"[ERREUR API] {fmeta['name']} : {e}")
+        file_finished()
+
+    def file_cancelled(idx: int, fmeta: Dict[str, Any]):
+        update_file_status(job_id, idx, "cancelled")
+        append_log(job_id, f"⛔ Annulé : {fmeta['name']}")
+        file_finished()
+
+    def file_done(idx: int, fmeta: Dict[str, Any], out_file: Path):
+        set_file_output(job_id, idx, str(out_file))
+        set_file_progress(job_id, idx, 1.0)
+        update_file_status(job_id, idx, "done")
+        append_log(job_id, f"✓ Terminé (API) : {fmeta['name']} → {out_file.name}")
+        file_finished()
+
+    def summary_stage(idx: int, fmeta: Dict[str, Any], cache_key: Optional[str], text: str,
+                      trans_text: str, trans_file: Path):
+        try:
+            append_log(job_id, f"→ GPT-4 pour '{output_type}' : {fmeta['name']}")
+            with _stage(job_id, "summary"):
+                processed = _summarize_transcript(job_id, client, text, output_type, fmeta["name"], index=idx)
+            out_file = trans_file
+            if processed:
+                out_file = out_dir / f"{pathlib.Path(fmeta['name']).stem}_{output_type}.txt"
+                summary_text = processed + ("\n" if not processed.endswith("\n") else "")
+                _write_output(job_id, out_file, summary_text)
+                _store_in_cache(cache_key, {"transcription": trans_text, "summary": summary_text}, fmeta)
+            file_done(idx, fmeta, out_file)
+        except FileCancelled:
+            file_cancelled(idx, fmeta)
+        except Cancelled:
+            raise
+        except Exception as e:
+            file_failed(idx, fmeta, e)
+
+    def transcription_stage(idx: int):
+        fmeta = job["files"][idx]
+        if fmeta.get("status") in ("done", "cancelled"):   # déjà traité (avant un redémarrage) ou annulé
+            file_finished()
+            return None
+        cache_key = _cloud_cache_key(job, fmeta)
+        if _serve_from_cache(job_id, idx, fmeta, cache_key, outputs):
+            file_finished()
+            return None
         update_file_status(job_id, idx, "running")
+        transcript_key = _cloud_transcript_key(job, fmeta)
+        trans_file = out_dir / f"{pathlib.Path(fmeta['name']).stem}_transcription.txt"
+        cached_text = _cached_text(transcript_key, "transcription") if transcript_key else None
+        if cached_text is not None and prompt_tmpl and cached_text.strip():
+            # Même audio déjà transcrit pour un autre format : seul le résumé reste à faire
+            append_log(job_id, f"♻ Transcription en cache : {fmeta['name']}")
+            _write_output(job_id, trans_file, cached_text)
+            set_file_progress(job_id, idx, 0.5)
+            return summaries.submit(summary_stage, idx, fmeta, cache_key, cached_text.strip(), cached_text, trans_file)
         append_log(job_id, f"→ Envoi à OpenAI : {fmeta['name']}")
         try:
-            with open(fmeta["path"], "rb") as fh:
-                resp = client.audio.transcriptions.create(
-                    model=model_name,
-                    file=fh,
-                    language=lang,
+            job.check_cancel(idx)
+            t0 = time.perf_counter()
+            if os.path.getsize(fmeta["path"]) > CLOUD_MAX_UPLOAD_BYTES:
+                text = _cloud_transcribe_pieces(
+                    job_id, client, idx, fmeta, model_name, lang, pieces,
+                    progress_share=0.5 if prompt_tmpl else 1.0,
                 )
-            text = (getattr(resp, "text", "") or "").strip()
-
-            processed = text
-            prompt_tmpl = OUTPUT_PROMPTS.get(output_type)
+            else:
+                text = _cloud_transcribe(job_id, client, fmeta["path"], fmeta["name"], model_name, lang, index=idx)
+            elapsed = time.perf_counter() - t0
+            _record_stage(job_id, "transcribe", elapsed)
+            duration = _probe_duration(fmeta["path"])
+            if duration:
+                RTF.observe(elapsed / duration, mode="cloud", model=model_name)
+            trans_text = text + ("\n" if text and not text.endswith("\n") else "")
+            _write_output(job_id, trans_file, trans_text)
+            if text:
+                _store_in_cache(transcript_key, {"transcription": trans_text}, fmeta)
             if prompt_tmpl and text:
-                append_log(job_id, f"→ GPT-4 pour '{output_type}'")
-                prompt = prompt_tmpl.format(texte=text)
-                resp2 = client.responses.create(model="gpt-4o", input=prompt)
-                processed = (getattr(resp2, "output_text", "") or "").strip()
-
-            out_dir = TRANS_DIR / job_id
-            out_dir.mkdir(parents=True, exist_ok=True)
-            stem = pathlib.Path(fmeta["name"]).stem
-            trans_file = out_dir / f"{stem}_transcription.txt"
-            trans_file.write_text(
-                text + ("\n" if text and not text.endswith("\n") else ""),
-                encoding="utf-8",
-            )
-
-            out_file = trans_file
-            if output_type and processed:
-                out_file = out_dir / f"{stem}_{output_type}.txt"
-                out_file.write_text(
-                    processed + ("\n" if processed and not processed.endswith("\n") else ""),
-                    encoding="utf-8",
-                )
-
-            set_file_output(job_id, idx, str(out_file))
-            set_file_progress(job_id, idx, 1.0)                    # <— ajout
-            set_job_progress(job_id, (idx + 1) / max(total, 1))    # <— ajout
-            update_file_status(job_id, idx, "done")
-            append_log(job_id, f"✓ Terminé (API) : {fmeta['name']} → {out_file.name}")
-
+                set_file_progress(job_id, idx, 0.5)
+                return summaries.submit(summary_stage, idx, fmeta, cache_key, text, trans_text, trans_file)
+            file_done(idx, fmeta, trans_file)
+        except FileCancelled:
+            file_cancelled(idx, fmeta)
+        except Cancelled:
+            raise
         except Exception as e:
-            update_file_status(job_id, idx, "error", error=str(e))
-            append_log(job_id, f"[ERREUR API] {fmeta['name']} : {e}")
-
-        set_job_progress(job_id, (idx + 1) / max(total, 1))
+            file_failed(idx, fmeta, e)
+        return None
+
+    with ThreadPoolExecutor(CLOUD_FILE_CONCURRENCY, thread_name_prefix="cloud-tr") as transcriptions, \
+         ThreadPoolExecutor(CLOUD_FILE_CONCURRENCY, thread_name_prefix="cloud-sum") as summaries, \
+         ThreadPoolExecutor(CLOUD_FILE_CONCURRENCY, thread_name_prefix="cloud-piece") as pieces:
+        stage1 = [transcriptions.submit(transcription_stage, idx) for idx in range(total)]
+        stage2 = [f.result() for f in stage1]
+        for f in stage2:
+            if f is not None:
+                f.result()
 
 # ========= Local (avec suivi de téléchargement) =========
 def _run_local(job_id: str):
     with JOBS_LOCK:
         job = JOBS[job_id]
 
+    total = len(job["files"])
+
+    # 0) Résultats déjà connus (même audio, mêmes réglages) : pas besoin du modèle
+    # Formats horodatés d'abord : le .txt, en dernier, reste la sortie affichée
+    outputs = {fmt: f"transcription.{fmt}" for fmt in job.get("formats") or []}
+    outputs["transcription"] = "transcription.txt"
+    pending = []
+    for idx, fmeta in enumerate(job["files"]):
+        if fmeta.get("status") in ("done", "cancelled"):   # déjà traité (avant un redémarrage) ou annulé
+            continue
+        if _serve_from_cache(job_id, idx, fmeta, _local_cache_key(job, fmeta), outputs):
+            set_job_progress(job_id, (idx + 1) / max(total, 1))
+        else:
+            pending.append(idx)
+    if not pending:
+        return
+
     # 1) S'assurer que le modèle est présent (sinon, on le télécharge avec suivi)
     model_name = job["model"]               # ex: "base", "large-v3", ...
-    _ensure_local_model_with_progress(job_id, model_name)
+    with _stage(job_id, "model_download"):
+        _ensure_local_model_with_progress(job_id, model_name)
+    job.check_cancel()
+
+    # 2) Transcription (modèle partagé via le pool), pris au premier fichier qui en a besoin :
+    #    un fichier long confié au pool de processus ne le charge pas dans ce processus
+    with ExitStack() as stack:
+        held: List["WhisperModel"] = []
+
+        def get_model() -> "WhisperModel":
+            if not held:
+                t0 = time.perf_counter()
+                held.append(stack.enter_context(MODEL_POOL.acquire(_local_model_key(model_name))))
+                _record_stage(job_id, "model_load", time.perf_counter() - t0)   # ~0 si le modèle est déjà chargé
+            return held[0]
+
+        _transcribe_local_files(job_id, job, get_model, pending)
+
+def _summarize_local(job_id: str, api_key: Optional[str]):
+    """Résumé (API OpenAI) des transcriptions locales terminées qui n'en ont pas encore.
+
+    Une erreur (client, clé absente sur un job repris, appel) est journalisée par fichier :
+    les transcriptions restent disponibles et le job se termine normalement.
+    """
+    with JOBS_LOCK:
+        job = JOBS[job_id]
+    output_type = job["output_type"]
+    out_dir = TRANS_DIR / job_id
+    client = None
+    for idx, fmeta in enumerate(job["files"]):
+        if fmeta.get("status") != "done":
+            continue
+        stem = pathlib.Path(fmeta["name"]).stem
+        out_file = out_dir / f"{stem}_{output_type}.txt"
+        trans_file = out_dir / f"{stem}_transcription.txt"
+        if out_file.exists() or not trans_file.exists():
+            continue
+        text = trans_file.read_text(encoding="utf-8").strip()
+        if not text:
+            continue
+        append_log(job_id, f"→ GPT-4 pour '{output_type}' : {fmeta['name']}")
+        try:
+            client = client or _make_openai_client(api_key)
+            with _stage(job_id, "summary"):
+                summary = _summarize_transcript(job_id, client, text, output_type, fmeta["name"], index=idx)
+        except FileCancelled:
+            append_log(job_id, f"⛔ Résumé annulé : {fmeta['name']}")
+            continue
+        except Cancelled:
+            raise
+        except Exception as e:   # la transcription reste disponible
+            append_log(job_id, f"[ERREUR RÉSUMÉ] {fmeta['name']} : {e}")
+            continue
+        if summary:
+            _write_output(job_id, out_file, summary + ("\n" if not summary.endswith("\n") else ""))
+            set_file_output(job_id, idx, str(out_file))
+            append_log(job_id, f"✓ Résumé : {fmeta['name']} → {out_file.name}")
+
+def _segment_journal(job_id: str, job: Dict[str, Any], idx: int, fmeta: Dict[str, Any]) -> SegmentJournal:
+    """Journal des segments déjà transcrits du fichier ``idx`` (rangé avec les uploads du job)."""
+    key = ResultCache.make_key(
+        audio=fmeta.get("sha256") or fmeta["name"], model=job["model"], compute_type=LOCAL_COMPUTE_TYPE,
+        lang=job["lang"], beam_size=_beam_size(job), vad=LOCAL_VAD_FILTER,
+        words=bool(job.get("word_timestamps")),
+    )
+    return SegmentJournal(UPLOAD_DIR / job_id / ".journal" / f"{idx}.jsonl", key)
 
-    # 2) Transcription
-    model = WhisperModel(model_name, device="cpu", compute_type="int8", download_root=str(MODELS_DIR))
+def _transcribe_local_files(job_id: str, job: Dict[str, Any], get_model: Callable[[], "WhisperModel"],
+                            indices: List[int]):
     total = len(job["files"])
-    append_log(job_id, "VAD: Silero · beam_size=5")
-
-    for idx, fmeta in enumerate(job["files"]):
+    formats = job.get("formats") or []
+    append_log(job_id, f"VAD: Silero · beam_size={_beam_size(job)}")
+    if formats:
+        append_log(job_id, "Sorties : txt, " + ", ".join(formats) + (" · horodatage par mot" if job.get("word_timestamps") else ""))
+    journals = {idx: _segment_journal(job_id, job, idx, job["files"][idx]) for idx in indices}
+    committed = {idx: journals[idx].load() for idx in indices}
+    # Les fichiers à reprendre ne rejoignent pas les lots : ils repartent de leur point d'arrêt
+    grouped = _batched_short_files(job_id, job, get_model, [idx for idx in indices if not committed[idx]])
+
+    for idx in indices:
+        fmeta = job["files"][idx]
+        journal = journals[idx]
+        segments = None
         update_file_status(job_id, idx, "running")
         append_log(job_id, f"→ Transcription locale : {fmeta['name']}")
         try:
-            segments, info = model.transcribe(
-                fmeta["path"],
-                language=job["lang"],
-                beam_size=5,
-                vad_filter=True,
-            )
-            duration = info.duration or 1.0
-            done = 0.0
-            full_text: List[str] = []
-
-            for seg in segments:
-                done += max(0.0, (seg.end - seg.start))
-                pct_file = min(done / duration, 1.0)
-                set_file_progress(job_id, idx, pct_file)
-
-                text = (seg.text or "").strip()
-                if text:
-                    append_log(job_id, text)
-                    full_text.append(text)
-
-                set_job_progress(job_id, (idx + pct_file) / max(total, 1))
+            job.check_cancel(idx)
+            t0 = time.perf_counter()
+            prior = committed[idx]
+            resume_s = SegmentJournal.resume_point(prior)
+            if prior:
+                append_log(job_id, f"↻ Reprise de {fmeta['name']} à {resume_s:.0f} s ({len(prior)} segments déjà transcrits)")
+            if idx in grouped:
+                duration, segments, mode = grouped.pop(idx)
+            else:
+                duration, segments, mode = _local_segments(
+                    job_id, job, get_model, fmeta, start_s=resume_s,
+                    done_s=sum(seg[1] - seg[0] for seg in prior),
+                )
+            full_text: List[str] = [seg[2] for seg in prior]
 
             out_dir = TRANS_DIR / job_id
             out_dir.mkdir(parents=True, exist_ok=True)
+            _fence_outputs(job_id)   # bail encore tenu avant de recréer journal et sorties
+            journal.open(prior)
+            # Sorties écrites au fil de l'eau : téléchargeables pendant le job
+            with TranscriptWriters(out_dir, pathlib.Path(fmeta["name"]).stem, formats) as writers:
+                for seg in prior:
+                    writers.write(*seg)
+                for start, end, text, words, pct_file in segments:
+                    job.check_cancel(idx)   # frontière de segment : annulation / préemption
+                    set_file_progress(job_id, idx, pct_file)
+
+                    if text:
+                        journal.append(start, end, text, words)
+                        writers.write(start, end, text, words)
+                        append_log(job_id, text)
+                        full_text.append(text)
+
+                    set_job_progress(job_id, (idx + pct_file) / max(total, 1))
+            journal.close()
+            out_file = writers.paths["txt"]
+
             out_text = "\n".join(full_text).strip()
-            out_file = out_dir / (pathlib.Path(fmeta["name"]).stem + "_transcription.txt")
-            out_file.write_text(out_text + ("\n" if out_text and not out_text.endswith("\n") else ""), encoding="utf-8")
+            out_text += "\n" if out_text and not out_text.endswith("\n") else ""
+            cached = {fmt: writers.paths[fmt].read_text(encoding="utf-8") for fmt in formats}
+            _store_in_cache(_local_cache_key(job, fmeta), {**cached, "transcription": out_text}, fmeta)
 
             set_file_output(job_id, idx, str(out_file))
             set_file_progress(job_id, idx, 1.0)                    # <— ajout
             set_job_progress(job_id, (idx + 1) / max(total, 1))    # <— ajout
             update_file_status(job_id, idx, "done")
+            _fence_outputs(job_id)
+            journal.close(remove=True)
+            elapsed = time.perf_counter() - t0
+            _record_stage(job_id, "transcribe", elapsed)
+            rtf = elapsed / max(duration - resume_s, 1e-6)
+            # Par mode d'exécution : lots et parallèle ne faussent pas l'estimation séquentielle
+            RTF.observe(rtf, mode=f"local_{mode}", model=job["model"])
+            QOS_RTF.observe(job["model"], _beam_size(job), rtf, mode)
             append_log(job_id, f"✓ Terminé (local) : {fmeta['name']} → {out_file.name}")
-
+            append_log(job_id, f"⏱ {duration - resume_s:.0f} s d'audio en {elapsed:.1f} s (RTF {elapsed / max(duration - resume_s, 1e-6):.2f})")
+
+        except FileCancelled:
+            _close_segments(segments)
+            _fence_outputs(job_id)
+            journal.close(remove=True)
+            update_file_status(job_id, idx, "cancelled")
+            append_log(job_id, f"⛔ Annulé : {fmeta['name']}")
+        except Cancelled:
+            _close_segments(segments)
+            journal.close()   # préemption : le fichier reprendra au dernier segment journalisé
+            raise
         except Exception as e:
+            journal.close()   # le journal reste : une nouvelle tentative reprendra d'ici
             update_file_status(job_id, idx, "error", error=str(e))
             append_log(job_id, f"[ERREUR LOCAL] {fmeta['name']} : {e}")
 
+def _close_segments(segments):
+    """Arrête le générateur de segments (libère le décodeur, annule les morceaux parallèles en attente)."""
+    close = getattr(segments, "close", None)
+    if close is not None:
+        close()
+
+def _beam_size(job: Dict[str, Any]) -> int:
+    return job.get("beam_size") or LOCAL_BEAM_SIZE   # jobs sans profil : réglage historique
+
+def _local_options(job: Dict[str, Any]) -> Dict[str, Any]:
+    options = dict(language=job["lang"], beam_size=_beam_size(job), vad_filter=LOCAL_VAD_FILTER)
+    if job.get("word_timestamps"):
+        options["word_timestamps"] = True
+    return options
+
+def _with_progress(segments, duration: float, done: float = 0.0):
+    """(début, fin, texte, mots) → (début, fin, texte nettoyé, mots, progression du fichier).
+
+    ``done`` : secondes de parole déjà transcrites (reprise d'un fichier).
+    """
+    for start, end, text, words in segments:
+        done += max(0.0, (end - start))
+        yield start, end, (text or "").strip(), words, min(done / duration, 1.0)
+
+def _probe_duration(path: str) -> Optional[float]:
+    import av
+    try:
+        with av.open(path) as container:
+            if container.duration:
+                return container.duration / av.time_base
+    except Exception:
+        pass
+    return None
+
+def _batched_short_files(job_id: str, job: Dict[str, Any], get_model: Callable[[], "WhisperModel"],
+                         indices: List[int]):
+    """Regroupe les fichiers courts du job dans des lots communs (WHISPER_BATCH_SIZE).
+
+    Renvoie ``{index: (durée, itérateur de segments, "batched")}`` ; les itérateurs
+    partagent un même flux et doivent être consommés dans l'ordre de ``indices``.
+    """
+    if BATCH_SIZE <= 0 or len(indices) < 2 or not batched_transcribe.available():
+        return {}
+    if job.get("word_timestamps"):
+        return {}   # horodatage par mot : pas de remise à l'échelle possible sur l'audio concaténé
+    short = [
+        idx for idx in indices
+        if (_probe_duration(job["files"][idx]["path"]) or float("inf")) < BATCH_SHORT_FILE_S
+    ]
+    if len(short) < 2:
+        return {}
+    audios = []
+    for idx in list(short):
+        try:
+            audios.append(_decoded_audio(job_id, job["files"][idx]))
+        except Exception:
+            short.remove(idx)   # l'erreur sera remontée par le chemin normal
+    if len(short) < 2:
+        return {}
+    append_log(job_id, f"Inférence par lots : {len(short)} fichiers courts regroupés (batch_size={BATCH_SIZE})")
+    streams = batched_transcribe.transcribe_many(get_model(), audios, BATCH_SIZE, _local_options(job))
+    grouped = {}
+    for idx, audio, segs in zip(short, audios, streams):
+        duration = (len(audio) / batched_transcribe.SAMPLING_RATE) or 1.0
+        grouped[idx] = (duration, _with_progress(((s, e, t, None) for s, e, t in segs), duration), "batched")
+    return grouped
+
+def _local_segments(job_id: str, job: Dict[str, Any], get_model: Callable[[], "WhisperModel"],
+                    fmeta: Dict[str, Any], start_s: float = 0.0, done_s: float = 0.0):
+    """Renvoie ``(durée, itérateur de (début, fin, texte, progression_fichier), mode)``.
+
+    Les fichiers plus longs que LONG_FILE_MIN_S passent par le mode parallèle
+    (WHISPER_PARALLEL_PROCS > 0) ; sinon, transcription séquentielle, par lots
+    si WHISPER_BATCH_SIZE > 0 (segments découpés par morceau VAD : mêmes textes à peu
+    près, pas les mêmes frontières qu'en séquentiel). ``start_s`` > 0 reprend la transcription à cet instant
+    (horodatages toujours absolus) ; ``done_s`` : parole déjà transcrite avant la reprise.
+    """
+    options = _local_options(job)
+    source: Any = fmeta["path"]
+
+    pcm_path = _decoded_pcm_path(job_id, fmeta)
+    if pcm_path is not None:
+        source = audio_cache.open_pcm(pcm_path)   # plus de décodage du conteneur à chaque passage
+    elif start_s > 0 or PARALLEL_PROCS > 0:
+        source = _decoded_audio(job_id, fmeta)
+    offset = int(start_s * audio_cache.SAMPLING_RATE)
+
+    if PARALLEL_PROCS > 0:
+        audio = source
+        duration = len(audio) / parallel_transcribe.SAMPLING_RATE
+        if duration - start_s >= LONG_FILE_MIN_S:
+            append_log(job_id, f"Fichier long ({duration / 60:.0f} min) : découpage VAD, {PARALLEL_PROCS} processus")
+            chunks = parallel_transcribe.iter_parallel_chunks(
+                audio[offset:],
+                processes=PARALLEL_PROCS,
+                model_source=_model_source(job["model"]),
+                compute_type=LOCAL_COMPUTE_TYPE,
+                cpu_threads=PARALLEL_CPU_THREADS,
+                download_root=str(MODELS_DIR),
+                options=options,
+                pcm_path=str(pcm_path) if pcm_path is not None else None,
+                offset=offset,
+            )
+            def gen_parallel():
+                for segs, chunk_done_s, n_done, n_chunks in chunks:
+                    pct = min((start_s + chunk_done_s) / max(duration, 1e-6), 1.0)
+                    if n_chunks:
+                        append_log(job_id, f"Morceau {n_done}/{n_chunks} transcrit")
+                    if not segs:
+                        yield None, None, "", None, pct
+                    for start, end, text, words in segs:
+                        yield start, end, text.strip(), words, pct
+            return duration, gen_parallel(), "parallel"
+
+    if offset:
+        source = source[offset:]   # tranche de la projection mémoire : pas de copie
+    model = get_model()
+    mode = qos.SEQUENTIAL
+    if BATCH_SIZE > 0 and batched_transcribe.available():
+        segments, info = batched_transcribe.transcribe_file(model, source, BATCH_SIZE, options)
+        mode = "batched"
+    else:
+        segments, info = model.transcribe(source, **options)
+    duration = (start_s + info.duration) or 1.0
+    return duration, _with_progress(
+        (
+            (start_s + seg.start, start_s + seg.end, seg.text, output_formats.segment_words(seg, start_s))
+            for seg in segments
+        ),
+        duration, done=done_s,
+    )
+
 # --- helpers de téléchargement + progression
 def _ensure_local_model_with_progress(job_id: str, model_name: str):
-    """Télécharge le modèle dans ./models si absent, en affichant la progression dans les logs."""
-    # Si l’utilisateur a déjà le dossier du modèle, on ne fait rien
-    target_dir = MODELS_DIR / model_name
-    if target_dir.exists() and any(target_dir.rglob("*")):
-        append_log(job_id, f"Modèle '{model_name}' déjà présent.")
-        return
+    """S'assure que le modèle est téléchargé et vérifié, avec la progression dans les logs.
 
-    append_log(job_id, f"Vérification du modèle '{model_name}'…")
-
-    # Si huggingface_hub n'est pas dispo, on laisse faster-whisper gérer (pas de jauge)
-    if snapshot_download is None:
-        append_log(job_id, "[WARN] huggingface_hub indisponible → téléchargement sans jauge.")
-        # Construction implicite fera le download_root (mais la progression ne sera pas affichée)
-        WhisperModel(model_name, device="cpu", compute_type="int8", download_root=str(MODELS_DIR))
+    Les jobs qui demandent le même modèle partagent un seul téléchargement ; un job annulé
+    cesse d'attendre, le téléchargement continue pour les autres.
+    """
+    if MODEL_DOWNLOADS.is_ready(model_name):
+        append_log(job_id, f"Modèle '{model_name}' déjà présent.")
         return
-
-    # Repo à télécharger
-    repo_id = REPO_MAP.get(model_name)
-    if not repo_id:
-        # fallback: laisser FW gérer
+    if model_name not in REPO_MAP:
+        # fallback: laisser FW gérer (pas de jauge)
         append_log(job_id, f"[WARN] Repo HF inconnu pour '{model_name}', téléchargement délégué.")
-        WhisperModel(model_name, device="cpu", compute_type="int8", download_root=str(MODELS_DIR))
+        MODEL_POOL.preload(_local_model_key(model_name))
         return
 
-    approx_total = MODEL_APPROX_SIZE.get(model_name, 1024**3)  # défaut 1 GB si inconnu
-    append_log(job_id, f"Téléchargement du modèle (~{_fmt_size(approx_total)})…")
-
-    # Thread “monitor” : calcule la taille du dossier pendant le download pour estimer %
-    stop = threading.Event()
-    def monitor():
-        last_pct = -1
-        while not stop.is_set():
-            size = _dir_size_bytes(target_dir)
-            pct = max(0, min(100, int((size / max(1, approx_total)) * 100)))
-            if pct != last_pct:
-                append_log(job_id, f"Téléchargement modèle : {pct}% ({_fmt_size(size)} / {_fmt_size(approx_total)})")
-                last_pct = pct
-            time.sleep(0.5)
-
-    mon = threading.Thread(target=monitor, daemon=True)
-    mon.start()
+    dl, created = MODEL_DOWNLOADS.start(model_name)
+    append_log(job_id, f"Vérification / téléchargement du modèle '{model_name}'…" if created
+               else f"Modèle '{model_name}' déjà en cours de téléchargement : attente du même transfert…")
+    last_pct = -1
+    def on_progress(done: int, total: int):
+        nonlocal last_pct
+        pct = int(done * 100 / total) if total else 0
+        if pct != last_pct:
+            last_pct = pct
+            append_log(job_id, f"Téléchargement modèle : {pct}% ({_fmt_size(done)} / {_fmt_size(total)})")
+
+    job = JOBS.get(job_id)
     try:
-        # Téléchargement bloquant dans ./models/<model_name>
-        # (on force le chemin pour qu'il corresponde au nom du modèle)
-        local_dir = MODELS_DIR / model_name
-        local_dir.mkdir(parents=True, exist_ok=True)
-        snapshot_download(
-            repo_id=repo_id,
-            local_dir=str(local_dir),
-            local_dir_use_symlinks=False,
-            resume_download=True,
-            allow_patterns="*",
-        )
-        # petit flush final
-        size = _dir_size_bytes(target_dir)
-        append_log(job_id, f"Téléchargement modèle : 100% ({_fmt_size(size)})")
-    finally:
-        stop.set()
-        mon.join(timeout=1.0)
+        MODEL_DOWNLOADS.ensure(model_name, on_progress, check=job.check_cancel if job is not None else None)
+    except DownloadError as e:
+        if not (MODELS_DIR / model_name / "model.bin").exists():
+            raise RuntimeError(f"Téléchargement du modèle '{model_name}' échoué : {e}") from None
+        # Modèle téléchargé par une version antérieure, hub injoignable : utilisé sans vérification
+        append_log(job_id, f"[WARN] Vérification du modèle impossible ({e}) : copie locale utilisée telle quelle.")
+        return
+    if MODEL_DOWNLOADS.unverified(model_name):
+        append_log(job_id, f"[WARN] Modèle '{model_name}' : hub injoignable, copie locale utilisée "
+                           "sans vérification (nouvel essai au prochain démarrage).")
+        return
+    note = (MODEL_DOWNLOADS.manifest(model_name) or {}).get("note")
+    if note:   # copie installée sans manifeste, adoptée une fois pour toutes
+        append_log(job_id, f"[WARN] Modèle '{model_name}' : copie locale utilisée sans vérification ({note}).")
+        return
+    append_log(job_id, f"Modèle '{model_name}' prêt et vérifié ({_fmt_size(MODEL_DOWNLOADS.size(model_name) or 0)}).")
 
 def _dir_size_bytes(path: Path) -> int:
     try:
@@ -546,35 +2081,395 @@ def _fmt_size(n: int) -> str:
         n /= 1024
     return f"{n:.0f} PB"
 
-# ========= Helpers thread-safe =========
-def with_job(job_id: str, fn):
+# ========= Transcription en direct (WebSocket) =========
+_STREAM_SLOTS = threading.BoundedSemaphore(STREAM_MAX_SESSIONS)
+
+@app.websocket("/api/stream")
+async def stream_endpoint(ws: WebSocket):
+    """Transcription en direct d'un flux audio.
+
+    Premier message (JSON) : ``{"model_label", "lang_label", "audio": "pcm_s16le"|"opus",
+    "sample_rate", "formats"}``, puis l'audio en messages binaires (PCM mono, ou un paquet
+    Opus par message) et ``{"type": "stop"}`` (ou la fermeture) pour terminer. Le serveur
+    répond ``ready`` (modèle chargé ; l'audio reçu avant est mis en attente), puis des
+    ``partial`` / ``final`` (secondes depuis le début du flux) et ``done``. Le flux devient
+    un job local ordinaire : audio en WAV, ``<nom>_transcription.txt`` et formats demandés.
+    """
+    import streaming   # numpy, onnxruntime : au premier flux
+    await ws.accept()
+    try:
+        cfg = await ws.receive_json()
+        model_name, lang_code, formats, decoder = _stream_config(cfg)
+        segmenter = streaming.UtteranceSegmenter(streaming.SileroStreamVad(
+            ASSETS_DIR / "silero_encoder_v5.onnx", ASSETS_DIR / "silero_decoder_v5.onnx",
+        ))
+    except (ValueError, TypeError) as e:
+        await ws.send_json({"type": "error", "detail": str(e)})
+        await ws.close(code=1008)
+        return
+    except Exception as e:   # client parti, onnxruntime absent…
+        logging.warning("Flux en direct refusé : %s", e)
+        await _close_quietly(ws, 1011)
+        return
+    if not _STREAM_SLOTS.acquire(blocking=False):
+        await ws.send_json({"type": "error", "detail": "Trop de flux en direct simultanés, réessayez plus tard"})
+        await ws.close(code=1013)
+        return
+
+    job_id = _new_stream_job(model_name, lang_code, formats)
+    live = streaming.LiveTranscriber(decoder, segmenter, STREAM_PARTIAL_INTERVAL_S)
+    loop = asyncio.get_running_loop()
+    outbox: asyncio.Queue = asyncio.Queue()
+    emit = lambda msg: loop.call_soon_threadsafe(outbox.put_nowait, msg)
+    threading.Thread(target=_run_stream_job, args=(job_id, live, emit),
+                     name=f"stream-{job_id[:8]}", daemon=True).start()
+    sender = asyncio.create_task(_stream_sender(ws, outbox))
+    try:
+        while True:
+            msg = await ws.receive()
+            if msg["type"] == "websocket.disconnect":
+                break
+            if msg.get("bytes"):
+                live.push(msg["bytes"])
+            elif _is_stop_message(msg.get("text")):
+                break
+    finally:
+        live.stop()
+        await sender
+
+def _stream_config(cfg: Any):
+    import streaming
+    if not isinstance(cfg, dict):
+        raise ValueError("Premier message attendu : configuration JSON")
+    model_label = cfg.get("model_label") or DEFAULT_MODEL_LOCAL
+    if model_label not in MODELS_LOCAL:
+        raise ValueError("Modèle local inconnu")
+    lang_label = cfg.get("lang_label") or DEFAULT_LANG
+    if lang_label not in LANGS:
+        raise ValueError("Langue inconnue")
+    formats = cfg.get("formats") or []
+    if isinstance(formats, str):
+        formats = formats.split(",")
+    formats = [f for f in dict.fromkeys(str(x).strip().lower() for x in formats) if f]
+    if any(f not in output_formats.FORMATS for f in formats):
+        raise ValueError("Format horodaté inconnu")
+    decoder = streaming.make_decoder(cfg.get("audio", "pcm_s16le"),
+                                     int(cfg.get("sample_rate", streaming.SAMPLING_RATE)))
+    return MODELS_LOCAL[model_label], LANGS[lang_label], formats, decoder
+
+def _is_stop_message(text: Optional[str]) -> bool:
+    try:
+        data = json.loads(text or "")
+    except ValueError:
+        return False
+    return isinstance(data, dict) and data.get("type") == "stop"
+
+async def _close_quietly(ws: WebSocket, code: int = 1000):
+    try:
+        await ws.close(code=code)
+    except Exception:
+        pass
+
+async def _stream_sender(ws: WebSocket, outbox: "asyncio.Queue"):
+    """Relaie les messages de la session ; None = fin. Si le client est parti, la file est
+    vidée sans envoi (la session va tout de même au bout et écrit ses sorties)."""
+    alive = True
+    while True:
+        msg = await outbox.get()
+        if msg is None:
+            break
+        if alive:
+            try:
+                await ws.send_json(msg)
+            except Exception:
+                alive = False
+    if alive:
+        await _close_quietly(ws)
+
+def _new_stream_job(model_name: str, lang_code: str, formats: List[str]) -> str:
+    job_id = str(uuid.uuid4())
+    (UPLOAD_DIR / job_id).mkdir(parents=True, exist_ok=True)
+    (TRANS_DIR / job_id).mkdir(parents=True, exist_ok=True)
+    name = f"direct_{datetime.now():%Y%m%d_%H%M%S}.wav"
+    # Interrompu par un arrêt du serveur, le job est repris par _recover_jobs comme un
+    # job local classique sur le WAV déjà reçu.
+    job = _new_job_state(job_id, {
+        "status": "running",
+        "created_at": datetime.utcnow().isoformat(),
+        "use_api": False,
+        "model": model_name,
+        "lang": lang_code,
+        "output_type": None,
+        "formats": formats,
+        "word_timestamps": False,
+        "priority": 0,
+        "progress": 0.0,
+        "rev": 0,
+        "logs": [f"Flux en direct {job_id} ouvert."],
+        "files": [{
+            "name": name, "path": str(UPLOAD_DIR / job_id / name), "size": 0, "sha256": None,
+            "status": "running", "progress": 0.0, "out_path": None, "error": None, "rev": 0,
+        }],
+        "timings": {},
+    })
     with JOBS_LOCK:
-        job = JOBS.get(job_id)
-        if job is None:
+        JOBS[job_id] = job
+    _flush_job(job_id)
+    return job_id
+
+def _live_transcribe(model: "WhisperModel", lang: str):
+    """Énoncé court déjà isolé par la VAD : pas de VAD ni d'horodatage côté Whisper ;
+    faisceau réduit pour les partiels, texte déjà validé en amorce."""
+    def transcribe(audio, final: bool, prompt: str) -> str:
+        segments, _info = model.transcribe(
+            audio, language=lang, beam_size=LOCAL_BEAM_SIZE if final else 1, vad_filter=False,
+            condition_on_previous_text=False, without_timestamps=True, initial_prompt=prompt or None,
+        )
+        return " ".join(seg.text.strip() for seg in segments)
+    return transcribe
+
+def _run_stream_job(job_id: str, live: "streaming.LiveTranscriber", emit):
+    import streaming
+    job = JOBS[job_id]
+    fmeta = job.files[0]
+    try:
+        with _stage(job_id, "model_download"):
+            _ensure_local_model_with_progress(job_id, job.model)
+        t0 = time.perf_counter()
+        with MODEL_POOL.acquire(_stream_model_key(job.model)) as model, \
+                wave.open(fmeta.path, "wb") as wav, \
+                TranscriptWriters(TRANS_DIR / job_id, pathlib.Path(fmeta.name).stem, job.formats) as writers:
+            _record_stage(job_id, "model_load", time.perf_counter() - t0)
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(streaming.SAMPLING_RATE)
+            emit({"type": "ready", "job_id": job_id})
+            append_log(job_id, f"En direct : modèle '{job.model}' prêt, VAD Silero v5")
+
+            def on_event(msg: Dict[str, Any]):
+                if msg["type"] == "final":
+                    writers.write(msg["start"], msg["end"], msg["text"])
+                    append_log(job_id, msg["text"])
+                    STAGE_SECONDS.observe(msg["latency_ms"] / 1000, stage="stream_final")
+                emit(msg)
+
+            transcribe = _live_transcribe(model, job.lang)
+
+            def checked(audio, final: bool, prompt: str) -> str:
+                job.check_cancel()   # DELETE /api/jobs/{id} sur un flux en cours
+                return transcribe(audio, final, prompt)
+
+            live.run(checked, on_event,
+                     on_audio=lambda audio: wav.writeframes(streaming.pcm16(audio)))
+        size = os.path.getsize(fmeta.path)
+        with_job(job_id, lambda j: setattr(j.files[0], "size", size))
+        set_file_output(job_id, 0, str(writers.paths["txt"]))
+        set_file_progress(job_id, 0, 1.0)
+        set_job_progress(job_id, 1.0)
+        update_file_status(job_id, 0, "done")
+        append_log(job_id, f"✓ Flux terminé : {live.received_s:.0f} s d'audio → {writers.paths['txt'].name}")
+        set_job_status(job_id, "done")
+        emit({"type": "done", "job_id": job_id, "duration": round(live.received_s, 2)})
+    except Cancelled:
+        _mark_cancelled(job_id)
+        emit({"type": "error", "detail": "Flux annulé"})
+    except Exception as e:
+        logging.exception("Flux en direct %s interrompu", job_id)
+        update_file_status(job_id, 0, "error", error=str(e))
+        append_log(job_id, f"[ERREUR DIRECT] {e}")
+        set_job_status(job_id, "error")
+        emit({"type": "error", "detail": str(e)})
+    finally:
+        _STREAM_SLOTS.release()
+        emit(None)
+
+# ========= Worker réparti (WHISPER_ROLE=worker) =========
+def run_worker():
+    """Boucle d'un processus worker (voir worker.py) : LOCAL_WORKERS + CLOUD_WORKERS threads
+    réclament les jobs de la file durable. Sur Ctrl+C, les jobs en cours sont rendus à la
+    file (ils reprendront au dernier segment journalisé)."""
+    if QUEUE is None:
+        raise RuntimeError("run_worker() exige WHISPER_ROLE=worker")
+    _ensure_vad_assets()
+    _start_maintenance()
+    stop = threading.Event()
+    for lane, n in (("local", LOCAL_WORKERS), ("cloud", CLOUD_WORKERS)):
+        for i in range(n):
+            threading.Thread(target=_worker_slot, args=(lane, stop), name=f"worker-{lane}-{i}", daemon=True).start()
+    logging.info("Worker %s démarré (local: %d, cloud: %d)", WORKER_ID, LOCAL_WORKERS, CLOUD_WORKERS)
+    if not os.getenv("OPENAI_API_KEY"):
+        logging.warning("OPENAI_API_KEY non défini : les jobs API et les résumés échoueront sur ce worker")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stop.set()
+        for job in list(JOBS.values()):
+            if job.status in FINISHED:
+                continue
+            _flush_job(job.id)
+            _LOST_LEASES.add(job.id)   # plus rien à écrire : un autre worker peut le reprendre
+            job.preempt.set()
+            QUEUE.release(job.id, WORKER_ID)
+            logging.info("Job %s rendu à la file (arrêt du worker)", job.id)
+
+def _worker_slot(lane: str, stop: threading.Event):
+    while not stop.is_set():
+        try:
+            claim = QUEUE.claim(WORKER_ID, [lane], WORKER_LEASE_S)
+        except Exception as e:   # base verrouillée trop longtemps, volume indisponible…
+            logging.warning("Réclamation d'un job %s échouée : %s", lane, e)
+            claim = None
+        if claim is None:
+            stop.wait(WORKER_POLL_S)
+            continue
+        try:
+            _run_claimed(claim)
+        except Exception:
+            logging.exception("Job %s : échec du worker", claim.job_id)
+
+def _run_claimed(claim):
+    """Charge depuis la base un job réclamé, le traite sous bail, puis le retire de la file."""
+    job_id = claim.job_id
+    data = JOB_STORE.load(job_id, log_since=None)
+    if data is None or data.get("status") in FINISHED:   # purgé ou annulé entre-temps
+        QUEUE.complete(job_id, WORKER_ID)
+        return
+    for f in data["files"]:
+        if f.get("status") == "running":   # worker précédent interrompu
+            f["status"], f["progress"] = "queued", 0.0
+    note = f"Pris en charge par le worker {WORKER_ID}"
+    if claim.attempts > 1:
+        note += f" (tentative {claim.attempts}, reprise au dernier segment journalisé)"
+    data["logs"] = [note + "."]
+    job = _new_job_state(job_id, data, first_log=data.pop("log_offset"))
+    with JOBS_LOCK:
+        JOBS[job_id] = job
+    done = threading.Event()
+    lease = threading.Thread(target=_keep_lease, args=(job, done), name=f"lease-{job_id[:8]}", daemon=True)
+    lease.start()
+    try:
+        run_job(job_id, None)   # clé : OPENAI_API_KEY du worker
+    finally:
+        done.set()
+        lease.join()
+        if job_id not in _LOST_LEASES:
+            _flush_job(job_id)
+            QUEUE.complete(job_id, WORKER_ID)
+        with _FLUSH_LOCK:
+            with JOBS_LOCK:
+                JOBS.pop(job_id, None)   # terminé : relu depuis la base par l'API
+            _FINISHED_AT.pop(job_id, None)
+        _LOST_LEASES.discard(job_id)
+
+def _keep_lease(job: JobState, done: threading.Event):
+    """Renouvelle le bail tous les tiers de WORKER_LEASE_S et applique les annulations
+    demandées à l'API ; bail perdu : le job est abandonné sans plus rien écrire."""
+    while True:
+        try:
+            state = QUEUE.heartbeat(job.id, WORKER_ID, WORKER_LEASE_S)
+        except Exception as e:
+            logging.warning("Bail du job %s non renouvelé : %s", job.id, e)
+            state = ()   # nouvel essai au prochain tour
+        if state is None:
+            if job.id in _LOST_LEASES:   # job rendu à la file (étape suivante) : rien d'anormal
+                return
+            _LOST_LEASES.add(job.id)
+            job.preempt.set()
+            logging.warning("Job %s : bail perdu, abandonné au worker qui l'a repris", job.id)
+            return
+        if state:
+            cancel, files = state
+            if cancel and not job.cancel.is_set():
+                job.cancel.set()
+                append_log(job.id, "⛔ Annulation demandée…")
+            for index in sorted(files - job.cancelled_files):
+                with job.lock:
+                    job.cancelled_files.add(index)
+                if 0 <= index < len(job.files) and job.files[index].status == "queued":
+                    update_file_status(job.id, index, "cancelled")
+        if done.wait(WORKER_LEASE_S / 3):
             return
+
+def _fence_outputs(job_id: str):
+    """Mode worker : avant d'ouvrir, remplacer ou supprimer une sortie ou un journal, vérifie
+    que le bail est encore tenu pour au moins un intervalle de renouvellement.
+
+    Les fichiers sont toujours recréés (nouvel inode) : un worker qui a perdu son bail
+    n'écrit plus que dans des fichiers déjà remplacés par le nouveau propriétaire, et ne
+    peut plus en ouvrir, remplacer ou supprimer aucun.
+    """
+    if ROLE != "worker" or QUEUE is None:
+        return
+    if job_id in _LOST_LEASES or not QUEUE.holds(job_id, WORKER_ID, WORKER_LEASE_S / 3):
+        _LOST_LEASES.add(job_id)
+        raise Preempted()
+
+def _write_output(job_id: str, path: Path, text: str):
+    _fence_outputs(job_id)
+    write_text_atomic(path, text)
+
+# ========= Helpers thread-safe =========
+def with_job(job_id: str, fn, coalesce: bool = False):
+    """Applique ``fn(job)`` sous le verrou du job. ``coalesce`` : mise à jour fréquente
+    (progression, logs) publiée au plus toutes les PROGRESS_INTERVAL_S secondes."""
+    job = JOBS.get(job_id)
+    if job is None:
+        return
+    with job.lock:
         fn(job)
+        published = job.commit(time.monotonic(), PROGRESS_INTERVAL_S if coalesce else 0.0)
+    if published:
+        JOB_EVENTS.notify(job_id)
+
+def _touch_file(j: JobState, index: int):
+    # Incrémente la révision du job et marque le fichier modifié (pour ?rev=)
+    j.rev += 1
+    f = j.files[index]
+    f.rev = j.rev
+    return f
 
 def set_job_status(job_id: str, status: str):
-    with_job(job_id, lambda j: j.__setitem__("status", status))
+    with_job(job_id, lambda j: setattr(j, "status", status))
+    if status in FINISHED:
+        _FINISHED_AT[job_id] = time.time()
+    _flush_job(job_id)   # transitions de statut écrites tout de suite (reprise après crash)
 
 def set_job_progress(job_id: str, p: float):
-    with_job(job_id, lambda j: j.__setitem__("progress", max(0.0, min(1.0, p))))
+    p = max(0.0, min(1.0, p))
+    with_job(job_id, lambda j: setattr(j, "progress", p), coalesce=p < 1.0)
 
 def append_log(job_id: str, message: str):
-    with_job(job_id, lambda j: j["logs"].append(message))
+    with_job(job_id, lambda j: j.logs.append(message), coalesce=True)
 
 def update_file_status(job_id: str, index: int, status: str, error: Optional[str] = None):
     def _upd(j):
-        j["files"][index]["status"] = status
+        f = _touch_file(j, index)
+        f.status = status
         if error:
-            j["files"][index]["error"] = error
+            f.error = error
     with_job(job_id, _upd)
 
 def set_file_progress(job_id: str, index: int, p: float):
-    with_job(job_id, lambda j: j["files"][index].__setitem__("progress", max(0.0, min(1.0, p))))
+    p = max(0.0, min(1.0, p))
+    with_job(job_id, lambda j: setattr(_touch_file(j, index), "progress", p), coalesce=p < 1.0)
 
 def set_file_output(job_id: str, index: int, path: str):
-    with_job(job_id, lambda j: j["files"][index].__setitem__("out_path", path))
+    with_job(job_id, lambda j: setattr(_touch_file(j, index), "out_path", path))
+
+@app.on_event("startup")
+def _startup_done():
+    # Dernier gestionnaire enregistré : l'application est prête à servir
+    STARTUP["ready_s"] = round(time.perf_counter() - _IMPORT_T0, 3)
+    launched = os.getenv("WHISPER_LAUNCH_TIME")
+    if launched:
+        try:
+            STARTUP["since_launch_s"] = round(time.time() - float(launched), 3)
+        except ValueError:
+            pass
+    logging.info("Démarrage : import %.2f s, prêt en %.2f s", STARTUP["import_s"], STARTUP["ready_s"])
+
+STARTUP["import_s"] = round(time.perf_counter() - _IMPORT_T0, 3)
 
 # ========= Entrée (dev) =========
 if __name__ == "__main__":
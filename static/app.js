@@ -5,6 +5,12 @@ const apiKeyWrap = document.getElementById("api-key-wrap");
 const apiKeyInput = document.getElementById("api_key");
 const outputTypeWrap = document.getElementById("output-type-wrap");
 const outputTypeSelect = document.getElementById("output_type");
+const outputTypeNone = document.getElementById("output-type-none");
+const formatsWrap = document.getElementById("formats-wrap");
+const wordTimestampsInput = document.getElementById("word_timestamps");
+const profileWrap = document.getElementById("profile-wrap");
+const profileSelect = document.getElementById("profile");
+const deadlineInput = document.getElementById("deadline");
 
 const modelSelect = document.getElementById("model");
 const langSelect = document.getElementById("lang");
@@ -20,16 +26,21 @@ const filesList = document.getElementById("files-list");
 const logsPre = document.getElementById("logs");
 const downloadWrap = document.getElementById("downloads");
 const summaryBtn = document.getElementById("btn-summary");
+const formatBtns = document.querySelectorAll(".format-btn");
 
 const themeBtn = document.getElementById("toggle-theme");
+const warmupBadge = document.getElementById("warmup");
 
 // Masquer les boutons de téléchargement tant que la transcription n'est pas terminée
 downloadWrap.hidden = true;
 
 // ====== État local ======
 let pollTimer = null;
+let eventSource = null;
 let currentJobId = null;
-let lastLogLength = 0;
+let lastLogLength = 0;   // offset de log déjà affiché (curseur ?since=)
+let filesRev = null;     // dernière révision des fichiers reçue (curseur ?rev=)
+let filesState = [];
 let isRunning = false;
 
 // ====== Config serveur ======
@@ -41,6 +52,8 @@ let isRunning = false;
   window.LANGS = cfg.LANGS || [];
   window.DEFAULT_MODEL_LOCAL = cfg.DEFAULT_MODEL_LOCAL || (window.MODELS_LOCAL[0] || "");
   window.DEFAULT_LANG = cfg.DEFAULT_LANG || (window.LANGS[0] || "fr");
+  window.PROFILES = cfg.PROFILES || [];
+  window.DEFAULT_PROFILE = cfg.DEFAULT_PROFILE || "standard";
 })();
 
 // ====== Thème (persistance localStorage) ======
@@ -72,8 +85,27 @@ function fillModelOptions() {
     modelSelect.appendChild(opt);
   });
 
-  apiKeyWrap.style.display = useAPI ? "flex" : "none";
-  outputTypeWrap.style.display = useAPI ? "flex" : "none";
+  // Local : résumé facultatif (via l'API), l'API impose un format
+  outputTypeNone.hidden = outputTypeNone.disabled = useAPI;
+  if (useAPI && !outputTypeSelect.value) outputTypeSelect.value = "resume";
+  if (!useAPI) outputTypeSelect.value = "";
+  outputTypeWrap.style.display = "flex";
+  toggleApiKey();
+  formatsWrap.style.display = useAPI ? "none" : "flex";
+  profileWrap.style.display = useAPI ? "none" : "flex";
+}
+function toggleApiKey() {
+  apiKeyWrap.style.display = modeSelect.value === "api" || outputTypeSelect.value ? "flex" : "none";
+}
+outputTypeSelect.addEventListener("change", toggleApiKey);
+function fillProfileOptions() {
+  profileSelect.innerHTML = "";
+  [{ name: "auto", label: "Auto (selon la charge)" }, ...window.PROFILES].forEach(p => {
+    const opt = document.createElement("option");
+    opt.value = p.name; opt.textContent = p.label;
+    if (p.name === window.DEFAULT_PROFILE) opt.selected = true;
+    profileSelect.appendChild(opt);
+  });
 }
 function fillLangOptions() {
   langSelect.innerHTML = "";
@@ -90,13 +122,15 @@ function formatPct(p) { return Math.round((p || 0) * 100); }
 
 function renderFiles(files) {
   filesList.innerHTML = "";
-  (files || []).forEach((f) => {
+  (files || []).forEach((f, i) => {
     const pct = f.status === "done" ? 100 : Math.min(100, formatPct(f.progress || 0));
     const row = document.createElement("div");
     row.className = "file-row";
+    const cancellable = currentJobId && (f.status === "queued" || f.status === "running");
     row.innerHTML = `
       <div class="name">${f.name}</div>
-      <div class="state">État : ${f.status}${f.error ? " — " + f.error : ""}</div>
+      <div class="state">État : ${f.status}${f.error ? " — " + f.error : ""}
+        ${cancellable ? `<button type="button" class="ghost" onclick="cancelFile(currentJobId, ${i})">Annuler</button>` : ""}</div>
       <div class="row-progress"><div style="width:${pct}%"></div></div>
       ${f.out_path ? `<div class="state">Sortie : ${f.out_path.split("/").pop()}</div>` : ""}
     `;
@@ -109,6 +143,22 @@ function autoscrollLogs() {
   logsPre.scrollTop = logsPre.scrollHeight;
 }
 
+// ====== Annulation ======
+async function cancelJob(jobId) {
+  const res = await fetch(`/api/jobs/${jobId}`, { method: "DELETE" });
+  if (res.status === 409) return null;   // déjà terminé : le suivi affichera l'état final
+  if (!res.ok) throw new Error(await res.text());
+  return res.json();
+}
+
+async function cancelFile(jobId, index) {
+  try {
+    const res = await fetch(`/api/jobs/${jobId}/files/${index}`, { method: "DELETE" });
+    if (!res.ok) throw new Error(await res.text());
+  } catch (e) { alert("Échec de l'annulation : " + e.message); }
+}
+window.cancelFile = cancelFile;
+
 // ====== Téléchargements ======
 async function downloadZip(jobId) {
   try {
@@ -124,9 +174,9 @@ async function downloadZip(jobId) {
 }
 window.downloadZip = downloadZip;
 
-async function downloadTxt(jobId, kind = 'transcription', merge = true) {
+async function downloadTxt(jobId, kind = 'transcription', merge = true, format = 'txt') {
   try {
-    const res = await fetch(`/api/download-txt/${jobId}?merge=${merge ? 1 : 0}&kind=${kind}`, { method: 'GET', cache: 'no-store' });
+    const res = await fetch(`/api/download-txt/${jobId}?merge=${merge ? 1 : 0}&kind=${kind}&format=${format}`, { method: 'GET', cache: 'no-store' });
     if (!res.ok) { alert(`Échec TXT (${res.status}).`); return; }
     const blob = await res.blob();
     const url = URL.createObjectURL(blob);
@@ -139,46 +189,81 @@ async function downloadTxt(jobId, kind = 'transcription', merge = true) {
 window.downloadTxt = downloadTxt;
 
 
-// ====== Polling ======
-async function pollStatus() {
-  if (!currentJobId) return;
-  try {
-    const res = await fetch(`/api/status/${currentJobId}`);
-    if (!res.ok) throw new Error(await res.text());
-    const job = await res.json();
+// ====== Suivi du job (SSE, repli en polling incrémental) ======
+function applyStatus(job) {
+  jobIdSpan.textContent = `Job : ${currentJobId}`
+    + (job.profile ? ` · profil ${job.profile} (RTF ~${(job.expected_rtf || 0).toFixed(2)})` : "");
+  jobStateSpan.textContent = job.status === "queued" && job.queue_position
+    ? `en file (position ${job.queue_position})`
+    : job.status;
+  progressBar.style.width = `${formatPct(job.progress)}%`;
+
+  // Fichiers : liste complète, ou seulement les entrées modifiées (avec index)
+  (job.files || []).forEach((f, i) => { filesState[f.index ?? i] = f; });
+  if (job.rev !== undefined) filesRev = job.rev;
+  renderFiles(filesState);
+
+  // Assurer l'affichage correct des boutons selon l'état et le mode
+  // Transcriptions partielles téléchargeables dès qu'un fichier a avancé
+  const partial = job.status === "running" && filesState.some(f => f && (f.status === "done" || f.progress > 0));
+  downloadWrap.hidden = !(job.status === "done" || partial);
+  summaryBtn.style.display = job.output_type && job.status === "done" ? "inline-flex" : "none";
+  formatBtns.forEach(b => {
+    b.style.display = (job.formats || []).includes(b.dataset.format) ? "inline-flex" : "none";
+  });
 
-    jobIdSpan.textContent = `Job : ${currentJobId}`;
-    jobStateSpan.textContent = job.status;
-    progressBar.style.width = `${formatPct(job.progress)}%`;
-    renderFiles(job.files);
-
-    // Assurer l'affichage correct des boutons selon l'état et le mode
-    downloadWrap.hidden = job.status !== "done";
-    summaryBtn.style.display = job.use_api ? "inline-flex" : "none";
-
-    if (Array.isArray(job.logs)) {
-      const slice = job.logs.slice(lastLogLength).join("\n");
-      if (slice.trim().length) {
-        logsPre.textContent += (logsPre.textContent ? "\n" : "") + slice;
-        lastLogLength = job.logs.length;
-        autoscrollLogs();
-      }
+  if (Array.isArray(job.logs) && job.logs.length) {
+    const slice = job.logs.join("\n");
+    if (slice.trim().length) {
+      logsPre.textContent += (logsPre.textContent ? "\n" : "") + slice;
+      autoscrollLogs();
     }
+  }
+  if (job.log_offset !== undefined) lastLogLength = job.log_offset;
 
-    if (job.status === "done" || job.status === "error") {
-      progressBar.style.width = "100%";
-      clearInterval(pollTimer); pollTimer = null;
-      isRunning = false;
-      startBtn.disabled = false;
-      startBtn.textContent = "Lancer la transcription";
-      startBtn.classList.remove("danger");
-    }
+  if (job.status === "done" || job.status === "error" || job.status === "cancelled") {
+    progressBar.style.width = "100%";
+    stopTracking();
+    isRunning = false;
+    startBtn.disabled = false;
+    startBtn.textContent = "Lancer la transcription";
+    startBtn.classList.remove("danger");
+  }
+}
+
+function stopTracking() {
+  if (pollTimer) clearInterval(pollTimer);
+  pollTimer = null;
+  if (eventSource) eventSource.close();
+  eventSource = null;
+}
 
-    
+function startTracking() {
+  stopTracking();
+  if (!window.EventSource) {
+    pollTimer = setInterval(pollStatus, 1000);
+    return;
+  }
+  eventSource = new EventSource(`/api/events/${currentJobId}?since=${lastLogLength}`);
+  eventSource.onmessage = (ev) => applyStatus(JSON.parse(ev.data));
+  eventSource.onerror = () => {
+    // Flux coupé : on bascule sur le polling incrémental
+    if (!eventSource) return;
+    eventSource.close(); eventSource = null;
+    if (isRunning && !pollTimer) pollTimer = setInterval(pollStatus, 1000);
+  };
+}
 
+async function pollStatus() {
+  if (!currentJobId) return;
+  try {
+    const q = `since=${lastLogLength}` + (filesRev !== null ? `&rev=${filesRev}` : "");
+    const res = await fetch(`/api/status/${currentJobId}?${q}`);
+    if (!res.ok) throw new Error(await res.text());
+    applyStatus(await res.json());
   } catch (err) {
     console.error(err);
-    clearInterval(pollTimer); pollTimer = null;
+    stopTracking();
     isRunning = false;
     startBtn.disabled = false;
     startBtn.textContent = "Lancer la transcription";
@@ -190,23 +275,17 @@ async function pollStatus() {
 form.addEventListener("submit", async (e) => {
   e.preventDefault();
 
-  // === STOP (UI) ===
+  // === STOP : annulation côté serveur, le suivi continue jusqu'à l'état « cancelled » ===
   if (isRunning) {
-    // on affiche immédiatement l'état "arrêt en cours…"
     jobStateSpan.textContent = "arrêt en cours…";
-    startBtn.disabled = true;            // gèle le bouton pendant qu'on arrête le polling
-    if (pollTimer) clearInterval(pollTimer);
-    pollTimer = null;
-
-    // petit délai visuel pour que l'utilisateur voie l'état
-    setTimeout(() => {
-      isRunning = false;
+    startBtn.disabled = true;
+    try {
+      if (currentJobId) await cancelJob(currentJobId);
+    } catch (err) {
+      console.error(err);
+      alert("Échec de l'annulation : " + err.message);
       startBtn.disabled = false;
-      startBtn.textContent = "Lancer la transcription";
-      startBtn.classList.remove("danger");
-      jobStateSpan.textContent = "arrêté (UI)";
-    }, 500);
-
+    }
     return;
   }
 
@@ -229,15 +308,24 @@ form.addEventListener("submit", async (e) => {
   jobStateSpan.textContent = "démarrage…";
   jobIdSpan.textContent = "";
   lastLogLength = 0;
+  filesRev = null;
+  filesState = [];
 
   const fd = new FormData();
   const use_api = modeSelect.value === "api";
-  summaryBtn.style.display = use_api ? "inline-flex" : "none";
+  summaryBtn.style.display = outputTypeSelect.value ? "inline-flex" : "none";
   fd.append("use_api", use_api ? "1" : "0");
   fd.append("api_key", (apiKeyInput.value || "").trim());
   fd.append("model_label", modelSelect.value);
   fd.append("lang_label", langSelect.value);
-  if (use_api) fd.append("output_type", outputTypeSelect.value);
+  if (outputTypeSelect.value) fd.append("output_type", outputTypeSelect.value);
+  if (!use_api) {
+    const formats = Array.from(form.querySelectorAll('input[name="formats"]:checked')).map(c => c.value);
+    fd.append("formats", formats.join(","));
+    fd.append("word_timestamps", wordTimestampsInput.checked ? "1" : "0");
+    fd.append("profile", profileSelect.value);
+    if (deadlineInput.value) fd.append("deadline_s", String(Number(deadlineInput.value) * 60));
+  }
   Array.from(filesInput.files).forEach(f => fd.append("files", f, f.name));
 
 
@@ -250,7 +338,7 @@ form.addEventListener("submit", async (e) => {
     jobIdSpan.textContent = `Job : ${currentJobId}`;
     jobStateSpan.textContent = "en cours";
     startBtn.disabled = false;   // on autorise l'arrêt (UI) maintenant que le job existe
-    pollTimer = setInterval(pollStatus, 1000);
+    startTracking();
   } catch (err) {
     console.error(err);
     alert("Erreur au lancement : " + err.message);
@@ -263,10 +351,11 @@ form.addEventListener("submit", async (e) => {
 
 // ====== Réinitialiser (UI only) ======
 resetBtn.addEventListener("click", () => {
-  if (pollTimer) clearInterval(pollTimer);
-  pollTimer = null;
+  stopTracking();
   currentJobId = null;
   lastLogLength = 0;
+  filesRev = null;
+  filesState = [];
   isRunning = false;
 
   // reset visuel du formulaire
@@ -277,11 +366,13 @@ resetBtn.addEventListener("click", () => {
   progressBar.style.width = "0%";
   downloadWrap.hidden = true;
   summaryBtn.style.display = "none";
+  formatBtns.forEach(b => { b.style.display = "none"; });
 
 
   // Remettre les options par défaut
   fillModelOptions();
   fillLangOptions();
+  fillProfileOptions();
 
   // Remettre le bouton principal
   startBtn.disabled = false;
@@ -289,7 +380,42 @@ resetBtn.addEventListener("click", () => {
   startBtn.classList.remove("danger");
 });
 
+// ====== Préchauffage du modèle local (WHISPER_PRELOAD_MODEL ou POST /api/warmup) ======
+const WARMUP_LABELS = {
+  downloading: "⬇️ Téléchargement du modèle",
+  importing: "⏳ Démarrage du moteur local…",
+  loading: "⏳ Chargement du modèle",
+  ready: "✅ Modèle prêt",
+  error: "⚠️ Préchauffage échoué",
+};
+
+async function watchWarmup() {
+  let state;
+  try {
+    const res = await fetch("/api/warmup", { cache: "no-store" });
+    if (!res.ok) return;
+    state = await res.json();
+  } catch (e) {
+    return;
+  }
+  if (!WARMUP_LABELS[state.state]) {   // "off" : rien à afficher
+    warmupBadge.hidden = true;
+    return;
+  }
+  warmupBadge.hidden = false;
+  const pct = state.state === "downloading" && state.total ? ` ${Math.floor(state.bytes * 100 / state.total)}%` : "";
+  warmupBadge.textContent = WARMUP_LABELS[state.state] + (state.model ? ` (${state.model})` : "") + pct;
+  warmupBadge.title = state.error || "";
+  if (["downloading", "importing", "loading"].includes(state.state)) {
+    setTimeout(watchWarmup, 1000);
+  } else if (state.state === "ready") {
+    setTimeout(() => { warmupBadge.hidden = true; }, 5000);
+  }
+}
+
 // ====== Init ======
 modeSelect.addEventListener("change", fillModelOptions);
 fillModelOptions();
-fillLangOptions();
\ No newline at end of file
+fillLangOptions();
+fillProfileOptions();
+watchWarmup();
\ No newline at end of file
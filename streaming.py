@@ -0,0 +1,287 @@
+"""Transcription en direct : décodage des trames reçues, VAD Silero v5 en flux, énoncés.
+
+Le flux audio (PCM s16le ou paquets Opus) est ramené en 16 kHz mono float32, passé trame
+par trame (32 ms) dans Silero VAD v5 en gardant son état entre les envois, puis découpé
+en énoncés : un silence de ``min_silence_ms`` (ou ``max_utterance_s`` de parole continue)
+clôt un énoncé, qui est alors transcrit en « final ». Pendant la parole, l'énoncé en cours
+est retranscrit régulièrement (« partial »), sauf si le traitement a pris du retard.
+"""
+import queue
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+SAMPLING_RATE = 16000
+FRAME = 512        # fenêtre de Silero v5 à 16 kHz (32 ms)
+CONTEXT = 64       # échantillons de la trame précédente ajoutés en contexte
+STATE_DIM = 128
+
+_STOP = object()
+
+
+class SileroStreamVad:
+    """Silero VAD v5 (encodeur + décodeur ONNX livrés dans assets/) avec état conservé entre appels."""
+
+    def __init__(self, encoder_path: Path, decoder_path: Path):
+        import onnxruntime
+        opts = onnxruntime.SessionOptions()
+        opts.inter_op_num_threads = 1
+        opts.intra_op_num_threads = 1
+        opts.log_severity_level = 4
+        self._enc = onnxruntime.InferenceSession(str(encoder_path), providers=["CPUExecutionProvider"], sess_options=opts)
+        self._dec = onnxruntime.InferenceSession(str(decoder_path), providers=["CPUExecutionProvider"], sess_options=opts)
+        self.reset()
+
+    def reset(self) -> None:
+        self._state = np.zeros((2, 1, STATE_DIM), dtype=np.float32)
+        self._context = np.zeros(CONTEXT, dtype=np.float32)
+
+    def __call__(self, frames: np.ndarray) -> np.ndarray:
+        """Probabilité de parole de chaque ligne de ``frames`` (n × FRAME), dans l'ordre."""
+        if not len(frames):
+            return np.zeros(0, dtype=np.float32)
+        context = np.concatenate([self._context[None, :], frames[:-1, -CONTEXT:]], axis=0)
+        self._context = frames[-1, -CONTEXT:].copy()
+        encoded = self._enc.run(None, {"input": np.concatenate([context, frames], axis=1)})[0]
+        encoded = encoded.reshape(1, -1, STATE_DIM)
+        probs = np.empty(encoded.shape[1], dtype=np.float32)
+        for i in range(encoded.shape[1]):
+            out, self._state = self._dec.run(None, {"input": encoded[:, i], "state": self._state})
+            probs[i] = np.asarray(out).reshape(-1)[0]
+        return probs
+
+
+class Utterance:
+    __slots__ = ("start", "end", "audio", "detected_at")
+
+    def __init__(self, start: float, end: float, audio: np.ndarray):
+        self.start = start
+        self.end = end
+        self.audio = audio
+        self.detected_at = time.monotonic()
+
+
+class UtteranceSegmenter:
+    """Découpe un flux 16 kHz en énoncés d'après les probabilités de parole (hystérésis Silero)."""
+
+    def __init__(self, vad: Callable[[np.ndarray], np.ndarray], threshold: float = 0.5,
+                 min_silence_ms: int = 500, speech_pad_ms: int = 200, min_speech_ms: int = 250,
+                 max_utterance_s: float = 15.0):
+        self.vad = vad
+        self.threshold = threshold
+        self.neg_threshold = max(threshold - 0.15, 0.01)
+        ms = SAMPLING_RATE / 1000 / FRAME    # trames par milliseconde
+        self.min_silence = max(1, int(min_silence_ms * ms))
+        self.pad = int(speech_pad_ms * ms)
+        self.min_speech = max(1, int(min_speech_ms * ms))
+        self.max_frames = max(self.min_speech + 1, int(max_utterance_s * SAMPLING_RATE / FRAME))
+        self._rest = np.zeros(0, dtype=np.float32)
+        self._frames_seen = 0
+        self._pre: Deque[np.ndarray] = deque(maxlen=max(1, self.pad))
+        self._utt: List[np.ndarray] = []
+        self._utt_start = 0            # indice de trame
+        self._silence = 0
+
+    def current(self) -> Optional[Utterance]:
+        """Énoncé en cours (pour une transcription partielle), None hors parole."""
+        if not self._utt:
+            return None
+        return self._make(len(self._utt))
+
+    def _make(self, n: int) -> Utterance:
+        start = self._utt_start * FRAME / SAMPLING_RATE
+        return Utterance(start, start + n * FRAME / SAMPLING_RATE, np.concatenate(self._utt[:n]))
+
+    def feed(self, audio: np.ndarray) -> List[Utterance]:
+        """Ajoute des échantillons ; renvoie les énoncés terminés."""
+        audio = np.concatenate([self._rest, audio.astype(np.float32, copy=False)])
+        n = len(audio) // FRAME
+        self._rest = audio[n * FRAME:]
+        if not n:
+            return []
+        frames = audio[: n * FRAME].reshape(n, FRAME)
+        done = []
+        for frame, p in zip(frames, self.vad(frames)):
+            utt = self._step(frame, float(p))
+            if utt is not None:
+                done.append(utt)
+            self._frames_seen += 1
+        return done
+
+    def _step(self, frame: np.ndarray, p: float) -> Optional[Utterance]:
+        if not self._utt:
+            if p >= self.threshold:
+                self._utt = list(self._pre) + [frame]
+                self._utt_start = self._frames_seen - len(self._pre)
+                self._pre.clear()
+                self._silence = 0
+            else:
+                self._pre.append(frame)
+            return None
+
+        self._utt.append(frame)
+        self._silence = self._silence + 1 if p < self.neg_threshold else 0
+        if self._silence >= self.min_silence:
+            keep = len(self._utt) - self._silence + min(self.pad, self._silence)
+            utt = self._make(keep) if keep - min(self.pad, self._silence) >= self.min_speech else None
+            self._pre.extend(self._utt[-self.pad:] if self.pad else ())
+            self._utt = []
+            return utt
+        if len(self._utt) >= self.max_frames:
+            # parole continue trop longue : coupe forcée, la suite devient un nouvel énoncé
+            utt = self._make(len(self._utt))
+            self._utt_start += len(self._utt)
+            self._utt = []
+            self._pre.clear()
+            self._silence = 0
+            return utt
+        return None
+
+    def flush(self) -> Optional[Utterance]:
+        """Fin de flux : énoncé en cours (sans le silence final au-delà du remplissage)."""
+        if not self._utt:
+            return None
+        keep = len(self._utt) - max(0, self._silence - self.pad)
+        utt = self._make(keep) if keep >= self.min_speech else None
+        self._utt = []
+        return utt
+
+
+# ========= Décodage des trames reçues =========
+class PcmDecoder:
+    """PCM s16le mono ; rééchantillonné en 16 kHz si ``sample_rate`` diffère."""
+
+    def __init__(self, sample_rate: int = SAMPLING_RATE):
+        self.sample_rate = sample_rate
+        self._odd = b""
+        self._resampler = None
+        if sample_rate != SAMPLING_RATE:
+            import av
+            self._resampler = av.AudioResampler(format="flt", layout="mono", rate=SAMPLING_RATE)
+
+    def decode(self, data: bytes) -> np.ndarray:
+        data = self._odd + data
+        cut = len(data) - len(data) % 2
+        self._odd = data[cut:]
+        pcm = np.frombuffer(data[:cut], dtype="<i2")
+        if self._resampler is None:
+            return pcm.astype(np.float32) / 32768.0
+        import av
+        frame = av.AudioFrame.from_ndarray(pcm.reshape(1, -1), format="s16", layout="mono")
+        frame.sample_rate = self.sample_rate
+        return _resampled(self._resampler, frame)
+
+
+class OpusDecoder:
+    """Paquets Opus bruts, un par message (ex. WebCodecs ``AudioEncoder``)."""
+
+    def __init__(self):
+        import av
+        self._ctx = av.CodecContext.create("opus", "r")
+        self._resampler = av.AudioResampler(format="flt", layout="mono", rate=SAMPLING_RATE)
+
+    def decode(self, data: bytes) -> np.ndarray:
+        import av
+        out = [_resampled(self._resampler, f) for f in self._ctx.decode(av.Packet(data))]
+        return np.concatenate(out) if out else np.zeros(0, dtype=np.float32)
+
+
+def _resampled(resampler: Any, frame: Any) -> np.ndarray:
+    chunks = [f.to_ndarray().reshape(-1) for f in resampler.resample(frame)]
+    return np.concatenate(chunks).astype(np.float32) if chunks else np.zeros(0, dtype=np.float32)
+
+
+AUDIO_FORMATS = ("pcm_s16le", "opus")
+
+
+def make_decoder(fmt: str, sample_rate: int = SAMPLING_RATE):
+    if fmt == "opus":
+        return OpusDecoder()
+    if fmt == "pcm_s16le":
+        return PcmDecoder(sample_rate)
+    raise ValueError(f"format audio inconnu : {fmt}")
+
+
+def pcm16(audio: np.ndarray) -> bytes:
+    """float32 [-1, 1] → PCM s16le (pour archiver le flux en WAV)."""
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+# ========= Session =========
+class LiveTranscriber:
+    """Boucle d'une session en direct, exécutée dans un thread dédié.
+
+    ``push()`` (depuis n'importe quel thread) met des octets en file ; ``run()`` les décode,
+    les découpe et appelle ``transcribe(audio, final, prompt) -> texte``. Les événements
+    ``{"type": "partial"|"final", ...}`` sont remis à ``emit`` ; ``on_audio`` reçoit le PCM
+    16 kHz décodé. Les partiels sont sautés tant que de l'audio attend : la latence des
+    finals reste bornée par le temps de transcription d'un énoncé.
+    """
+
+    def __init__(self, decoder: Any, segmenter: UtteranceSegmenter, partial_interval_s: float = 1.0):
+        self.decoder = decoder
+        self.segmenter = segmenter
+        self.partial_interval = int(partial_interval_s * SAMPLING_RATE)
+        self._inbox: "queue.Queue[Any]" = queue.Queue()
+        self._last_partial_len = 0
+        self._prompt = ""
+        self.received_s = 0.0
+
+    def push(self, data: bytes) -> None:
+        self._inbox.put(data)
+
+    def stop(self) -> None:
+        self._inbox.put(_STOP)
+
+    def run(self, transcribe: Callable[[np.ndarray, bool, str], str],
+            emit: Callable[[Dict[str, Any]], None],
+            on_audio: Optional[Callable[[np.ndarray], None]] = None) -> None:
+        while True:
+            items = [self._inbox.get()]
+            while True:                  # en retard : on traite tout ce qui attend d'un coup
+                try:
+                    items.append(self._inbox.get_nowait())
+                except queue.Empty:
+                    break
+            for data in items:
+                if data is _STOP:
+                    continue
+                audio = self.decoder.decode(data)
+                if not len(audio):
+                    continue
+                self.received_s += len(audio) / SAMPLING_RATE
+                if on_audio is not None:
+                    on_audio(audio)
+                for utt in self.segmenter.feed(audio):
+                    self._final(utt, transcribe, emit)
+            if any(it is _STOP for it in items):
+                tail = self.segmenter.flush()
+                if tail is not None:
+                    self._final(tail, transcribe, emit)
+                return
+            self._maybe_partial(transcribe, emit)
+
+    def _final(self, utt: Utterance, transcribe, emit) -> None:
+        text = transcribe(utt.audio, True, self._prompt).strip()
+        self._last_partial_len = 0
+        if not text:
+            return
+        self._prompt = (self._prompt + " " + text)[-200:]
+        emit({
+            "type": "final", "start": round(utt.start, 2), "end": round(utt.end, 2), "text": text,
+            "latency_ms": int((time.monotonic() - utt.detected_at) * 1000),
+        })
+
+    def _maybe_partial(self, transcribe, emit) -> None:
+        current = self.segmenter.current()
+        if current is None or not self._inbox.empty():
+            return
+        if len(current.audio) - self._last_partial_len < self.partial_interval:
+            return
+        self._last_partial_len = len(current.audio)
+        text = transcribe(current.audio, False, self._prompt).strip()
+        if text:
+            emit({"type": "partial", "start": round(current.start, 2), "text": text})
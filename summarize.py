@@ -0,0 +1,130 @@
+"""Résumé map-reduce des transcriptions longues.
+
+La transcription est découpée aux frontières de segments (une ligne par segment côté
+local ; phrases pour le texte d'un seul tenant renvoyé par l'API) en morceaux d'au plus
+``max_chars`` caractères. Chaque morceau est condensé en notes neutres (étape « map »,
+indépendante du format de sortie : ses résultats sont mis en cache et servent à tous les
+formats), puis le gabarit du format demandé est appliqué aux notes (étape « reduce »).
+Si les notes dépassent encore ``max_chars``, elles sont regroupées et recondensées.
+
+Un texte qui tient en un morceau part tel quel dans le gabarit, en un seul appel.
+"""
+import hashlib
+import re
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from typing import Callable, List, Optional
+
+MAP_PROMPT = (
+    "Condense l'extrait suivant d'une transcription en notes factuelles en français, dans l'ordre : "
+    "sujets abordés, décisions, chiffres, noms, actions à mener. Sans phrase d'introduction ni conclusion:\n{texte}"
+)
+COMBINE_PROMPT = (
+    "Fusionne les notes suivantes, prises sur des parties successives d'une transcription, en notes "
+    "factuelles plus courtes en français, dans l'ordre, sans rien perdre d'important. "
+    "Sans phrase d'introduction ni conclusion:\n{texte}"
+)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+# call(prompt, libellé) -> texte ; cache_get(clé) -> texte | None ; cache_put(clé, texte)
+Call = Callable[[str, str], str]
+
+
+def split_segments(text: str, max_chars: int) -> List[str]:
+    """Segments du texte (lignes non vides) ; un segment trop long est coupé en phrases,
+    puis, en dernier recours, en mots."""
+    out: List[str] = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if len(line) <= max_chars:
+            out.append(line)
+            continue
+        for sentence in _SENTENCE_END.split(line):
+            if len(sentence) <= max_chars:
+                out.append(sentence)
+            else:
+                out.extend(pack(sentence.split(), max_chars, sep=" "))
+    return out
+
+
+def pack(segments: List[str], max_chars: int, sep: str = "\n") -> List[str]:
+    """Regroupe des segments consécutifs en morceaux d'au plus ``max_chars`` caractères
+    (un segment seul plus long forme son propre morceau)."""
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for seg in segments:
+        if current and size + len(sep) + len(seg) > max_chars:
+            chunks.append(sep.join(current))
+            current, size = [], 0
+        size += (len(sep) if current else 0) + len(seg)
+        current.append(seg)
+    if current:
+        chunks.append(sep.join(current))
+    return chunks
+
+
+def chunk_key(prompt: str, text: str) -> str:
+    """Clé de cache d'un résultat « map » : gabarit et contenu du morceau."""
+    return hashlib.sha256(f"{prompt}\0{text}".encode("utf-8")).hexdigest()
+
+
+def summarize(text: str, template: str, call: Call, max_chars: int, concurrency: int = 4,
+              cache_get: Optional[Callable[[str], Optional[str]]] = None,
+              cache_put: Optional[Callable[[str, str], None]] = None,
+              on_progress: Optional[Callable[[int, int], None]] = None) -> str:
+    """Résumé de ``text`` selon ``template`` (gabarit avec ``{texte}``).
+
+    ``on_progress(faits, total)`` suit les appels « map ». Au premier appel en échec
+    (annulation comprise), les morceaux en attente sont abandonnés et l'exception est
+    relancée une fois les appels en cours terminés.
+    """
+    chunks = pack(split_segments(text, max_chars), max_chars)
+    if len(chunks) <= 1:
+        return call(template.format(texte=text), "résumé")
+
+    notes = _map(chunks, MAP_PROMPT, call, concurrency, cache_get, cache_put, on_progress)
+    while len(notes) > 1 and sum(len(n) + 2 for n in notes) > max_chars:
+        groups = pack(notes, max_chars, sep="\n\n")
+        if len(groups) >= len(notes):   # notes individuellement trop longues : on s'arrête là
+            break
+        notes = _map(groups, COMBINE_PROMPT, call, concurrency, cache_get, cache_put, None)
+    joined = "\n\n".join(f"[Partie {i}/{len(notes)}]\n{n}" for i, n in enumerate(notes, 1))
+    return call(template.format(texte=joined), "synthèse")
+
+
+def _map(chunks: List[str], prompt: str, call: Call, concurrency: int, cache_get, cache_put,
+         on_progress) -> List[str]:
+    done = [0]
+    lock = threading.Lock()
+
+    def one(i: int, chunk: str) -> str:
+        key = chunk_key(prompt, chunk)
+        notes = cache_get(key) if cache_get is not None else None
+        if notes is None:
+            notes = call(prompt.format(texte=chunk), f"partie {i}/{len(chunks)}").strip()
+            if cache_put is not None and notes:
+                cache_put(key, notes)
+        with lock:
+            done[0] += 1
+            n = done[0]
+        if on_progress is not None:
+            on_progress(n, len(chunks))
+        return notes
+
+    pool = ThreadPoolExecutor(max(1, concurrency), thread_name_prefix="summary-map")
+    futures = [pool.submit(one, i, c) for i, c in enumerate(chunks, 1)]
+    try:
+        finished, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        failed = next((f for f in futures if f in finished and f.exception() is not None), None)
+        if failed is not None:
+            # Premier échec : les morceaux pas encore envoyés ne le sont plus (ni facturés)
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise failed.exception()
+        results = [f.result() for f in futures]
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    return [r for r in results if r]
@@ -0,0 +1,69 @@
+"""Annulation des requêtes du client HTTP partagé (backend réseau enveloppé dans httpcore)."""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("httpx")
+import cloud_client
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        time.sleep(5)
+        try:
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+        except OSError:
+            pass   # client parti
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def slow_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+
+
+def test_check_interrupts_waiting_request(slow_url):
+    client = cloud_client.shared_http_client()
+    deadline = time.monotonic() + 0.5
+
+    def check():
+        if time.monotonic() > deadline:
+            raise _Cancelled()
+
+    t0 = time.monotonic()
+    with cloud_client.interruptible(check), pytest.raises(_Cancelled):
+        client.post(slow_url, content=b"x" * 1024)
+    assert time.monotonic() - t0 < 2.0
+
+
+def test_check_called_before_sending(slow_url):
+    client = cloud_client.shared_http_client()
+
+    def check():
+        raise _Cancelled()
+
+    t0 = time.monotonic()
+    with cloud_client.interruptible(check), pytest.raises(_Cancelled):
+        client.post(slow_url, content=b"x")
+    assert time.monotonic() - t0 < 1.0
+
+
+def test_requests_outside_scope_unaffected(slow_url):
+    client = cloud_client.shared_http_client()
+    assert client.post(slow_url, content=b"x", timeout=10).content == b"ok"
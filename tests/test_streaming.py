@@ -0,0 +1,61 @@
+"""Smoke test de la VAD en flux sur les modèles Silero v5 livrés (entrées/sorties ONNX)."""
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+import streaming
+
+ROOT = Path(__file__).resolve().parent.parent
+_NAMES = ("silero_encoder_v5.onnx", "silero_decoder_v5.onnx")
+
+
+def _assets_dir() -> Path:
+    """assets/ du dépôt ; sans Git LFS (pointeurs texte), la copie identique de faster-whisper."""
+    local = ROOT / "assets"
+    if all((local / n).stat().st_size > 1024 for n in _NAMES):
+        return local
+    fw = pytest.importorskip("faster_whisper")
+    bundled = Path(os.path.dirname(fw.__file__)) / "assets"
+    if not all((bundled / n).exists() for n in _NAMES):
+        pytest.skip("modèles Silero v5 indisponibles (git lfs pull)")
+    return bundled
+
+
+@pytest.fixture(scope="module")
+def vad():
+    assets = _assets_dir()
+    return streaming.SileroStreamVad(assets / _NAMES[0], assets / _NAMES[1])
+
+
+def _frames(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal((n, streaming.FRAME)) * 0.1).astype(np.float32)
+
+
+def test_probabilities_per_frame(vad):
+    vad.reset()
+    probs = vad(_frames(8))
+    assert probs.shape == (8,)
+    assert np.all((probs >= 0) & (probs <= 1))
+    assert vad(np.zeros((0, streaming.FRAME), dtype=np.float32)).shape == (0,)
+
+
+def test_state_carried_across_calls(vad):
+    frames = _frames(6, seed=1)
+    vad.reset()
+    whole = vad(frames)
+    vad.reset()
+    split = np.concatenate([vad(frames[:2]), vad(frames[2:])])
+    np.testing.assert_allclose(whole, split, rtol=1e-5, atol=1e-6)
+
+
+def test_segmenter_ignores_silence(vad):
+    vad.reset()
+    segmenter = streaming.UtteranceSegmenter(vad)
+    silence = np.zeros(streaming.SAMPLING_RATE * 2, dtype=np.float32)
+    assert segmenter.feed(silence) == []
+    assert segmenter.current() is None
+    assert segmenter.flush() is None
@@ -0,0 +1,36 @@
+"""Worker de transcription pour le mode réparti (API et traitement dans des processus séparés).
+
+    WHISPER_ROLE=api uvicorn server:app --host 0.0.0.0 --workers 4     # API : enregistre et met en file
+    python worker.py --local 1 --cloud 4                                # ici ou sur d'autres hôtes
+
+API et workers doivent partager WHISPER_DATA_DIR (uploads, transcriptions, jobs.sqlite3)
+et, pour le chemin local, disposer des modèles (WHISPER_MODELS_DIR).
+Les jobs API (et les résumés) utilisent OPENAI_API_KEY du worker : la clé saisie dans
+le formulaire n'est jamais écrite dans la file partagée, l'API la refuse dans ce mode.
+"""
+import argparse
+import os
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--id", help="identifiant du worker (défaut : hôte-pid)")
+    ap.add_argument("--local", type=int, help="jobs locaux traités en parallèle (WHISPER_LOCAL_WORKERS)")
+    ap.add_argument("--cloud", type=int, help="jobs API traités en parallèle (WHISPER_CLOUD_WORKERS)")
+    args = ap.parse_args()
+
+    # Lus à l'import de server (répartition des cœurs, file partagée…)
+    os.environ["WHISPER_ROLE"] = "worker"
+    if args.id:
+        os.environ["WHISPER_WORKER_ID"] = args.id
+    if args.local is not None:
+        os.environ["WHISPER_LOCAL_WORKERS"] = str(args.local)
+    if args.cloud is not None:
+        os.environ["WHISPER_CLOUD_WORKERS"] = str(args.cloud)
+
+    import server
+    server.run_worker()
+
+
+if __name__ == "__main__":
+    main()